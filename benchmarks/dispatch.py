@@ -0,0 +1,53 @@
+"""
+Measures the cost of handing dispatched events to an :class:`~wumpus.core.events.EventEmitter`,
+for events without a handler, with a synchronous handler and with a coroutine handler.
+
+    python -m benchmarks.dispatch
+"""
+
+import asyncio
+import time
+
+from wumpus.core.connection import Connection
+from wumpus.core.events import EventEmitter
+
+from .payloads import message_create
+
+
+class Emitter(EventEmitter):
+    handled: int = 0
+
+    def typing_start(self, data, /) -> None:
+        self.handled += 1
+
+    # A body of only ``pass`` or ``...`` would be left out as a no-op, measuring the event being skipped instead
+    async def message_update(self, data, /) -> None:
+        self.handled += 1
+
+
+async def run(emitter: Emitter, event: str, data: dict, count: int) -> float:
+    start = time.perf_counter()
+    for _ in range(count):
+        emitter.handle(event, data)
+
+    elapsed = time.perf_counter() - start
+    await asyncio.sleep(0)  # Let any created tasks run
+    return elapsed
+
+
+async def main(count: int = 200000) -> None:
+    assert 'TYPING_START' in Emitter._handlers and 'MESSAGE_UPDATE' in Emitter._handlers
+    emitter = Emitter(Connection(asyncio.get_running_loop()))
+    data = message_create()
+
+    for label, event in (
+        ('no handler', 'MESSAGE_CREATE'),
+        ('sync handler', 'TYPING_START'),
+        ('coroutine handler', 'MESSAGE_UPDATE'),
+    ):
+        elapsed = await run(emitter, event, data, count)
+        print(f'{label:<18} {elapsed / count * 1e9:>8.0f} ns/event')
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,118 @@
+"""
+Replays a gateway session through every encoding and transport compression mode,
+and reports the bytes on the wire and the client CPU time spent per event.
+
+    python -m benchmarks.gateway_modes [session.jsonl]
+
+A session is a file with one gateway payload (``{"op": 0, "t": ..., "d": ...}``) per line.
+Without one, a synthetic session of a bot in a few hundred guilds is used.
+"""
+
+import asyncio
+import json
+import sys
+import time
+import zlib
+
+from typing import List, Union
+
+import earl
+
+from wumpus.core.compression import zstandard
+from wumpus.core.gateway import Gateway
+
+from .payloads import _random, guild_create, message_create, presence_update, user
+
+
+FRAME_SIZE = 16 * 1024
+
+
+def synthetic_session(guilds: int = 200, events: int = 20000) -> List[dict]:
+    session = [{'op': 0, 's': 1, 't': 'READY', 'd': {'v': 9, 'user': user(), 'session_id': '0' * 32, 'guilds': []}}]
+
+    for _ in range(guilds):
+        members = int(_random.paretovariate(1.2) * 50)
+        session.append({'op': 0, 't': 'GUILD_CREATE', 'd': guild_create(min(members, 5000))})
+
+    for _ in range(events):
+        if _random.random() < 0.6:
+            session.append({'op': 0, 't': 'MESSAGE_CREATE', 'd': message_create()})
+        else:
+            session.append({'op': 0, 't': 'PRESENCE_UPDATE', 'd': presence_update()})
+
+    for seq, payload in enumerate(session, start=1):
+        payload['s'] = seq
+
+    return session
+
+
+def load_session(path: str) -> List[dict]:
+    with open(path, encoding='utf-8') as fp:
+        return [json.loads(line) for line in fp if line.strip()]
+
+
+def encode_session(session: List[dict], encoding: str, compression: str) -> List[Union[str, bytes]]:
+    # Encodes a session the way Discord would send it
+    if encoding == 'etf':
+        messages = [earl.pack(payload) for payload in session]
+    else:
+        messages = [json.dumps(payload, separators=(',', ':')) for payload in session]
+
+    if compression is None:
+        return messages
+
+    if encoding == 'json':
+        messages = [message.encode() for message in messages]
+
+    frames = []
+
+    if compression == 'zlib-stream':
+        deflater = zlib.compressobj()
+        for message in messages:
+            data = deflater.compress(message) + deflater.flush(zlib.Z_SYNC_FLUSH)
+            frames.extend(data[i:i + FRAME_SIZE] for i in range(0, len(data), FRAME_SIZE))
+    else:
+        compressor = zstandard.ZstdCompressor().compressobj()
+        for message in messages:
+            frames.append(compressor.compress(message) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK))
+
+    return frames
+
+
+async def replay(frames: List[Union[str, bytes]], encoding: str, compression: str) -> float:
+    gateway = Gateway(None, encoding=encoding, compression=compression)
+
+    start = time.process_time()
+    for frame in frames:
+        if type(frame) is bytes:
+            frame = await gateway._inflate(frame)
+            if frame is None:
+                continue
+
+        await gateway._decode(frame)
+
+    return time.process_time() - start
+
+
+def main() -> None:
+    session = load_session(sys.argv[1]) if len(sys.argv) > 1 else synthetic_session()
+    events = len(session)
+
+    compressions = [None, 'zlib-stream']
+    if zstandard is not None:
+        compressions.append('zstd-stream')
+
+    print(f'{events} events')
+    print(f'{"encoding":<9} {"compression":<12} {"bytes/event":>12} {"cpu µs/event":>13}')
+
+    for encoding in ('json', 'etf'):
+        for compression in compressions:
+            frames = encode_session(session, encoding, compression)
+            wire = sum(len(frame) for frame in frames)
+            cpu = min(asyncio.run(replay(frames, encoding, compression)) for _ in range(3))
+
+            print(f'{encoding:<9} {str(compression):<12} {wire / events:>12.0f} {cpu / events * 1e6:>13.1f}')
+
+
+if __name__ == '__main__':
+    main()
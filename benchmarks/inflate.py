@@ -0,0 +1,86 @@
+"""
+Compares inflating ``zlib-stream`` gateway traffic by concatenating frames into a fresh
+bytearray per message against :class:`~wumpus.core.compression.ZlibStreamInflater`.
+
+    python -m benchmarks.inflate
+"""
+
+import time
+import zlib
+
+import earl
+
+from wumpus.core.compression import ZLIB_SUFFIX, ZlibStreamInflater
+
+from .payloads import guild_create, message_create
+
+
+FRAME_SIZE = 16 * 1024
+
+
+def _stream(messages: list) -> list:
+    # Compresses messages the way Discord does, split into websocket-sized frames
+    deflater = zlib.compressobj()
+    frames = []
+
+    for message in messages:
+        data = deflater.compress(earl.pack(message)) + deflater.flush(zlib.Z_SYNC_FLUSH)
+        frames.extend(data[i:i + FRAME_SIZE] for i in range(0, len(data), FRAME_SIZE))
+
+    return frames
+
+
+def naive(frames: list) -> int:
+    inflater = zlib.decompressobj()
+    buffer = bytearray()
+    total = 0
+
+    for frame in frames:
+        buffer.extend(frame)
+        if len(frame) < 4 or frame[-4:] != ZLIB_SUFFIX:
+            continue
+
+        total += len(inflater.decompress(buffer))
+        buffer = bytearray()
+
+    return total
+
+
+def pipelined(frames: list) -> int:
+    inflater = ZlibStreamInflater()
+    total = 0
+
+    for frame in frames:
+        data = inflater.feed(frame)
+        if data is not None:
+            total += len(data)
+
+    return total
+
+
+def main() -> None:
+    workloads = {
+        'message_create': [message_create() for _ in range(2000)],
+        'guild_create': [guild_create(5000) for _ in range(20)],
+    }
+
+    print(f'{"workload":<16} {"frames":>7} {"MB out":>8} {"naive ms":>10} {"inflater ms":>12}')
+
+    for name, messages in workloads.items():
+        frames = _stream(messages)
+        results = []
+
+        for func in (naive, pipelined):
+            best = float('inf')
+            for _ in range(5):
+                start = time.perf_counter()
+                total = func(frames)
+                best = min(best, time.perf_counter() - start)
+
+            results.append(best)
+
+        print(f'{name:<16} {len(frames):>7} {total / 1e6:>8.1f} {results[0] * 1e3:>10.1f} {results[1] * 1e3:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
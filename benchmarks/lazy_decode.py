@@ -0,0 +1,137 @@
+"""
+Replays ETF dispatches laid out as Discord sends them through a :class:`~wumpus.core.gateway.Gateway`
+that only wants ``MESSAGE_CREATE``, with and without reading envelopes first, and reports the CPU time per event.
+Reading the envelope costs about the same whatever the size, so it also reports where it starts paying off.
+
+    python -m benchmarks.lazy_decode
+"""
+
+import asyncio
+import struct
+import time
+
+from typing import List
+
+import earl
+
+from wumpus.core.connection import Connection
+from wumpus.core.etf import read_envelope
+from wumpus.core.events import EventEmitter
+from wumpus.core.gateway import Gateway
+
+from .payloads import _random, _snowflake, member, message_create, presence_update
+
+
+def _atom(name: str) -> bytes:
+    name = name.encode()
+    return bytes((100, 0, len(name))) + name
+
+
+def discord_pack(payload: dict) -> bytes:
+    # Erlang sorts map keys, so d comes first; keys and t are atoms
+    return b''.join((
+        b'\x83t', struct.pack('>I', 4),
+        _atom('d'), earl.pack(payload['d'])[1:],
+        _atom('op'), earl.pack(payload['op'])[1:],
+        _atom('s'), earl.pack(payload['s'])[1:],
+        _atom('t'), _atom(payload['t']),
+    ))
+
+
+class Emitter(EventEmitter):
+    def message_create(self, data, /) -> None:
+        pass
+
+
+def rich_presence_update() -> dict:
+    # A presence with a rich activity, e.g. a game or music, which makes up a good part of real presence traffic
+    data = presence_update()
+    data['activities'].append({
+        'name': 'Spotify',
+        'type': 2,
+        'id': 'spotify:1',
+        'session_id': '%032x' % _random.getrandbits(128),
+        'details': 'Some song title',
+        'state': 'Some artist; Another artist',
+        'sync_id': '%022x' % _random.getrandbits(88),
+        'created_at': 1627821296789,
+        'timestamps': {'start': 1627821290000, 'end': 1627821490000},
+        'assets': {'large_image': 'spotify:ab67616d0000b273' + '%024x' % _random.getrandbits(96), 'large_text': 'Some album'},
+        'party': {'id': 'spotify:' + _snowflake()},
+        'flags': 48,
+    })
+    return data
+
+
+def members_chunk(count: int) -> dict:
+    guild_id = _snowflake()
+    return {'guild_id': guild_id, 'members': [member(guild_id) for _ in range(count)], 'chunk_index': 0, 'chunk_count': 1}
+
+
+def session(events: int = 20000) -> List[bytes]:
+    messages = []
+    for seq in range(1, events + 1):
+        roll = _random.random()
+        if roll < 0.01:
+            # Member chunks, e.g. from chunking guilds on startup, are rare but by far the largest
+            payload = {'op': 0, 's': seq, 't': 'GUILD_MEMBERS_CHUNK', 'd': members_chunk(_random.randrange(10, 200))}
+        elif roll < 0.1:
+            payload = {'op': 0, 's': seq, 't': 'MESSAGE_CREATE', 'd': message_create()}
+        elif roll < 0.4:
+            payload = {'op': 0, 's': seq, 't': 'PRESENCE_UPDATE', 'd': rich_presence_update()}
+        else:
+            payload = {'op': 0, 's': seq, 't': 'PRESENCE_UPDATE', 'd': presence_update()}
+
+        messages.append(discord_pack(payload))
+
+    return messages
+
+
+async def replay(messages: List[bytes], lazy_decode_size: int) -> float:
+    gateway = Gateway(None, emitter=Emitter(Connection(asyncio.get_running_loop())), compression=None)
+    gateway.LAZY_DECODE_SIZE = lazy_decode_size
+
+    start = time.process_time()
+    for message in messages:
+        await gateway.parse_websocket_message(message)
+
+    return time.process_time() - start
+
+
+def crossover() -> None:
+    print(f'{"members":>8} {"bytes":>8} {"envelope µs":>12} {"whole µs":>9}')
+    for count in (1, 2, 4, 8, 16, 32):
+        message = discord_pack({'op': 0, 's': 1, 't': 'GUILD_MEMBERS_CHUNK', 'd': members_chunk(count)})
+
+        start = time.process_time()
+        for _ in range(2000):
+            read_envelope(message)
+        envelope = (time.process_time() - start) / 2000
+
+        start = time.process_time()
+        for _ in range(2000):
+            earl.unpack(message)
+        whole = (time.process_time() - start) / 2000
+
+        print(f'{count:>8} {len(message):>8} {envelope * 1e6:>12.1f} {whole * 1e6:>9.1f}')
+
+
+def main() -> None:
+    crossover()
+
+    messages = session()
+    size = sum(len(message) for message in messages) / len(messages)
+    print(f'\n{len(messages)} events, {size:.0f} bytes/event, 9% MESSAGE_CREATE, 1% GUILD_MEMBERS_CHUNK')
+    print(f'{"mode":<16} {"cpu µs/event":>12}')
+
+    for label, lazy_decode_size in (
+        ('decode whole', 1 << 62),
+        (f'default ({Gateway.LAZY_DECODE_SIZE}B)', Gateway.LAZY_DECODE_SIZE),
+        ('envelope first', 0),
+    ):
+        cpu = min(asyncio.run(replay(messages, lazy_decode_size)) for _ in range(5))
+        print(f'{label:<16} {cpu / len(messages) * 1e6:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+Synthetic, but realistically shaped, Discord payloads shared by the benchmarks.
+"""
+
+import random
+
+
+__all__ = (
+    'user',
+    'member',
+    'message_create',
+    'presence_update',
+    'guild_create',
+    'PAYLOADS'
+)
+
+
+_random = random.Random(3332)
+
+
+def _snowflake() -> str:
+    return str(_random.randrange(10 ** 17, 10 ** 18))
+
+
+def user() -> dict:
+    return {
+        'id': _snowflake(),
+        'username': 'wumpus' + str(_random.randrange(10000)),
+        'discriminator': '%04d' % _random.randrange(10000),
+        'avatar': '%032x' % _random.getrandbits(128),
+        'public_flags': _random.choice((0, 64, 128, 256)),
+        'bot': False,
+    }
+
+
+def member(guild_id: str) -> dict:
+    return {
+        'user': user(),
+        'nick': _random.choice((None, 'nickname ✨')),
+        'roles': [_snowflake() for _ in range(_random.randrange(5))],
+        'joined_at': '2021-08-01T12:34:56.789000+00:00',
+        'premium_since': None,
+        'deaf': False,
+        'mute': False,
+        'pending': False,
+        'guild_id': guild_id,
+    }
+
+
+def message_create() -> dict:
+    guild_id = _snowflake()
+    return {
+        'id': _snowflake(),
+        'channel_id': _snowflake(),
+        'guild_id': guild_id,
+        'author': user(),
+        'member': member(guild_id),
+        'content': 'Hello world! ' * 8,
+        'timestamp': '2021-08-01T12:34:56.789000+00:00',
+        'edited_timestamp': None,
+        'tts': False,
+        'mention_everyone': False,
+        'mentions': [user() for _ in range(2)],
+        'mention_roles': [],
+        'attachments': [],
+        'embeds': [],
+        'pinned': False,
+        'type': 0,
+        'flags': 0,
+        'nonce': _snowflake(),
+    }
+
+
+def presence_update() -> dict:
+    return {
+        'user': {'id': _snowflake()},
+        'guild_id': _snowflake(),
+        'status': 'online',
+        'activities': [{'name': 'a game', 'type': 0, 'created_at': 1627821296789}],
+        'client_status': {'desktop': 'online'},
+    }
+
+
+def guild_create(members: int = 1000) -> dict:
+    guild_id = _snowflake()
+    return {
+        'id': guild_id,
+        'name': 'A very large guild',
+        'icon': '%032x' % _random.getrandbits(128),
+        'owner_id': _snowflake(),
+        'region': 'us-east',
+        'features': ['COMMUNITY', 'NEWS', 'ANIMATED_ICON'],
+        'member_count': members,
+        'large': True,
+        'roles': [
+            {'id': _snowflake(), 'name': 'role %d' % i, 'color': i, 'permissions': '104324673', 'position': i}
+            for i in range(50)
+        ],
+        'channels': [
+            {'id': _snowflake(), 'name': 'channel-%d' % i, 'type': 0, 'position': i, 'topic': None}
+            for i in range(100)
+        ],
+        'members': [member(guild_id) for _ in range(members)],
+        'presences': [presence_update() for _ in range(members // 4)],
+    }
+
+
+PAYLOADS = {
+    'MESSAGE_CREATE': message_create,
+    'PRESENCE_UPDATE': presence_update,
+    'GUILD_CREATE': guild_create,
+}
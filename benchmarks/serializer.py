@@ -0,0 +1,35 @@
+"""
+Compares the available JSON serializers on Discord-shaped payloads.
+
+    python -m benchmarks.serializer
+"""
+
+import timeit
+
+from wumpus.core.serializer import OrjsonSerializer, StdlibSerializer, orjson
+
+from .payloads import PAYLOADS
+
+
+def main() -> None:
+    serializers = [StdlibSerializer()]
+    if orjson is not None:
+        serializers.append(OrjsonSerializer())
+
+    print(f'{"payload":<16} {"serializer":<10} {"bytes":>9} {"encode µs":>11} {"decode µs":>11}')
+
+    for name, factory in PAYLOADS.items():
+        payload = factory()
+
+        for serializer in serializers:
+            encoded = serializer.encode(payload)
+            number = max(10, 200_000 // len(encoded))
+
+            encode = min(timeit.repeat(lambda: serializer.encode(payload), number=number, repeat=5)) / number
+            decode = min(timeit.repeat(lambda: serializer.decode(encoded), number=number, repeat=5)) / number
+
+            print(f'{name:<16} {serializer.name:<10} {len(encoded):>9} {encode * 1e6:>11.1f} {decode * 1e6:>11.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -40,6 +40,7 @@ setup(
         'wumpus',
         'wumpus.core',
         'wumpus.models',
+        'wumpus.testing',
         'wumpus.typings'
     ],
     license='MIT',
@@ -54,7 +55,8 @@ setup(
             'furo',
         ],
         'performance': [
-            'orjson>=1.3.0'
+            'orjson>=1.3.0',
+            'zstandard>=0.15.0'
         ]
     },
     python_requires='>=3.8.0',
@@ -0,0 +1,92 @@
+import struct
+
+import earl
+import pytest
+
+from wumpus.core.etf import read_envelope
+from wumpus.core.gateway import _unpack_etf
+
+
+def _atom(name: str, tag: int) -> bytes:
+    name = name.encode()
+    if tag in (100, 118):  # ATOM_EXT, ATOM_UTF8_EXT
+        return bytes((tag, 0, len(name))) + name
+
+    return bytes((tag, len(name))) + name  # SMALL_ATOM_EXT, SMALL_ATOM_UTF8_EXT
+
+
+def _term(value, tag: int) -> bytes:
+    return _atom('nil', tag) if value is None else earl.pack(value)[1:]
+
+
+def discord_pack(payload: dict, tag: int = 100) -> bytes:
+    # Laid out as Discord sends payloads: keys are sorted atoms, so d comes first, and t is an atom
+    t = payload['t']
+    return b''.join((
+        b'\x83t', struct.pack('>I', 4),
+        _atom('d', tag), _term(payload['d'], tag),
+        _atom('op', tag), _term(payload['op'], tag),
+        _atom('s', tag), _term(payload['s'], tag),
+        _atom('t', tag), _atom('nil' if t is None else t, tag),
+    ))
+
+
+def _check(data: bytes) -> None:
+    envelope = read_envelope(data)
+    assert envelope is not None
+
+    message = _unpack_etf(data)
+    assert (envelope.op, envelope.s, envelope.t) == (message['op'], message['s'], message['t'])
+    assert _unpack_etf(b'\x83' + data[envelope.data_start:envelope.data_end]) == message['d']
+
+
+NESTED = {
+    'id': '881234567890123456',
+    'author': {'id': '1', 'username': 'wumpus', 'flags': [1, 2, {'op': 3, 's': 4, 't': 'READY'}]},
+    'embeds': [{'fields': [{'name': 'a', 'value': 'b'}] * 3}],
+    'op': 7,
+    's': None,
+    't': 'MESSAGE_CREATE',
+}
+
+UNICODE = {'content': 'héllo wörld ✨ 你好 👋', 'nick': 'ñ' * 300}
+
+# The end of another payload, inside a string, which mustn't be mistaken for this one's
+DECOY = {'content': 'x' * 300 + 'w\x02opa\x07w\x01sa\x09w\x01tw\x05READY'}
+
+PAYLOADS = [
+    {'op': 0, 's': 1, 't': 'MESSAGE_CREATE', 'd': NESTED},
+    {'op': 0, 's': 70000, 't': 'PRESENCE_UPDATE', 'd': UNICODE},
+    {'op': 0, 's': 2, 't': 'MESSAGE_CREATE', 'd': DECOY},
+    {'op': 0, 's': 3, 't': 'GUILD_MEMBERS_CHUNK', 'd': [NESTED] * 20},
+    {'op': 11, 's': None, 't': None, 'd': None},
+    {'op': 10, 's': None, 't': None, 'd': {'heartbeat_interval': 41250}},
+    {'op': 9, 's': None, 't': None, 'd': False},
+]
+
+
+# earl can't read UTF-8 atoms, so only ATOM_EXT and SMALL_ATOM_EXT are compared
+@pytest.mark.parametrize('tag', (100, 115))
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_discord_layout_matches_unpack(payload, tag):
+    _check(discord_pack(payload, tag))
+
+
+@pytest.mark.parametrize('payload', PAYLOADS)
+def test_other_layouts_match_unpack(payload):
+    # Binary keys in whatever order earl packs them, which is read by the generic path
+    _check(earl.pack(payload))
+
+
+def test_binary_data_matches_unpack():
+    data = discord_pack({'op': 0, 's': 5, 't': 'MESSAGE_CREATE', 'd': {'a': b'\x00\x02op\xff' * 100, 'b': 'c'}})
+
+    envelope = read_envelope(data)
+    assert envelope is not None and envelope.t == 'MESSAGE_CREATE'
+    assert earl.unpack(b'\x83' + data[envelope.data_start:envelope.data_end]) == earl.unpack(data)['d']
+
+
+def test_unexpected_layouts_are_left_to_unpack():
+    assert read_envelope(earl.pack([1, 2, 3])) is None
+    assert read_envelope(earl.pack({'d': 1})) is None  # No op
+    assert read_envelope(discord_pack(PAYLOADS[0])[:-3]) is None
@@ -0,0 +1,38 @@
+import asyncio
+
+from wumpus.core.http import HTTPClient, RouteTemplate
+from wumpus.testing import FakeDiscord
+
+
+def test_route_templates_stay_interned_once_evicted(monkeypatch):
+    monkeypatch.setattr(RouteTemplate, 'MAX_TEMPLATES', 8)
+    monkeypatch.setattr(RouteTemplate, '__templates__', type(RouteTemplate.__templates__)())
+
+    root = RouteTemplate.compile('')
+    members = root.child('guilds').param_child().child('members')
+    assert members.path == 'guilds/{guild_id}/members'
+
+    for i in range(100):
+        RouteTemplate.compile(f'channels/{i}/messages')
+
+    assert len(RouteTemplate.__templates__) == 8
+    assert root.child('guilds').param_child().child('members') is RouteTemplate.compile('guilds/{guild_id}/members')
+
+
+def test_writes_invalidate_cached_responses_with_any_query():
+    async def main():
+        async with FakeDiscord() as discord:
+            http = HTTPClient(token=FakeDiscord.TOKEN, base_url=discord.api_url, cache_ttl=60)
+            channel_id = discord.guild_ids[0] + 1
+
+            try:
+                message = await http.route('channels/{channel_id}/messages', channel_id).post({'content': 'before'})
+                router = http.route('channels/{channel_id}/messages/{message_id}', channel_id, message['id'])
+
+                assert (await router.get({'with_counts': 'true'}))['content'] == 'before'
+                await router.patch({'content': 'after'})
+                assert (await router.get({'with_counts': 'true'}))['content'] == 'after'
+            finally:
+                await http.close()
+
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+import asyncio
+
+from wumpus.core.enums import OverflowPolicy
+from wumpus.core.listeners import ListenerExecutor
+
+
+class Listener:
+    # A listener which runs until it is released
+    def __init__(self):
+        self.calls = []
+        self.release = asyncio.Event()
+
+    async def __call__(self, data):
+        self.calls.append(data)
+        await self.release.wait()
+
+
+def test_drop_counts_dropped_events():
+    async def main():
+        executor = ListenerExecutor(2, overflow=OverflowPolicy.drop)
+        listener = Listener()
+
+        for i in range(5):
+            assert executor.submit('MESSAGE_CREATE', [listener], i) is None
+
+        await asyncio.sleep(0)
+        assert listener.calls == [0, 1]
+        assert executor.pending('message_create') == 2
+        assert executor.dropped('message_create') == 3
+
+        listener.release.set()
+        await asyncio.sleep(0)
+        assert executor.pending('message_create') == 0
+
+        await executor.close()
+
+    asyncio.run(main())
+
+
+def test_queue_runs_overflow_later():
+    async def main():
+        executor = ListenerExecutor(1, overflow=OverflowPolicy.queue, max_queue=2)
+        listener = Listener()
+
+        for i in range(4):
+            assert executor.submit('MESSAGE_CREATE', [listener], i) is None
+
+        await asyncio.sleep(0)
+        assert listener.calls == [0]
+        assert executor.pending('MESSAGE_CREATE') == 3
+        assert executor.dropped('MESSAGE_CREATE') == 1
+
+        listener.release.set()
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert listener.calls == [0, 1, 2]
+        await executor.close()
+
+    asyncio.run(main())
+
+
+def test_block_applies_backpressure():
+    async def main():
+        executor = ListenerExecutor(1, overflow=OverflowPolicy.block, max_queue=1)
+        listener = Listener()
+
+        assert executor.submit('MESSAGE_CREATE', [listener], 0) is None
+        assert executor.submit('MESSAGE_CREATE', [listener], 1) is None
+
+        blocked = executor.submit('MESSAGE_CREATE', [listener], 2)
+        assert blocked is not None
+
+        # Anything submitted while blocked waits behind it, rather than jumping the queue
+        later = executor.submit('MESSAGE_CREATE', [listener], 3)
+        assert later is not None
+
+        await asyncio.sleep(0)
+        assert not blocked.done()
+        assert executor.dropped('MESSAGE_CREATE') == 0
+
+        listener.release.set()
+        await asyncio.wait_for(asyncio.gather(blocked, later), 1)
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+        assert listener.calls == [0, 1, 2, 3]
+        await executor.close()
+
+    asyncio.run(main())
+
+
+def test_limits_are_per_event():
+    async def main():
+        executor = ListenerExecutor(1, limits={'typing_start': 2}, overflow=OverflowPolicy.drop)
+        listener = Listener()
+
+        for event in ('MESSAGE_CREATE', 'TYPING_START'):
+            for i in range(3):
+                executor.submit(event, [listener], (event, i))
+
+        assert executor.dropped('MESSAGE_CREATE') == 2
+        assert executor.dropped('TYPING_START') == 1
+
+        await executor.close()
+
+    asyncio.run(main())
+
+
+def test_serial_guilds_keep_order_within_a_guild():
+    async def main():
+        executor = ListenerExecutor(10, serial_guilds=True)
+        calls = []
+
+        async def listener(data):
+            await asyncio.sleep(0.01 if data['n'] == 0 else 0)
+            calls.append((data['guild_id'], data['n']))
+
+        for n in range(3):
+            executor.submit('MESSAGE_CREATE', [listener], {'guild_id': '1', 'n': n})
+        executor.submit('MESSAGE_CREATE', [listener], {'guild_id': '2', 'n': 9})
+
+        await asyncio.sleep(0.1)
+        assert [call for call in calls if call[0] == '1'] == [('1', 0), ('1', 1), ('1', 2)]
+        assert calls[0] == ('2', 9)  # Another guild isn't held up
+
+        await executor.close()
+
+    asyncio.run(main())
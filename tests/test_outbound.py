@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+from wumpus.core.enums import SendPriority
+from wumpus.core.outbound import SendQueue
+from wumpus.errors import GatewayNotConnected
+
+
+def _queue(sent, **kwargs):
+    async def send(data):
+        sent.append(data)
+
+    return SendQueue(send, **kwargs)
+
+
+def test_heartbeats_are_sent_when_other_lanes_are_exhausted():
+    async def main():
+        sent = []
+        queue = _queue(sent, rate=3, per=60.0, reserved=1)
+
+        futures = [queue.put_nowait(f'normal {i}', SendPriority.normal) for i in range(3)]
+        await asyncio.wait_for(asyncio.gather(*futures[:2]), 1)
+        await asyncio.sleep(0.01)
+        assert not futures[2].done()  # Only rate - reserved sends are shared
+
+        await asyncio.wait_for(queue.put_nowait('heartbeat', SendPriority.heartbeat), 1)
+        assert sent == ['normal 0', 'normal 1', 'heartbeat']
+        assert queue.pending == 1
+
+        queue.close()
+
+    asyncio.run(main())
+
+
+def test_higher_priority_lanes_are_drained_first():
+    async def main():
+        sent = []
+        queue = _queue(sent)
+
+        # Nothing is written before the writer task first runs
+        futures = [
+            queue.put_nowait('members', SendPriority.members),
+            queue.put_nowait('normal', SendPriority.normal),
+            queue.put_nowait('identify', SendPriority.handshake),
+            queue.put_nowait('heartbeat', SendPriority.heartbeat),
+        ]
+        await asyncio.wait_for(asyncio.gather(*futures), 1)
+
+        assert sent[0] == 'heartbeat'
+        assert sent[1] == 'identify'
+        assert sent.index('normal') < sent.index('members')
+
+        queue.close()
+
+    asyncio.run(main())
+
+
+def test_full_lanes_make_put_wait():
+    async def main():
+        queue = _queue([], rate=1, per=60.0, reserved=0, max_size=1)
+
+        await asyncio.wait_for(queue.put_nowait('first', SendPriority.normal), 1)
+        queue.put_nowait('second', SendPriority.normal)
+
+        with pytest.raises(asyncio.QueueFull):
+            queue.put_nowait('third', SendPriority.normal)
+
+        put = asyncio.ensure_future(queue.put('third', SendPriority.normal))
+        await asyncio.sleep(0.01)
+        assert not put.done()
+
+        queue.close()
+        with pytest.raises(GatewayNotConnected):
+            await asyncio.wait_for(put, 1)
+
+    asyncio.run(main())
+
+
+def test_closing_drops_pending_payloads():
+    async def main():
+        sent = []
+        queue = _queue(sent, rate=1, per=60.0, reserved=0)
+
+        await asyncio.wait_for(queue.put_nowait('first', SendPriority.normal), 1)
+        pending = queue.put_nowait('second', SendPriority.normal)
+
+        queue.close(code=4000, shard_id=1)
+        assert pending.cancelled()
+        assert queue.close_code == 4000
+
+        with pytest.raises(GatewayNotConnected) as info:
+            queue.put_nowait('third', SendPriority.heartbeat)
+
+        assert (info.value.code, info.value.shard_id) == (4000, 1)
+        assert sent == ['first']
+
+    asyncio.run(main())
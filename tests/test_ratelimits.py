@@ -0,0 +1,50 @@
+import asyncio
+
+from wumpus.core.ratelimits import Bucket, BucketRegistry
+
+
+def test_failed_discovery_lets_another_request_through():
+    # A request discovering a bucket's limits which ends without Discord reporting any
+    # (e.g. it failed on the network) must not leave the bucket exhausted forever
+    async def main():
+        bucket = Bucket('GET /users/@me:')
+
+        await bucket.acquire()
+        bucket.release(consumed=True)
+
+        await asyncio.wait_for(bucket.acquire(), 1)
+        bucket.release(consumed=True)
+
+    asyncio.run(main())
+
+
+def test_failed_discovery_wakes_a_waiter():
+    async def main():
+        bucket = Bucket('GET /users/@me:')
+
+        await bucket.acquire()
+        waiter = asyncio.ensure_future(bucket.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done()
+
+        bucket.release(consumed=True)
+        await asyncio.wait_for(waiter, 1)
+        bucket.release(consumed=True)
+
+    asyncio.run(main())
+
+
+def test_concurrently_discovered_buckets_are_rekeyed():
+    async def main():
+        registry = BucketRegistry()
+        route = 'GET /channels/{channel_id}'
+
+        first, second = registry.get(route, '1'), registry.get(route, '2')
+        registry.rekey(first, route, '1', 'abcd')
+        registry.rekey(second, route, '2', 'abcd')
+
+        assert second.key == 'abcd:2'
+        assert registry.get(route, '2') is second
+        assert route + ':2' not in registry
+
+    asyncio.run(main())
@@ -0,0 +1,80 @@
+import sys
+
+import pytest
+
+if sys.platform == 'win32':
+    pytest.skip('SharedMemoryBackend is only available on Unix', allow_module_level=True)
+
+from wumpus.core.shared import SharedMemoryBackend
+
+
+@pytest.fixture
+def backends(tmp_path):
+    # Two backends opening the same file stand in for two processes
+    path = str(tmp_path / 'ratelimits')
+    first, second = SharedMemoryBackend(path, slots=64), SharedMemoryBackend(path, slots=64)
+    yield first, second
+
+    first.close()
+    second.close()
+
+
+def test_bucket_state_is_shared(backends):
+    first, second = backends
+    ours, theirs = first.get_bucket_state('GET /users/@me:'), second.get_bucket_state('GET /users/@me:')
+
+    assert ours.reserve()
+    assert not theirs.reserve()  # Only one request discovers the limits
+
+    ours.update(limit=5, remaining=4, reset_after=10.0)
+    assert theirs.limit == 5
+    assert theirs.remaining == 4
+    assert 9 < theirs.reset_after <= 10
+
+    assert theirs.reserve()
+    assert ours.remaining == 3
+
+    theirs.refund()
+    assert ours.remaining == 4
+
+
+def test_exhausted_bucket_delays_every_process(backends):
+    first, second = backends
+    ours, theirs = first.get_bucket_state('POST /channels/1/messages:1'), second.get_bucket_state('POST /channels/1/messages:1')
+
+    assert ours.reserve()
+    ours.update(limit=1, remaining=0, reset_after=5.0)
+
+    assert not theirs.reserve()
+    assert 4 < theirs.delay() <= 5
+
+    theirs.block(8.0)
+    assert 7 < ours.delay() <= 8
+
+
+def test_buckets_are_separate(backends):
+    first, second = backends
+    ours, theirs = first.get_bucket_state('GET /users/@me:'), second.get_bucket_state('GET /gateway/bot:')
+
+    assert ours.reserve()
+    ours.update(limit=1, remaining=0, reset_after=5.0)
+
+    assert theirs.reserve()
+    assert theirs.delay() == 0
+
+
+def test_global_state_is_shared(backends):
+    first, second = backends
+    ours, theirs = first.get_global_state(2, 1), second.get_global_state(2, 1)
+
+    assert ours.take() == 0
+    assert theirs.take() == 0
+    assert ours.take() > 0  # Both tokens were taken between the two
+
+    ours.block(3.0)
+    assert 2 < theirs.blocked_for() <= 3
+
+
+def test_slot_count_must_match(backends, tmp_path):
+    with pytest.raises(ValueError):
+        SharedMemoryBackend(str(tmp_path / 'ratelimits'), slots=32)
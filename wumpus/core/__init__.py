@@ -1,4 +1,8 @@
 from .client import Client, Emitter
-from .http import Router
+from .http import RouteTemplate, Router, Transport
 from .manager import BaseManager, CacheBasedManager, UserManager, GuildManager
+from .listeners import ListenerExecutor
+from .session import SessionState, SessionStore, FileSessionStore, SQLiteSessionStore
+from .shard import IdentifyScheduler, Shard, ShardManager
+from .cluster import ClusterInfo, ClusterBus, ClusterLauncher
 from .enums import *
@@ -2,16 +2,35 @@ from __future__ import annotations
 
 from collections import defaultdict
 from asyncio import get_event_loop, AbstractEventLoop
-from typing import Callable, Dict, List, NamedTuple, Optional, Union, overload
+from concurrent.futures import Executor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Union, overload, TYPE_CHECKING
 
-from .http import Router
+from .compression import zstandard
+from .http import Router, Transport
+from .serializer import Serializer
 from .connection import Connection
 
 from ..models.user import ClientUser
 from ..models.guild import GuildPreview
 from ..models.intents import Intents
 
-from ..typings.core import Snowflake, HTTPVersion, GatewayVersion, EmitterCallback
+# Imported after the models, since gateway imports utils which imports them back
+from .events import EventEmitter
+from .listeners import ListenerExecutor
+from .session import SessionStore
+from .shard import IdentifyScheduler, ShardManager
+
+if TYPE_CHECKING:
+    from ..testing.recorder import FrameRecorder
+
+from ..typings.core import (
+    Snowflake,
+    HTTPVersion,
+    GatewayVersion,
+    GatewayEncoding,
+    GatewayCompression,
+    EmitterCallback
+)
 
 
 __all__ = (
@@ -29,12 +48,41 @@ class Emitter:
     def __init__(self):
         self.__direct_listeners: Dict[str, EmitterCallback] = {}
         self.__listeners: Dict[str, List[WeakListener]] = defaultdict(list)
+        self._listened: Set[str] = set()  # Events with listeners, as Discord names them
 
     def _add_direct_listener(self, event: str, callback: EmitterCallback, /) -> None:
         self.__direct_listeners[event] = callback
+        self._listened.add(event.upper())
 
     def _add_weak_listener(self, event: str, callback: EmitterCallback, /, *, count: int = None) -> None:
         self.__listeners[event].append(WeakListener(callback, count=count))
+        self._listened.add(event.upper())
+
+    def _get_listeners(self, event: str, /) -> List[EmitterCallback]:
+        # Returns the callbacks to call for a dispatched event, using up one call of counted listeners
+        name = event.lower()
+        callbacks = []
+
+        direct = self.__direct_listeners.get(name)
+        if direct is not None:
+            callbacks.append(direct)
+
+        listeners = self.__listeners.get(name)
+        if listeners:
+            remaining = []
+            for listener in listeners:
+                callbacks.append(listener.callback)
+
+                if listener.count is None:
+                    remaining.append(listener)
+                elif listener.count > 1:
+                    remaining.append(listener._replace(count=listener.count - 1))
+
+            self.__listeners[name] = remaining
+            if not remaining and direct is None:
+                self._listened.discard(name.upper())
+
+        return callbacks
 
     @overload
     def event(self, event: str) -> Callable[[EmitterCallback], EmitterCallback]:
@@ -62,6 +110,44 @@ class Emitter:
 class Client(Emitter):
     """
     Represents a client connection to Discord.
+
+    The client connects to the gateway through a :class:`~.ShardManager`. By default it runs as many shards
+    as Discord recommends, all in this process; pass ``shard_ids`` and ``shard_count`` to run only some of them.
+
+    Parameters
+    ----------
+    intents: Optional[:class:`~.Intents`]
+        The intents to connect with. Defaults to the smallest intents receiving every event the client has
+        listeners or handlers for when it connects, see :meth:`~.Intents.from_events`. Events nothing listens to
+        are dropped before they are parsed either way. There is no cache configuration to derive intents from:
+        nothing is cached from the gateway beyond what handlers do, and their events are already included.
+        Pass intents explicitly to receive more, e.g. ``members`` for member events.
+    http_base_url: Optional[str]
+        The URL the API is at, including the version, e.g. ``'http://127.0.0.1:8080/api/v9'``.
+        Defaults to Discord's. The gateway is connected to at whatever URL the API returns.
+    shard_ids: Optional[Iterable[int]]
+        The IDs of the shards to run. Defaults to all of them.
+    shard_count: Optional[int]
+        The total amount of shards. Defaults to the amount Discord recommends.
+    identify_scheduler: Optional[:class:`~.IdentifyScheduler`]
+        Schedules identifies. Defaults to one created from the session start limit reported by Discord.
+    session_store: Optional[:class:`~.SessionStore`]
+        Persists gateway sessions, so that shards resume them instead of identifying again after a restart.
+    listener_executor: Optional[:class:`~.ListenerExecutor`]
+        Runs event listeners, bounding how many run at once. Defaults to one with the default limits.
+    gateway_encoding: str
+        The encoding of gateway payloads, ``'etf'`` (the default) or ``'json'``.
+        ETF is smaller and faster to decode, JSON is easier to debug.
+    gateway_compression: Optional[str]
+        The transport compression of the gateway, ``'zlib-stream'`` (the default), ``'zstd-stream'``
+        or ``None`` to disable it. ``'zstd-stream'`` requires `zstandard <https://github.com/indygreg/python-zstandard>`_.
+    gateway_offload_threshold: Optional[int]
+        The size in bytes from which gateway payloads are inflated, and decoded if ``gateway_executor``
+        is given, off the event loop. ``None`` (the default) disables offloading. See :class:`~.Gateway`.
+    gateway_executor: Optional[:class:`concurrent.futures.Executor`]
+        The executor large gateway payloads are decoded in. See :class:`~.Gateway`.
+    gateway_recorder: Optional[:class:`~.FrameRecorder`]
+        Records the frames received from the gateway to disk, to replay them later with :func:`~.replay`.
     """
 
     def __init__(
@@ -70,16 +156,52 @@ class Client(Emitter):
         intents: Intents = None,
         # allowed_mentions: AllowedMentions = None,
         http_version: HTTPVersion = 9,
+        http_base_url: Optional[str] = None,
         gateway_version: GatewayVersion = 9,
+        shard_ids: Optional[Iterable[int]] = None,
+        shard_count: Optional[int] = None,
+        identify_scheduler: Optional[IdentifyScheduler] = None,
+        session_store: Optional[SessionStore] = None,
+        listener_executor: Optional[ListenerExecutor] = None,
+        gateway_encoding: GatewayEncoding = 'etf',
+        gateway_compression: Optional[GatewayCompression] = 'zlib-stream',
+        gateway_offload_threshold: Optional[int] = None,
+        gateway_executor: Optional[Executor] = None,
+        gateway_recorder: Optional[FrameRecorder] = None,
+        transport: Transport = None,
+        serializer: Serializer = None,
         loop: AbstractEventLoop = None
     ) -> None:
+        if gateway_encoding not in ('json', 'etf'):
+            raise ValueError(f'unknown gateway encoding {gateway_encoding!r}')
+
+        if gateway_compression not in (None, 'zlib-stream', 'zstd-stream'):
+            raise ValueError(f'unknown gateway compression {gateway_compression!r}')
+
+        if gateway_compression == 'zstd-stream' and zstandard is None:
+            raise RuntimeError('zstandard is required for zstd-stream compression, install it with "pip install zstandard"')
+
         super().__init__()
         self._loop: AbstractEventLoop = loop or get_event_loop()
-        self._intents: Intents = intents or Intents.default()
+        self._intents: Optional[Intents] = intents
         self._connection: Connection = None
 
         self._http_version: int = http_version
+        self._http_base_url: Optional[str] = http_base_url
         self._gateway_version: int = gateway_version
+        self._gateway_encoding: GatewayEncoding = gateway_encoding
+        self._gateway_compression: Optional[GatewayCompression] = gateway_compression
+        self._gateway_offload_threshold: Optional[int] = gateway_offload_threshold
+        self._gateway_executor: Optional[Executor] = gateway_executor
+        self._gateway_recorder: Optional[FrameRecorder] = gateway_recorder
+        self._shard_ids: Optional[Iterable[int]] = shard_ids
+        self._shard_count: Optional[int] = shard_count
+        self._identify_scheduler: Optional[IdentifyScheduler] = identify_scheduler
+        self._session_store: Optional[SessionStore] = session_store
+        self._listener_executor: ListenerExecutor = listener_executor or ListenerExecutor()
+        self._shard_manager: Optional[ShardManager] = None
+        self._transport: Optional[Transport] = transport
+        self._serializer: Optional[Serializer] = serializer
 
     @property
     def loop(self) -> AbstractEventLoop:
@@ -96,6 +218,16 @@ class Client(Emitter):
         """:class:`~.ClientUser` The Discord user this client represents."""
         return self._connection.user
 
+    @property
+    def intents(self) -> Optional[Intents]:
+        """Optional[:class:`~.Intents`]: The intents this client connects with. If not given, these are known once connected."""
+        return self._intents
+
+    @property
+    def shards(self) -> Optional[ShardManager]:
+        """:class:`~.ShardManager`: The shards this client is connected through, once connected."""
+        return self._shard_manager
+
     def _establish_connection(self, *, force: bool = False) -> None:
         if self._connection is not None and not force:
             return
@@ -108,9 +240,66 @@ class Client(Emitter):
         """
 
         self._establish_connection()
-        self._connection.establish_http(token, v=self._http_version)
+        self._connection.establish_http(
+            token,
+            v=self._http_version,
+            transport=self._transport,
+            serializer=self._serializer,
+            base_url=self._http_base_url
+        )
         await self._connection.update_user()
 
+    async def connect(self, /) -> None:
+        """|coro|
+
+        Connects to the gateway and runs every shard until the client is closed.
+        :meth:`login` must be called first.
+        """
+
+        emitter = EventEmitter(self._connection, listeners=self, executor=self._listener_executor)
+        if self._intents is None:
+            self._intents = Intents.from_events(emitter.events)
+
+        self._shard_manager = ShardManager(
+            self._connection,
+            shard_ids=self._shard_ids,
+            shard_count=self._shard_count,
+            scheduler=self._identify_scheduler,
+            session_store=self._session_store,
+            emitter=emitter,
+            intents=int(self._intents),
+            v=self._gateway_version,
+            encoding=self._gateway_encoding,
+            compression=self._gateway_compression,
+            offload_threshold=self._gateway_offload_threshold,
+            executor=self._gateway_executor,
+            recorder=self._gateway_recorder
+        )
+        await self._shard_manager.run()
+
+    async def start(self, token: str = None, /) -> None:
+        """|coro|
+
+        Logs in and connects to the gateway. This is shorthand for :meth:`login` followed by :meth:`connect`.
+        """
+
+        await self.login(token)
+        await self.connect()
+
+    async def close(self, /) -> None:
+        """|coro|
+
+        Disconnects every shard and closes the HTTP session.
+        """
+
+        if self._shard_manager is not None:
+            await self._shard_manager.close()
+
+        await self._listener_executor.close()
+
+        if self._connection is not None and self._connection.http is not None:
+            await self._connection.http.close()
+
     async def fetch_guild_preview(self, /, id: Snowflake) -> GuildPreview:
         """|coro|
 
@@ -0,0 +1,486 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import multiprocessing
+
+from contextlib import asynccontextmanager
+from multiprocessing.connection import Connection as Pipe
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple, TYPE_CHECKING
+
+from .connection import Connection
+from .shard import IdentifyScheduler
+
+from ..errors import ClusterError
+
+if TYPE_CHECKING:
+    from .client import Client
+
+
+__all__ = (
+    'ClusterInfo',
+    'ClusterBus',
+    'ClusterLauncher'
+)
+
+
+Handler = Callable[..., Awaitable[Any]]
+
+
+def _split(shard_count: int, clusters: int, /) -> List[List[int]]:
+    # Contiguous ranges of shards, as even as possible
+    size, extra = divmod(shard_count, clusters)
+    ranges = []
+    start = 0
+
+    for i in range(clusters):
+        end = start + size + (i < extra)
+        ranges.append(list(range(start, end)))
+        start = end
+
+    return ranges
+
+
+class ClusterInfo(NamedTuple):
+    cluster_id: int
+    shard_ids: List[int]
+    shard_count: int
+    shard_ranges: List[List[int]]
+
+
+class _Channel:
+    # A request/response channel over one end of a multiprocessing Pipe, read from the event loop.
+    # Messages are (kind, id, name, payload) tuples, where kind is 'request', 'notify', 'response' or 'error'.
+
+    __slots__ = ('_pipe', '_handlers', '_futures', '_counter', '_loop', '_on_close', 'closed')
+
+    def __init__(self, pipe: Pipe, handlers: Dict[str, Handler], /, *, on_close: Callable[[], Any] = None) -> None:
+        self._pipe: Pipe = pipe
+        self._handlers: Dict[str, Handler] = handlers
+        self._futures: Dict[int, asyncio.Future] = {}
+        self._counter = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._on_close: Optional[Callable[[], Any]] = on_close
+        self.closed: bool = False
+
+    def open(self, /) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop.add_reader(self._pipe.fileno(), self._on_readable)
+
+    def _send(self, message: Tuple[str, int, str, Any], /) -> None:
+        if self.closed:
+            raise ClusterError('the IPC channel is closed')
+
+        self._pipe.send(message)
+
+    async def request(self, name: str, /, *args: Any) -> Any:
+        request_id = next(self._counter)
+        future = self._futures[request_id] = self._loop.create_future()
+
+        try:
+            self._send(('request', request_id, name, args))
+            return await future
+        finally:
+            del self._futures[request_id]
+
+    def notify(self, name: str, /, *args: Any) -> None:
+        self._send(('notify', 0, name, args))
+
+    def _on_readable(self, /) -> None:
+        try:
+            while self._pipe.poll():
+                self._dispatch(*self._pipe.recv())
+        except (EOFError, OSError):
+            self.close()
+
+    def _dispatch(self, kind: str, request_id: int, name: str, payload: Any, /) -> None:
+        if kind == 'response' or kind == 'error':
+            future = self._futures.get(request_id)
+            if future is None or future.done():
+                return
+
+            if kind == 'error':
+                future.set_exception(ClusterError(payload))
+            else:
+                future.set_result(payload)
+            return
+
+        self._loop.create_task(self._handle(kind, request_id, name, payload))
+
+    async def _handle(self, kind: str, request_id: int, name: str, args: Tuple[Any, ...], /) -> None:
+        status = 'response'
+
+        try:
+            handler = self._handlers[name]
+        except KeyError:
+            status, result = 'error', f'no handler for {name!r}'
+        else:
+            try:
+                result = await handler(*args)
+            except Exception as exc:
+                status, result = 'error', f'{name!r} raised {exc!r}'
+
+        if kind == 'request' and not self.closed:
+            self._send((status, request_id, name, result))
+
+    def close(self, /) -> None:
+        if self.closed:
+            return
+
+        self.closed = True
+        if self._loop is not None:
+            self._loop.remove_reader(self._pipe.fileno())
+
+        self._pipe.close()
+
+        for future in self._futures.values():
+            if not future.done():
+                future.set_exception(ClusterError('the IPC channel was closed'))
+
+        if self._on_close is not None:
+            self._on_close()
+
+
+class _ClusterIdentifyScheduler:
+    # Asks the launcher for permission to identify, so identifies are scheduled across every cluster.
+
+    __slots__ = ('_channel',)
+
+    def __init__(self, channel: _Channel, /) -> None:
+        self._channel: _Channel = channel
+
+    @asynccontextmanager
+    async def acquire(self, shard_id: int, /) -> AsyncIterator[None]:
+        key = await self._channel.request('identify', shard_id)
+        try:
+            yield
+        finally:
+            if not self._channel.closed:
+                self._channel.notify('identified', key)
+
+
+class ClusterBus:
+    """
+    The IPC bus of a cluster worker process, connected to every other cluster through the :class:`ClusterLauncher`.
+
+    Queries are sent to every cluster (including this one) and answered by the handler registered under
+    their name. Every cluster answers these out of the box:
+
+    - ``'guild_count'``: the amount of guilds on this cluster.
+    - ``'has_guild'``: whether or not a guild, by ID, is on this cluster.
+    - ``'shards'``: a mapping of shard IDs on this cluster to whether or not they are connected.
+
+    .. code:: python
+
+        @bus.handler('uptime')
+        async def uptime():
+            return time.monotonic() - started_at
+
+        uptimes = await bus.query('uptime')  # One result per cluster, by cluster ID
+    """
+
+    __slots__ = ('info', 'client', '_channel', '_handlers')
+
+    def __init__(self, info: ClusterInfo, pipe: Pipe, /) -> None:
+        self.info: ClusterInfo = info
+        self.client: Optional[Client] = None
+
+        self._handlers: Dict[str, Handler] = {
+            'guild_count': self._guild_count,
+            'has_guild': self._has_guild,
+            'shards': self._shards,
+            'shutdown': self._shutdown,
+        }
+        self._channel: _Channel = _Channel(pipe, self._handlers, on_close=self._on_close)
+
+    def __repr__(self, /) -> str:
+        return f'<ClusterBus cluster_id={self.cluster_id} cluster_count={self.cluster_count}>'
+
+    @property
+    def cluster_id(self, /) -> int:
+        """int: The ID of this cluster."""
+        return self.info.cluster_id
+
+    @property
+    def cluster_count(self, /) -> int:
+        """int: The amount of clusters."""
+        return len(self.info.shard_ranges)
+
+    def handler(self, name: str, /) -> Callable[[Handler], Handler]:
+        """Registers a coroutine function to answer queries named ``name``."""
+        def decorator(func: Handler) -> Handler:
+            self._handlers[name] = func
+            return func
+
+        return decorator
+
+    async def query(self, name: str, /, *args: Any) -> List[Any]:
+        """|coro|
+
+        Sends a query to every cluster and returns their answers, by cluster ID.
+
+        Raises
+        ------
+        ClusterError
+            A cluster couldn't answer the query.
+        """
+        return await self._channel.request('query', name, args)
+
+    def cluster_for_shard(self, shard_id: int, /) -> int:
+        """Returns the ID of the cluster running a shard."""
+        for cluster_id, shard_ids in enumerate(self.info.shard_ranges):
+            if shard_id in shard_ids:
+                return cluster_id
+
+        raise ValueError(f'shard {shard_id} is not run by any cluster')
+
+    def cluster_for_guild(self, guild_id: int, /) -> int:
+        """Returns the ID of the cluster which would receive events of a guild."""
+        return self.cluster_for_shard((guild_id >> 22) % self.info.shard_count)
+
+    async def guild_count(self, /) -> int:
+        """|coro|
+
+        Returns the amount of guilds across every cluster.
+        """
+        return sum(await self.query('guild_count'))
+
+    async def find_guild(self, guild_id: int, /) -> Optional[int]:
+        """|coro|
+
+        Returns the ID of the cluster which holds a guild, or ``None`` if no cluster does.
+        """
+        for cluster_id, found in enumerate(await self.query('has_guild', guild_id)):
+            if found:
+                return cluster_id
+
+        return None
+
+    async def _guild_count(self, /) -> int:
+        shards = self.client and self.client.shards
+        return 0 if shards is None else shards.guild_count
+
+    async def _has_guild(self, guild_id: int, /) -> bool:
+        shards = self.client and self.client.shards
+        if shards is None:
+            return False
+
+        shard = shards.get_shard(guild_id)
+        return shard is not None and guild_id in shard.guild_ids
+
+    async def _shards(self, /) -> Dict[int, bool]:
+        shards = self.client and self.client.shards
+        if shards is None:
+            return {}
+
+        return {shard_id: shard.connected for shard_id, shard in shards.shards.items()}
+
+    async def _shutdown(self, /) -> None:
+        if self.client is not None:
+            await self.client.close()
+
+    def _on_close(self, /) -> None:
+        # The launcher went away
+        if self.client is not None:
+            asyncio.get_running_loop().create_task(self.client.close())
+
+
+def _run_worker(factory: Callable[[ClusterBus], Client], token: str, info: ClusterInfo, pipe: Pipe, /) -> None:
+    async def main() -> None:
+        bus = ClusterBus(info, pipe)
+        bus._channel.open()
+
+        client = bus.client = factory(bus)
+        client._shard_ids = info.shard_ids
+        client._shard_count = info.shard_count
+        client._identify_scheduler = _ClusterIdentifyScheduler(bus._channel)
+
+        try:
+            await client.start(token)
+        finally:
+            await client.close()
+            bus._channel.close()
+
+    asyncio.run(main())
+
+
+class _Worker(NamedTuple):
+    process: multiprocessing.Process
+    channel: _Channel
+
+
+class ClusterLauncher:
+    """
+    Spreads shards across several worker processes ("clusters"), each running its own shards on its own event loop.
+
+    The launcher stays in the parent process, relays queries between clusters, and schedules the identifies of
+    every cluster with a single :class:`~.IdentifyScheduler`, so ``max_concurrency`` is respected across processes.
+    Clusters talk to it through a :class:`ClusterBus` over a pipe, so everything runs on one machine.
+    This is only available on Unix.
+
+    .. code:: python
+
+        def create_client(bus: ClusterBus) -> Client:
+            client = Client(intents=Intents.default())
+            ...
+            return client
+
+        if __name__ == '__main__':
+            launcher = ClusterLauncher(create_client, token=TOKEN, clusters=4)
+            asyncio.run(launcher.run())
+
+    Parameters
+    ----------
+    factory: Callable[[:class:`ClusterBus`], :class:`~.Client`]
+        Creates the client of a cluster, in its worker process. This must be picklable, e.g. a module level function.
+        The client's shards and identify scheduling are filled in by the cluster.
+    token: str
+        The token to log in with.
+    clusters: int
+        The amount of worker processes.
+    shard_count: Optional[int]
+        The total amount of shards. Defaults to the amount Discord recommends.
+    scheduler: Optional[:class:`~.IdentifyScheduler`]
+        Schedules identifies across clusters. Defaults to one created from the session start limit reported by Discord.
+    """
+
+    # How long a cluster may take to identify before its identify bucket is given to someone else.
+    IDENTIFY_TIMEOUT: float = 30.0
+
+    def __init__(
+        self,
+        factory: Callable[[ClusterBus], Client],
+        /,
+        *,
+        token: str,
+        clusters: int,
+        shard_count: Optional[int] = None,
+        scheduler: Optional[IdentifyScheduler] = None
+    ) -> None:
+        self.factory: Callable[[ClusterBus], Client] = factory
+        self.clusters: int = clusters
+        self.shard_count: Optional[int] = shard_count
+        self.scheduler: Optional[IdentifyScheduler] = scheduler
+
+        self.__token: str = token
+        self._workers: List[_Worker] = []
+        self._identifying: Dict[int, asyncio.Future] = {}
+        self._counter = itertools.count(1)
+
+    def __repr__(self, /) -> str:
+        return f'<ClusterLauncher clusters={self.clusters} shard_count={self.shard_count}>'
+
+    async def _fetch_gateway_info(self, /) -> None:
+        connection = Connection(asyncio.get_running_loop())
+        connection.establish_http(self.__token)
+
+        try:
+            info = await connection.get_gateway_bot()
+        finally:
+            await connection.http.close()
+
+        if self.shard_count is None:
+            self.shard_count = info.shards
+
+        if self.scheduler is None:
+            self.scheduler = IdentifyScheduler.from_session_start_limit(info.session_start_limit)
+
+    async def start(self, /) -> None:
+        """|coro|
+
+        Spawns every cluster.
+        """
+        if self.shard_count is None or self.scheduler is None:
+            await self._fetch_gateway_info()
+
+        ranges = _split(self.shard_count, self.clusters)
+        context = multiprocessing.get_context('spawn')
+        handlers = {'identify': self._identify, 'identified': self._identified, 'query': self.query}
+
+        for cluster_id, shard_ids in enumerate(ranges):
+            ours, theirs = context.Pipe()
+            info = ClusterInfo(cluster_id, shard_ids, self.shard_count, ranges)
+
+            process = context.Process(
+                target=_run_worker,
+                args=(self.factory, self.__token, info, theirs),
+                name=f'wumpus-cluster-{cluster_id}',
+            )
+            process.start()
+            theirs.close()
+
+            channel = _Channel(ours, handlers)
+            channel.open()
+            self._workers.append(_Worker(process, channel))
+
+    async def query(self, name: str, args: Tuple[Any, ...] = (), /) -> List[Any]:
+        """|coro|
+
+        Sends a query to every cluster and returns their answers, by cluster ID.
+        """
+        return await asyncio.gather(*(worker.channel.request(name, *args) for worker in self._workers))
+
+    async def _identify(self, shard_id: int, /) -> int:
+        granted = asyncio.get_running_loop().create_future()
+        asyncio.get_running_loop().create_task(self._hold_identify(shard_id, granted))
+        return await granted
+
+    async def _hold_identify(self, shard_id: int, granted: asyncio.Future, /) -> None:
+        async with self.scheduler.acquire(shard_id):
+            key = next(self._counter)
+            done = self._identifying[key] = asyncio.get_running_loop().create_future()
+            granted.set_result(key)
+
+            try:
+                await asyncio.wait_for(done, timeout=self.IDENTIFY_TIMEOUT)
+            except asyncio.TimeoutError:
+                pass
+            finally:
+                del self._identifying[key]
+
+    async def _identified(self, key: int, /) -> None:
+        done = self._identifying.get(key)
+        if done is not None and not done.done():
+            done.set_result(None)
+
+    async def wait(self, /) -> None:
+        """|coro|
+
+        Waits until every cluster has exited.
+        """
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, worker.process.join) for worker in self._workers))
+
+    async def run(self, /) -> None:
+        """|coro|
+
+        Spawns every cluster, then waits until they have exited.
+        """
+        await self.start()
+        try:
+            await self.wait()
+        finally:
+            await self.close()
+
+    async def close(self, /, *, timeout: float = 10.0) -> None:
+        """|coro|
+
+        Shuts every cluster down, terminating those that don't exit within ``timeout`` seconds.
+        """
+        for worker in self._workers:
+            if not worker.channel.closed:
+                try:
+                    worker.channel.notify('shutdown')
+                except (ClusterError, OSError):
+                    pass
+
+        loop = asyncio.get_running_loop()
+        await asyncio.gather(*(loop.run_in_executor(None, worker.process.join, timeout) for worker in self._workers))
+
+        for worker in self._workers:
+            if worker.process.is_alive():
+                worker.process.terminate()
+
+            worker.channel.close()
+
+        self._workers.clear()
@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import time
+import zlib
+
+from abc import ABC, abstractmethod
+from typing import Optional, Union
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+__all__ = (
+    'ZLIB_SUFFIX',
+    'InflaterStats',
+    'Inflater',
+    'ZlibStreamInflater',
+    'ZstdStreamInflater',
+    'create_inflater'
+)
+
+
+ZLIB_SUFFIX = b'\x00\x00\xff\xff'
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+
+class InflaterStats:
+    """
+    Counters of how much data was inflated, and how long it took.
+    """
+
+    __slots__ = ('messages', 'frames', 'bytes_in', 'bytes_out', 'inflate_time')
+
+    def __init__(self, /) -> None:
+        self.messages: int = 0
+        self.frames: int = 0
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.inflate_time: float = 0.0
+
+    def __repr__(self, /) -> str:
+        return ' '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__).join(('<InflaterStats ', '>'))
+
+    @property
+    def ratio(self, /) -> float:
+        """float: How many bytes were inflated from every compressed byte."""
+        return self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+
+
+class _GrowableBuffer:
+    # A preallocated bytearray written through a memoryview, which is rewound instead of
+    # reallocated after every message. It only grows (by doubling) when a message doesn't fit,
+    # and buffers grown past ``retain`` are dropped once the message is consumed.
+
+    __slots__ = ('initial', 'retain', '_data', '_view', 'size')
+
+    def __init__(self, initial: int, retain: int, /) -> None:
+        self.initial: int = initial
+        self.retain: int = retain
+        self._allocate(initial)
+
+    def _allocate(self, capacity: int, /) -> None:
+        # Never resize in place, someone may still hold a view of the old buffer
+        self._data: bytearray = bytearray(capacity)
+        self._view: memoryview = memoryview(self._data)
+        self.size: int = 0
+
+    @property
+    def capacity(self, /) -> int:
+        return len(self._data)
+
+    def write(self, data: Buffer, /) -> None:
+        size = self.size
+        end = size + len(data)
+
+        if end > len(self._data):
+            capacity = len(self._data) * 2
+            while capacity < end:
+                capacity *= 2
+
+            old = self._view
+            self._allocate(capacity)
+            self._view[:size] = old[:size]
+
+        self._view[size:end] = data
+        self.size = end
+
+    def view(self, /) -> memoryview:
+        return self._view[:self.size]
+
+    def rewind(self, /) -> None:
+        if len(self._data) > self.retain:
+            self._allocate(self.initial)
+        else:
+            self.size = 0
+
+
+class Inflater(ABC):
+    """
+    Inflates the transport compression of Discord's gateway, one websocket frame at a time.
+    """
+
+    __slots__ = ('stats',)
+
+    name: str
+
+    def __init__(self, /) -> None:
+        self.stats: InflaterStats = InflaterStats()
+
+    def __repr__(self, /) -> str:
+        return f'<{self.__class__.__name__} buffered={self.buffered} stats={self.stats!r}>'
+
+    @property
+    def buffered(self, /) -> int:
+        """int: The amount of compressed bytes buffered for an incomplete message."""
+        return 0
+
+    @abstractmethod
+    def feed(self, frame: Buffer, /) -> Optional[Union[bytes, memoryview]]:
+        """Feeds a binary websocket frame.
+
+        Returns the inflated message once it is complete, otherwise ``None``.
+
+        .. note::
+            The message may be a view into a buffer which is reused,
+            so it must be consumed (i.e. decoded) before feeding the next frame.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def reset(self, /) -> None:
+        """Resets the compression context, e.g. when reconnecting."""
+        raise NotImplementedError
+
+
+class ZlibStreamInflater(Inflater):
+    """
+    Inflates the ``zlib-stream`` transport compression of Discord's gateway.
+
+    Frames are accumulated in a reusable buffer until a message is complete, i.e. it
+    ends with :data:`ZLIB_SUFFIX`. Large messages are inflated ``chunk_size`` compressed
+    bytes at a time into a second reusable buffer, so no intermediate output is larger
+    than a chunk's worth. Messages that fit in a single frame and a single chunk,
+    which is most of them, are inflated without any copies besides zlib's own output.
+
+    Parameters
+    ----------
+    buffer_size: int
+        The initial size of the frame and output buffers. They grow as needed.
+    chunk_size: int
+        The maximum amount of compressed bytes inflated at once.
+    retain_size: int
+        Buffers that grew past this size, e.g. for a large ``GUILD_CREATE``,
+        are released after the message instead of being kept around.
+    """
+
+    __slots__ = ('chunk_size', '_inflater', '_frames', '_output')
+
+    name = 'zlib-stream'
+
+    def __init__(
+        self,
+        /,
+        *,
+        buffer_size: int = 64 * 1024,
+        chunk_size: int = 64 * 1024,
+        retain_size: int = 4 * 1024 * 1024
+    ) -> None:
+        super().__init__()
+        self.chunk_size: int = chunk_size
+
+        self._inflater = zlib.decompressobj()
+        self._frames: _GrowableBuffer = _GrowableBuffer(buffer_size, retain_size)
+        self._output: _GrowableBuffer = _GrowableBuffer(buffer_size, retain_size)
+
+    @property
+    def buffered(self, /) -> int:
+        return self._frames.size
+
+    def feed(self, frame: Buffer, /) -> Optional[Union[bytes, memoryview]]:
+        stats = self.stats
+        stats.frames += 1
+        stats.bytes_in += len(frame)
+
+        frames = self._frames
+        complete = frame[-4:] == ZLIB_SUFFIX
+
+        if frames.size:
+            frames.write(frame)
+            if not complete:
+                return None
+
+            data = frames.view()
+        elif not complete:
+            frames.write(frame)
+            return None
+        else:
+            data = frame
+
+        start = time.perf_counter()
+        try:
+            result = self._inflate(data)
+        finally:
+            # Don't hold on to our own buffer through `data`
+            del data
+            frames.rewind()
+
+        stats.inflate_time += time.perf_counter() - start
+        stats.messages += 1
+        stats.bytes_out += len(result)
+        return result
+
+    def _inflate(self, data: Buffer, /) -> Union[bytes, memoryview]:
+        inflater = self._inflater
+        chunk_size = self.chunk_size
+
+        # The previous message was consumed by now
+        output = self._output
+        output.rewind()
+
+        size = len(data)
+        if size <= chunk_size:
+            return inflater.decompress(data)
+
+        # Slicing the input rather than passing `max_length` avoids zlib copying the rest
+        # of the input into `unconsumed_tail` after every chunk.
+        view = memoryview(data)
+
+        for offset in range(0, size, chunk_size):
+            output.write(inflater.decompress(view[offset:offset + chunk_size]))
+
+        return output.view()
+
+    def reset(self, /) -> None:
+        self._inflater = zlib.decompressobj()
+        self._frames.rewind()
+        self._output.rewind()
+
+
+class ZstdStreamInflater(Inflater):
+    """
+    Inflates the ``zstd-stream`` transport compression of Discord's gateway.
+
+    Every websocket frame is a complete, flushed message of a single zstd stream,
+    so no frames are buffered. This requires `zstandard <https://github.com/indygreg/python-zstandard>`_,
+    which is installed with the ``performance`` extra, i.e. ``pip install wumpus.py[performance]``.
+    """
+
+    __slots__ = ('_decompressor', '_inflater')
+
+    name = 'zstd-stream'
+
+    def __init__(self, /) -> None:
+        if zstandard is None:
+            raise RuntimeError('zstandard is required for zstd-stream compression, install it with "pip install zstandard"')
+
+        super().__init__()
+        self._decompressor = zstandard.ZstdDecompressor()
+        self._inflater = self._decompressor.decompressobj()
+
+    def feed(self, frame: Buffer, /) -> bytes:
+        stats = self.stats
+        stats.frames += 1
+        stats.bytes_in += len(frame)
+
+        start = time.perf_counter()
+        result = self._inflater.decompress(frame)
+
+        stats.inflate_time += time.perf_counter() - start
+        stats.messages += 1
+        stats.bytes_out += len(result)
+        return result
+
+    def reset(self, /) -> None:
+        self._inflater = self._decompressor.decompressobj()
+
+
+def create_inflater(compression: Optional[str], /) -> Optional[Inflater]:
+    """Creates the :class:`Inflater` for a gateway transport compression,
+    i.e. ``'zlib-stream'``, ``'zstd-stream'`` or ``None`` for no compression.
+    """
+    if compression is None:
+        return None
+
+    if compression == 'zlib-stream':
+        return ZlibStreamInflater()
+
+    if compression == 'zstd-stream':
+        return ZstdStreamInflater()
+
+    raise ValueError(f'unknown gateway compression {compression!r}')
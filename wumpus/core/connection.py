@@ -5,7 +5,8 @@ import re
 from asyncio import AbstractEventLoop
 from typing import NamedTuple
 
-from .http import HTTPClient, Router
+from .http import HTTPClient, Router, Transport
+from .serializer import Serializer
 from ..typings.payloads import UserPayload
 
 
@@ -96,14 +97,23 @@ class Connection:
 
     # HTTP
 
-    def establish_http(self, token: str = None, /, *, v: int = 9) -> None:
+    def establish_http(
+        self,
+        token: str = None,
+        /,
+        *,
+        v: int = 9,
+        transport: Transport = None,
+        serializer: Serializer = None,
+        base_url: str = None
+    ) -> None:
         if token is None and not self.__token:
             raise ValueError('token is required in order to log in.')
 
         if token is not None:
             self.put_token(token)
 
-        self._http = HTTPClient(v=v, token=token)
+        self._http = HTTPClient(v=v, token=token, transport=transport, serializer=serializer, base_url=base_url)
 
     async def update_user(self, /) -> None:
         data = await self.api.users.me.get()
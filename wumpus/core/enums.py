@@ -3,6 +3,9 @@ from enum import Enum
 
 __all__ = (
     'OpCode',
+    'RequestPriority',
+    'SendPriority',
+    'OverflowPolicy',
     'PremiumType',
     'DefaultMessageNotificationLevel',
     'MFALevel',
@@ -30,6 +33,76 @@ class OpCode(Enum):
     heartbeat_ack      = 11
 
 
+class RequestPriority(Enum):
+    """|enum|
+
+    The priority of an HTTP request, which decides the order requests
+    are let through in when they have to wait on a rate-limit.
+
+    Attributes
+    ----------
+    high
+        Interactive traffic, e.g. replying to a user.
+    normal
+        The default priority.
+    low
+        Background work, e.g. bulk role syncs or nickname edits.
+    """
+
+    high   = 0
+    normal = 1
+    low    = 2
+
+
+class SendPriority(Enum):
+    """|enum|
+
+    The lane of the gateway send queue a payload is sent through.
+    Lanes are drained in order, so that e.g. a burst of member requests
+    never holds up a heartbeat.
+
+    Attributes
+    ----------
+    heartbeat
+        Heartbeats. These may use the part of the send rate-limit reserved for them.
+    handshake
+        Identifies and resumes.
+    presence
+        Presence updates.
+    normal
+        Any other payload, e.g. voice state updates.
+    members
+        Guild member requests, which are usually sent in bulk.
+    """
+
+    heartbeat = 0
+    handshake = 1
+    presence  = 2
+    normal    = 3
+    members   = 4
+
+
+class OverflowPolicy(Enum):
+    """|enum|
+
+    What a :class:`~.ListenerExecutor` does with an event when its listeners
+    are already running as many times as allowed.
+
+    Attributes
+    ----------
+    drop
+        The listener isn't called for this event.
+    queue
+        The listener is called once a running one finishes. Once the queue is full, further events are dropped.
+    block
+        Like ``queue``, but once the queue is full, the shard stops reading events until there is room again.
+    """
+
+    drop  = 0
+    queue = 1
+    block = 2
+
+
 class PremiumType(Enum):
     """|enum|
 
@@ -0,0 +1,225 @@
+"""
+Reads the envelope (``op``, ``s`` and ``t``) of ETF gateway payloads without decoding their data,
+so that dispatches nothing wants can be dropped before ``d`` is decoded.
+"""
+
+from __future__ import annotations
+
+import re
+
+from typing import Any, Dict, NamedTuple, Optional, Tuple, Union
+
+__all__ = (
+    'Envelope',
+    'read_envelope',
+)
+
+
+_VERSION = 131
+_SMALL_INTEGER_EXT = 97
+_INTEGER_EXT = 98
+_ATOM_EXT = 100
+_MAP_EXT = 116
+_BINARY_EXT = 109
+_SMALL_ATOM_EXT = 115
+_ATOM_UTF8_EXT = 118
+_SMALL_ATOM_UTF8_EXT = 119
+
+_ATOMS = {'nil': None, 'true': True, 'false': False}
+
+# How far from the end of a payload to look for the keys following ``d``
+_TAIL_SIZE = 256
+
+_Buffer = Union[bytes, memoryview]
+
+
+def _key_patterns(name: bytes, /) -> Tuple[bytes, ...]:
+    size = len(name)
+    return (
+        bytes((_SMALL_ATOM_UTF8_EXT, size)) + name,
+        bytes((_SMALL_ATOM_EXT, size)) + name,
+        bytes((_ATOM_UTF8_EXT, 0, size)) + name,
+        bytes((_ATOM_EXT, 0, size)) + name,
+        bytes((_BINARY_EXT, 0, 0, 0, size)) + name,
+    )
+
+
+_ENVELOPE_KEYS = tuple(pattern for name in (b'op', b's', b't') for pattern in _key_patterns(name))
+
+# Matches the end of a payload laid out as Discord sends it, from the length of the op key on:
+# keys are sorted, so op, s and t follow d
+_DISCORD_TAIL = re.compile(
+    rb'\x02op(?:a(.)|b(.{4}))'
+    rb'(?:d\x00\x01|[sw]\x01|v\x00\x01|m\x00\x00\x00\x01)s(?:a(.)|b(.{4})|(?:d\x00\x03|[sw]\x03)nil)'
+    rb'(?:d\x00\x01|[sw]\x01|v\x00\x01|m\x00\x00\x00\x01)t(?:(?:d\x00|[sw]|v\x00|m\x00\x00\x00)(.)([A-Z0-9_]+)|(?:d\x00\x03|[sw]\x03)nil)\Z',
+    re.DOTALL,
+)
+
+_SHORT_D_KEYS = (b's\x01d', b'w\x01d')
+_LONG_D_KEYS = (b'd\x00\x01d', b'v\x00\x01d')
+
+
+class Envelope(NamedTuple):
+    op: int
+    s: Optional[int]
+    t: Optional[str]
+    data_start: int  # Where the encoded ``d`` starts and ends in the payload
+    data_end: int
+
+
+def _read_string(data: _Buffer, pos: int, /) -> Tuple[Optional[str], int]:
+    tag = data[pos]
+
+    if tag == _SMALL_ATOM_UTF8_EXT or tag == _SMALL_ATOM_EXT:
+        start, size = pos + 2, data[pos + 1]
+    elif tag == _ATOM_UTF8_EXT or tag == _ATOM_EXT:
+        start, size = pos + 3, int.from_bytes(data[pos + 1:pos + 3], 'big')
+    elif tag == _BINARY_EXT:
+        start, size = pos + 5, int.from_bytes(data[pos + 1:pos + 5], 'big')
+    else:
+        return None, pos
+
+    return str(data[start:start + size], 'utf-8'), start + size
+
+
+def _read_value(data: _Buffer, pos: int, /) -> Tuple[Any, int]:
+    # Reads the kind of values op, s and t have; raises ValueError on anything else
+    tag = data[pos]
+
+    if tag == _SMALL_INTEGER_EXT:
+        return data[pos + 1], pos + 2
+
+    if tag == _INTEGER_EXT:
+        return int.from_bytes(data[pos + 1:pos + 5], 'big', signed=True), pos + 5
+
+    value, end = _read_string(data, pos)
+    if end == pos:
+        raise ValueError(f'unexpected term {tag}')
+
+    if tag != _BINARY_EXT and value in _ATOMS:
+        return _ATOMS[value], end
+
+    return value, end
+
+
+def _read_pairs(data: _Buffer, pos: int, count: int, fields: Dict[str, Any], /) -> int:
+    for _ in range(count):
+        key, end = _read_string(data, pos)
+        if key is None or key == 'd':
+            raise ValueError('unexpected key')
+
+        fields[key], pos = _read_value(data, end)
+
+    return pos
+
+
+def _find_tail(data: _Buffer, start: int, count: int, fields: Dict[str, Any], /) -> Optional[int]:
+    # Finds where the ``count`` pairs following ``d`` start, by trying the last occurrence of every
+    # key they could have and keeping the earliest one that reads exactly up to the end of the payload.
+    tail = bytes(data[max(start, len(data) - _TAIL_SIZE):])
+    offset = len(data) - len(tail)
+    candidates = sorted({offset + tail.rfind(pattern) for pattern in _ENVELOPE_KEYS if pattern in tail})
+
+    for candidate in candidates:
+        found = {}
+        try:
+            end = _read_pairs(data, candidate, count, found)
+        except (ValueError, IndexError, UnicodeDecodeError):
+            continue
+
+        if end == len(data):
+            fields.update(found)
+            return candidate
+
+    return None
+
+
+def _read_discord_envelope(data: _Buffer, /) -> Optional[Envelope]:
+    # The fast path: find the op key near the end, then match everything after it at once
+    if data[6:9] in _SHORT_D_KEYS:
+        start = 9
+    elif data[6:10] in _LONG_D_KEYS:
+        start = 10
+    else:
+        return None
+
+    offset = max(start, len(data) - _TAIL_SIZE)
+    tail = bytes(data[offset:])
+
+    pos = tail.rfind(b'\x02op')
+    match = pos > 0 and _DISCORD_TAIL.match(tail, pos)
+    if not match:
+        return None
+
+    small_op, op, small_s, s, size, t = match.groups()
+    if t is not None and len(t) != size[0]:
+        return None
+
+    # Step back over the op key's tag
+    tag = tail[pos - 1]
+    if tag == _SMALL_ATOM_UTF8_EXT or tag == _SMALL_ATOM_EXT:
+        end = pos - 1
+    elif tag == 0 and tail[pos - 2] in (_ATOM_EXT, _ATOM_UTF8_EXT):
+        end = pos - 2
+    elif tail[pos - 4:pos] == b'm\x00\x00\x00':
+        end = pos - 4
+    else:
+        return None
+
+    return Envelope(
+        small_op[0] if small_op is not None else int.from_bytes(op, 'big', signed=True),
+        small_s[0] if small_s is not None else None if s is None else int.from_bytes(s, 'big', signed=True),
+        None if t is None else t.decode(),
+        start,
+        offset + end,
+    )
+
+
+def read_envelope(data: _Buffer, /) -> Optional[Envelope]:
+    """Reads the envelope of an ETF payload, without decoding ``d``.
+
+    ``None`` is returned if the payload isn't laid out as expected, in which case it should be decoded whole.
+    """
+    if len(data) < 6 or data[0] != _VERSION or data[1] != _MAP_EXT:
+        return None
+
+    if data[2:6] == b'\x00\x00\x00\x04':
+        envelope = _read_discord_envelope(data)
+        if envelope is not None:
+            return envelope
+
+    arity = int.from_bytes(data[2:6], 'big')
+    fields: Dict[str, Any] = {}
+    pos = 6
+    span = None
+
+    try:
+        for i in range(arity):
+            key, pos = _read_string(data, pos)
+            if key is None:
+                return None
+
+            if key != 'd':
+                fields[key], pos = _read_value(data, pos)
+                continue
+
+            remaining = arity - i - 1
+            if not remaining:
+                span = pos, len(data)
+                break
+
+            # Discord sorts keys, so d comes first and its size is only known from what follows it
+            end = _find_tail(data, pos, remaining, fields)
+            if end is None:
+                return None
+
+            span = pos, end
+            break
+
+    except (ValueError, IndexError, UnicodeDecodeError):
+        return None
+
+    if span is None or 'op' not in fields:
+        return None
+
+    return Envelope(fields['op'], fields.get('s'), fields.get('t'), *span)
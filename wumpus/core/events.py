@@ -1,41 +1,143 @@
-from typing import Any, Dict, Tuple
+from __future__ import annotations
 
-from .gateway import Gateway
-from .connection import Connection
+from inspect import iscoroutinefunction
+from typing import Any, Awaitable, Callable, Dict, Optional, Set, Tuple, TYPE_CHECKING
 
 from ..typings import JSON
 from ..typings.payloads import (
     ReadyEventPayload
 )
 
+from .listeners import ListenerExecutor
+
+if TYPE_CHECKING:
+    from .client import Emitter
+    from .connection import Connection
+
 
 __all__ = (
     'EventEmitter',
 )
 
 
+async def _noop(self, data, /) -> None:
+    ...
+
+
+def _is_noop(func: Callable[..., Any], /) -> bool:
+    # Handlers whose body is only ``...`` compile to the same code as _noop
+    code = getattr(func, '__code__', None)
+    return code is not None and code.co_code == _noop.__code__.co_code and code.co_consts == _noop.__code__.co_consts
+
+
 class _BaseEventEmitter:
-    def __init__(self, gateway: Gateway, /) -> None:
-        self._gateway: Gateway = gateway
- 
+    """
+    Handles dispatched gateway events.
+
+    Handlers are methods named after the lowercased event, e.g. ``message_create``.
+    They are looked up once, when the class is created: :attr:`_handlers` maps event names
+    as Discord sends them to the handler and whether it is a coroutine function. Handlers whose
+    body is only ``...`` are left out, so events without a handler or listener cost a single lookup.
+
+    Coroutine handlers are ran as tasks. Plain functions are called right away, which is
+    preferred for parsers of hot events, e.g. ones updating the cache, since it skips creating a task.
+
+    Events in :attr:`listened` are additionally passed to :meth:`dispatch`, after their handler is called.
+    If it returns an awaitable, the gateway awaits it before reading the next event.
+    """
+
+    _handlers: Dict[str, Tuple[Callable[..., Any], bool]] = {}
+
+    def __init_subclass__(cls, **kwargs: Any) -> None:
+        super().__init_subclass__(**kwargs)
+
+        handlers = {}
+        for klass in reversed(cls.__mro__):
+            if klass is object or klass is _BaseEventEmitter:
+                continue
+
+            for name, func in vars(klass).items():
+                if name.startswith('_') or not callable(func) or name in _BaseEventEmitter.__dict__:
+                    continue
+
+                event = name.upper()
+                if _is_noop(func):
+                    handlers.pop(event, None)
+                else:
+                    handlers[event] = func, iscoroutinefunction(func)
+
+        cls._handlers = handlers
+
+    def __init__(self, connection: Connection, /) -> None:
+        self._connection: Connection = connection
+        self.listened: Set[str] = set()
+
     @property
-    def _connection(self):
-        return self._gateway._connection
+    def events(self, /) -> Set[str]:
+        """Set[str]: The events this emitter does something with, i.e. which have a handler or listeners."""
+        return self._handlers.keys() | self.listened
+
+    def wants(self, event: str, /) -> bool:
+        """Whether or not this emitter does something with ``event``. Other events can be dropped unparsed."""
+        return event in self._handlers or event in self.listened
+
+    def dispatch(self, event: str, data: JSON, /) -> Optional[Awaitable[None]]:
+        """Passes an event in :attr:`listened` on to its listeners. This does nothing by default."""
 
-    def handle(self, event: str, /, data: JSON) -> None:
-        event = event.lower()
+    def handle(self, event: str, /, data: JSON) -> Optional[Awaitable[None]]:
+        handler = self._handlers.get(event)
+        if handler is not None:
+            func, is_coroutine = handler
+            if is_coroutine:
+                self._connection.loop.create_task(func(self, data))
+            else:
+                func(self, data)
 
-        if hasattr(self, event):
-            coro = getattr(self, event)(data)
-            self._connection.loop.create_task(coro)
+        if event in self.listened:
+            return self.dispatch(event, data)
 
 
 class EventEmitter(_BaseEventEmitter):
+    """
+    Parses dispatched gateway events, and calls the listeners registered on ``listeners`` through ``executor``.
+
+    Parameters
+    ----------
+    connection: :class:`~.Connection`
+        The connection to update with parsed events.
+    listeners: Optional[:class:`~.Emitter`]
+        Where listeners are registered, usually the :class:`~.Client`.
+    executor: Optional[:class:`~.ListenerExecutor`]
+        Runs the listeners. Defaults to one with the default limits.
+    """
+
     # TODO: Make JSON typehint TypedDicts
 
-    async def ready(self, data: ReadyEventPayload, /) -> None:
+    def __init__(
+        self,
+        connection: Connection,
+        /,
+        *,
+        listeners: Optional[Emitter] = None,
+        executor: Optional[ListenerExecutor] = None
+    ) -> None:
+        super().__init__(connection)
+        self._listeners: Optional[Emitter] = listeners
+        self._executor: ListenerExecutor = executor or ListenerExecutor()
+
+        if listeners is not None:
+            # Shared, so that listeners added later are picked up
+            self.listened = listeners._listened
+
+    def dispatch(self, event: str, data: JSON, /) -> Optional[Awaitable[None]]:
+        callbacks = self._listeners._get_listeners(event)
+        if callbacks:
+            return self._executor.submit(event, callbacks, data)
+
+        return None
+
+    def ready(self, data: ReadyEventPayload, /) -> None:
         self._connection.patch_current_user(data['user'])
-        self._connection.ws._session_id = data['session_id']
 
     async def message_create(self, data: JSON, /) -> None:
         ...
@@ -1,19 +1,29 @@
 from __future__ import annotations
 
 import asyncio
-import json
+import random
 import sys
-import zlib
-from typing import Optional, Union
+import time
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, Callable, Deque, Optional, Set, TypeVar, Union, TYPE_CHECKING
 
 import aiohttp
 import earl
 
+from ..errors import ConnectionClosed, GatewayNotConnected
 from ..typings import JSON
-from ..utils import Ratelimiter
+from ..typings.core import GatewayCompression, GatewayEncoding
+from .compression import Inflater, create_inflater
 from .connection import Connection, GatewayInfo
-from .enums import OpCode
+from .enums import OpCode, SendPriority
+from .etf import read_envelope
 from .events import EventEmitter
+from .outbound import SendQueue
+from .serializer import Serializer, default_serializer
+
+if TYPE_CHECKING:
+    from ..testing.recorder import FrameRecorder
 
 __all__ = (
     'Reconnect',
@@ -22,6 +32,14 @@ __all__ = (
 )
 
 
+T = TypeVar('T')
+
+
+def _unpack_etf(data: Union[bytes, memoryview], /) -> JSON:
+    # Module level so that it can be sent to a process pool
+    return earl.unpack(data, encoding='utf-8', encode_binary_ext=True)
+
+
 class Reconnect(Exception):
     def __init__(self, resume=True):
         self.resume = resume
@@ -29,75 +47,204 @@ class Reconnect(Exception):
 
 class HeartbeatManager:
     """
-    Manages and acks heartbeats from and to Discord's gateway.
+    Sends heartbeats to Discord's gateway and keeps track of their latency.
+
+    Heartbeats are scheduled against the monotonic clock, so they keep an exact cadence no matter how long
+    acks take to arrive. As Discord asks, the first heartbeat is sent after ``heartbeat_interval * jitter``,
+    where ``jitter`` is random.
+
+    A heartbeat which isn't acked within ``timeout`` seconds means the connection is zombied;
+    it is then closed with a code of ``4000``, so that the shard reconnects and resumes within one interval.
+
+    Parameters
+    ----------
+    gateway: :class:`Gateway`
+        The gateway to send heartbeats through.
+    timeout: Optional[float]
+        The amount of seconds to wait for an ack. Defaults to, and can't exceed, the heartbeat interval.
     """
-    
-    __slots__ = ('_gateway', '_connection', 'acked', '__task')
 
-    def __init__(self, gateway: Gateway, /) -> None:
-        self._gateway = gateway
-        self._connection = gateway._connection
-        self.acked = self._connection.loop.create_future()
-    
-    def start(self) -> None:
-        self.acked = self._connection.loop.create_future()
-        self.__task = self._connection.loop.create_task(self.heartbeat_task())
-    
-    def ack(self) -> None:
-        self.acked.set_result(True)
-        self.acked = self._connection.loop.create_future()
-    
-    async def stop(self) -> None:
-        self.__task.cancel()
+    __slots__ = ('_gateway', 'timeout', 'last_send', 'last_ack', '_acked', '__task')
+
+    def __init__(self, gateway: Gateway, /, *, timeout: Optional[float] = None) -> None:
+        self._gateway: Gateway = gateway
+        self.timeout: float = min(timeout or gateway.heartbeat_interval, gateway.heartbeat_interval)
+        self.last_send: Optional[float] = None
+        self.last_ack: Optional[float] = None
+        self._acked: Optional[asyncio.Future] = None
+        self.__task: Optional[asyncio.Task] = None
+
+    def __repr__(self, /) -> str:
+        return f'<HeartbeatManager interval={self._gateway.heartbeat_interval} latency={self.latency}>'
+
+    @property
+    def latency(self, /) -> Optional[float]:
+        """Optional[float]: The amount of seconds between the last heartbeat and its ack, if it was acked."""
+        if self.last_send is None or self.last_ack is None or self.last_ack < self.last_send:
+            return None
+
+        return self.last_ack - self.last_send
+
+    def start(self, /) -> None:
+        self.__task = asyncio.get_running_loop().create_task(self.heartbeat_task())
+
+    def ack(self, /) -> None:
+        self.last_ack = time.monotonic()
+
+        acked = self._acked
+        if acked is not None and not acked.done():
+            acked.set_result(None)
+            self._gateway.latencies.append(self.last_ack - self.last_send)
+
+    async def stop(self, /) -> None:
+        task = self.__task
+        if task is None or task is asyncio.current_task():
+            return
+
+        task.cancel()
         try:
-            await self.__task
+            await task
         except asyncio.CancelledError:
             pass
-    
-    async def heartbeat(self) -> None:
+
+    async def heartbeat(self, /) -> None:
         payload = {
             'op': OpCode.heartbeat.value,
-            'd': self._gateway._seq,
+            'd': self._gateway._sequence,
         }
-        await self._gateway.send(payload, force=True) # Heartbeat should be send no matter what.
 
-    async def heartbeat_task(self) -> None:
-        while not self._connection.closed:
-            await self._gateway.heartbeat()
+        if self._acked is None or self._acked.done():
+            self._acked = asyncio.get_running_loop().create_future()
+
+        self.last_send = time.monotonic()
+        await self._gateway.send(payload, priority=SendPriority.heartbeat)
+
+    async def heartbeat_task(self, /) -> None:
+        gateway = self._gateway
+        interval = gateway.heartbeat_interval
+        next_at = time.monotonic() + interval * random.random()
+
+        while not gateway.closed:
+            await asyncio.sleep(next_at - time.monotonic())
+            await self.heartbeat()
+
             try:
-                await asyncio.wait_for(self.acked, timeout=3)
+                await asyncio.wait_for(asyncio.shield(self._acked), timeout=self.timeout)
             except asyncio.TimeoutError:
-                await self.stop()
-                raise Reconnect()
-            await asyncio.sleep(self._gateway.heartbeat_interval)
+                # The connection is zombied; closing it has the gateway reconnect and resume
+                await gateway._ws.close(code=4000)
+                return
+
+            # Schedule from when the last heartbeat was due rather than when it was acked, so that
+            # the cadence doesn't drift. If the event loop was blocked past it, send the next one right away.
+            next_at = max(next_at + interval, time.monotonic())
 
 
 class Gateway:
     """
     Represents the gateway clients use.
+
+    Inflating and decoding large payloads, e.g. a ``GUILD_CREATE`` of a big guild, can block
+    the event loop (and with it, heartbeats) for tens of milliseconds. When ``offload_threshold``
+    is set, payloads of at least that many bytes are inflated on a worker thread instead, since zlib
+    releases the GIL. Messages are still processed one at a time, in the order they were received.
+
+    Parameters
+    ----------
+    ws: :class:`aiohttp.ClientWebSocketResponse`
+        The websocket connected to the gateway.
+    serializer: :class:`~.Serializer`
+        The serializer to encode and decode JSON payloads with.
+    encoding: str
+        The encoding of payloads, either ``'json'`` or ``'etf'``. Must match what the websocket was opened with.
+    compression: Optional[str]
+        The transport compression of the websocket, ``'zlib-stream'``, ``'zstd-stream'`` or ``None``.
+        Must match what the websocket was opened with.
+    offload_threshold: Optional[int]
+        The size in bytes from which payloads are offloaded, compared against the compressed size
+        for inflating and the inflated size for decoding. ``None`` disables offloading.
+    executor: Optional[:class:`concurrent.futures.Executor`]
+        The executor large payloads are also decoded in. By default they are decoded on the event loop:
+        decoding holds the GIL, so a thread doesn't help, and sending the result back from a process pool
+        costs more than decoding it in the first place. Only pass one if that isn't the case for you.
+    emitter: :class:`~.EventEmitter`
+        Where dispatched events are handed to. This is shared between shards.
+    heartbeat_timeout: Optional[float]
+        The amount of seconds to wait for a heartbeat ack before treating the connection as zombied.
+        Defaults to the heartbeat interval.
+    recorder: Optional[:class:`~.FrameRecorder`]
+        Records every frame received, as it was received, so that it can be replayed later.
     """
 
+    # The amount of heartbeat latencies kept in :attr:`latencies`
+    LATENCY_HISTORY: int = 100
+
+    # These close codes mean something is wrong on our end, reconnecting wouldn't help
+    FATAL_CLOSE_CODES = frozenset((4004, 4010, 4011, 4012, 4013, 4014))
+
+    # These close codes mean our session is gone, so we can't resume it
+    NEW_SESSION_CLOSE_CODES = frozenset((4007, 4009))
+
+    # These events are used by the gateway itself, so they are parsed even if the emitter doesn't want them
+    TRACKED_EVENTS = frozenset(('READY', 'GUILD_CREATE', 'GUILD_DELETE'))
+
+    # ETF payloads of at least this many bytes have their envelope read first, and d only decoded if the event
+    # is wanted. Reading it costs about 4µs whatever the size, and decoding about 4.5µs per KB, so at this size
+    # an unwanted event is skipped 4 times as fast while a wanted one costs at most a quarter more.
+    # See benchmarks/lazy_decode.py.
+    LAZY_DECODE_SIZE: int = 4096
+
     # __slots__ = ('heartbeat_interval', 'ws', 'gateway', '_connection', '_keep_alive', '_inflator', '_buffer')
     
-    def __init__(self, ws: aiohttp.ClientWebSocketResponse, /) -> None:
+    def __init__(
+        self,
+        ws: aiohttp.ClientWebSocketResponse,
+        /,
+        *,
+        emitter: EventEmitter = None,
+        serializer: Serializer = None,
+        encoding: GatewayEncoding = 'etf',
+        compression: Optional[GatewayCompression] = 'zlib-stream',
+        offload_threshold: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        heartbeat_timeout: Optional[float] = None,
+        recorder: Optional[FrameRecorder] = None
+    ) -> None:
+        if encoding not in ('json', 'etf'):
+            raise ValueError(f'unknown gateway encoding {encoding!r}')
+
         self._ws: aiohttp.ClientWebSocketResponse = ws
-        self._hearbeat_manager: HeartbeatManager = None
+        self._serializer: Serializer = serializer or default_serializer()
+        self.encoding: GatewayEncoding = encoding
+        self._loads: Callable[[Union[str, bytes, memoryview]], JSON] = (
+            _unpack_etf if encoding == 'etf' else self._serializer.decode
+        )
+        self.offload_threshold: Optional[int] = offload_threshold
+        self._executor: Optional[Executor] = executor
+        self._worker: Optional[ThreadPoolExecutor] = None
+        self._heartbeat_manager: HeartbeatManager = None
+        self.heartbeat_timeout: Optional[float] = heartbeat_timeout
+        self.latencies: Deque[float] = deque(maxlen=self.LATENCY_HISTORY)
         self._connection: Connection = None
+        self._recorder: Optional[FrameRecorder] = recorder
 
         self._info: GatewayInfo = None
-        self._inflator = zlib.decompressobj()
-        self._buffer = bytearray()
+        self._inflater: Optional[Inflater] = create_inflater(compression)
         self._sequence: int = None
-        self._session_id: int = None
+        self._session_id: str = None
+        self.resume_url: Optional[str] = None
+        self.guild_ids: Set[int] = set()
+        self.skipped_events: int = 0  # Dispatches nothing wanted, which were dropped unparsed
 
         self.__token: str = None
         
         self.shard_id: Optional[int] = None        
         self.shard_count: Optional[int] = None        
+        self.intents: Optional[int] = None
         self.heartbeat_interval: int = None
-        self._ratelimiter: Ratelimiter = None
+        self._send_queue: SendQueue = SendQueue(self._send_raw)
 
-        self._emitter: EventEmitter = EventEmitter(self)
+        self._emitter: EventEmitter = emitter
 
     @classmethod
     async def from_connection(
@@ -105,41 +252,183 @@ class Gateway:
         connection: Connection,
         /,
         *,
-        session_id: Optional[int] = None, 
+        shard_id: Optional[int] = None,
+        shard_count: Optional[int] = None,
+        session_id: Optional[str] = None, 
         sequence: Optional[int] =  None, 
-        resume: bool = True
+        resume: bool = True,
+        url: Optional[str] = None,
+        intents: Optional[int] = None,
+        emitter: Optional[EventEmitter] = None,
+        v: int = 9,
+        encoding: GatewayEncoding = 'etf',
+        compression: Optional[GatewayCompression] = 'zlib-stream',
+        offload_threshold: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        heartbeat_timeout: Optional[float] = None,
+        recorder: Optional[FrameRecorder] = None
     ):
         """
         Creates a :class:`Gateway` from a :class:`Connection`.
-        """
 
-        gateway_info = await connection.get_gateway_bot()
-        ws = await connection.http.session.ws_connect(gateway_info.url + "?v=9&encoding=etf&compress=zlib-stream")
+        ``url`` is the gateway URL to connect to, which is fetched if not given.
+        When resuming, this should be the ``resume_url`` of the session instead.
+        """
 
-        gateway = cls(ws)
+        if url is None:
+            url = (await connection.get_gateway_bot()).url
+
+        ws = await connection.http.session.ws_connect(cls.build_url(url, v, encoding, compression))
+
+        gateway = cls(
+            ws,
+            emitter=emitter or EventEmitter(connection),
+            serializer=connection.http.serializer,
+            encoding=encoding,
+            compression=compression,
+            offload_threshold=offload_threshold,
+            executor=executor,
+            heartbeat_timeout=heartbeat_timeout,
+            recorder=recorder
+        )
         gateway.__token = connection.token
         gateway._connection = connection
-        await gateway.receive_events()  # For Hello event
-
-        gateway.shard_id = connection.shard_id
-        gateway.shard_count = connection.shard_count
+        gateway.shard_id = shard_id
+        gateway.shard_count = shard_count
+        gateway.intents = intents
         gateway._session_id = session_id
         gateway._sequence = sequence
-        gateway._ratelimiter = Ratelimiter(110, 60, gateway.gateway_ratelimited()) # Reserve 10 for heartbeat.
+        gateway.resume_url = url if resume else None
+
+        await gateway.receive_events()  # For Hello event
 
-        if resume:
+        if resume and session_id is not None:
             await gateway.resume()
             return gateway
         
         await gateway.identify()
         return gateway
 
-    async def send(self, payload: JSON, *, force: bool = False) -> None:
+    @staticmethod
+    def build_url(
+        url: str,
+        v: int = 9,
+        encoding: GatewayEncoding = 'etf',
+        compression: Optional[GatewayCompression] = 'zlib-stream',
+        /
+    ) -> str:
+        """Builds the URL to connect to the gateway at ``url`` with."""
+        url = f'{url}?v={v}&encoding={encoding}'
+        if compression is not None:
+            url += f'&compress={compression}'
+
+        return url
+
+    @property
+    def closed(self, /) -> bool:
+        """bool: Whether or not the websocket is closed."""
+        return self._ws.closed
+
+    @property
+    def session_id(self, /) -> Optional[str]:
+        """Optional[str]: The ID of this gateway's session, once it is ready."""
+        return self._session_id
+
+    @property
+    def sequence(self, /) -> Optional[int]:
+        """Optional[int]: The sequence number of the last dispatched event."""
+        return self._sequence
+
+    @property
+    def latency(self, /) -> Optional[float]:
+        """Optional[float]: The amount of seconds between the last heartbeat and its ack, if it was acked."""
+        return None if self._heartbeat_manager is None else self._heartbeat_manager.latency
+
+    @property
+    def compression(self, /) -> Optional[GatewayCompression]:
+        """Optional[str]: The transport compression of this gateway, if any."""
+        return None if self._inflater is None else self._inflater.name
+
+    @property
+    def inflater(self, /) -> Optional[Inflater]:
+        """Optional[:class:`~.Inflater`]: The inflater of this gateway's transport compression, which keeps stats."""
+        return self._inflater
+
+    def encode(self, payload: JSON, /) -> Union[str, bytes]:
+        """Encodes a payload with this gateway's encoding: a string for JSON, or bytes for ETF."""
+        if self.encoding == 'etf':
+            return earl.pack(payload)
+
+        return self._serializer.encode_str(payload)
+
+    async def _send_raw(self, data: Union[str, bytes], /) -> None:
+        if type(data) is str:
+            return await self._ws.send_str(data)
+
+        return await self._ws.send_bytes(data)
+
+    @property
+    def send_queue(self, /) -> SendQueue:
+        """:class:`~.SendQueue`: The queue payloads are sent to the gateway through."""
+        return self._send_queue
+
+    async def send(
+        self,
+        payload: JSON,
+        /,
+        *,
+        priority: Optional[SendPriority] = None,
+        force: bool = False
+    ) -> None:
+        """|coro|
+
+        Sends a payload to the gateway, returning once it was sent.
+
+        The payload is encoded right away, then queued in the lane of ``priority``,
+        which defaults to the lane of its opcode. If that lane is full, this waits for room first.
+        ``force`` skips the queue and the rate-limit entirely.
+
+        Raises
+        ------
+        GatewayNotConnected
+            The connection was closed before the payload could be sent, e.g. to reconnect.
+        """
+        data = self.encode(payload)
         if force:
-            return await self._ws.send_str(json.dumps(payload))
+            return await self._send_raw(data)
+
+        if priority is None:
+            priority = SendQueue.priority_of(payload['op'])
+
+        queue = self._send_queue
+        future = await queue.put(data, priority)
+        try:
+            # Shielded, so that the queue dropping the payload can be told apart from this being cancelled
+            await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if not future.cancelled():
+                future.cancel()  # Nobody is waiting for it anymore
+                raise
 
-        async with self._ratelimiter:
-            return await self._ws.send_str(json.dumps(payload))
+            if queue.close_code is None:
+                raise
+
+            raise GatewayNotConnected(queue.close_code, shard_id=self.shard_id) from None
+
+    def send_nowait(self, payload: JSON, /, *, priority: Optional[SendPriority] = None) -> asyncio.Future:
+        """Encodes and queues a payload without waiting, returning a future which is resolved once it was sent.
+
+        Raises
+        ------
+        asyncio.QueueFull
+            The lane of ``priority`` is full, so the caller should back off.
+        GatewayNotConnected
+            The connection was closed, e.g. to reconnect.
+        """
+        if priority is None:
+            priority = SendQueue.priority_of(payload['op'])
+
+        return self._send_queue.put_nowait(self.encode(payload), priority)
     
     async def gateway_ratelimited(self) -> None:
         ...
@@ -154,7 +443,7 @@ class Gateway:
                     "$browser": "wumpus.py",
                     "$device": "wumpus.py",
                 },
-                "compress": True,
+                "compress": False,  # We use transport compression instead, if any
                 "large_threshold": 250,
             }
         }
@@ -162,9 +451,10 @@ class Gateway:
         if self.shard_id is not None and self.shard_count is not None:
             payload["d"]["shard"] = [self.shard_id, self.shard_count]
 
-        # TODO: Implement presence thing
+        if self.intents is not None:
+            payload["d"]["intents"] = self.intents
 
-        # TODO: Implement intent thing
+        # TODO: Implement presence thing
     
         await self.send(payload)
     
@@ -172,64 +462,159 @@ class Gateway:
         payload = {
             'op': OpCode.resume.value,
             'd': {
-                'seq': self._seq,
+                'seq': self._sequence,
                 'session_id': self._session_id,
                 'token': self.__token,
             }
         }
         await self.send(payload)
     
+    def _should_offload(self, size: int, /) -> bool:
+        return self.offload_threshold is not None and size >= self.offload_threshold
+
+    async def _run_in_worker(self, func: Callable[..., T], /, *args: Any) -> T:
+        if self._worker is None:
+            self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wumpus-gateway')
+
+        return await asyncio.get_running_loop().run_in_executor(self._worker, func, *args)
+
+    async def _inflate(self, data: bytes, /) -> Optional[Union[bytes, memoryview]]:
+        inflater = self._inflater
+        if inflater is None:
+            return data
+
+        if self._should_offload(inflater.buffered + len(data)):
+            return await self._run_in_worker(inflater.feed, data)
+
+        return inflater.feed(data)
+
+    async def _decode(self, data: Union[str, bytes, memoryview], /) -> JSON:
+        executor = self._executor
+        if executor is None or not self._should_offload(len(data)):
+            return self._loads(data)
+
+        if type(data) is memoryview and not isinstance(executor, ThreadPoolExecutor):
+            # Views can't be pickled, and the buffer behind it is reused anyways
+            data = bytes(data)
+
+        return await asyncio.get_running_loop().run_in_executor(executor, self._loads, data)
+
     async def parse_websocket_message(self, data: Union[str, bytes]) -> None:
         if type(data) is bytes:
-            self._buffer.extend(data)
-            if len(data) < 4 or data[-4:] != b'\x00\x00\xff\xff':
+            data = await self._inflate(data)
+            if data is None:
                 return
 
-            data = self._inflator.decompress(self._buffer)
-            self._buffer = bytearray()
+        envelope = None
+        if self.encoding == 'etf' and len(data) >= self.LAZY_DECODE_SIZE:
+            envelope = read_envelope(data)
 
-        message = earl.unpack(data)
-        op = OpCode(message.get('op'))
-        data = message.get('d')
-        seq = message.get('s')
+        if envelope is None:
+            message = await self._decode(data)
+            op, seq, event = message.get('op'), message.get('s'), message.get('t')
+        else:
+            message = None
+            op, seq, event, start, end = envelope
 
         if seq is not None:
-            self._seq = seq
+            self._sequence = seq
+
+        if op == OpCode.dispatch.value and event not in self.TRACKED_EVENTS and not self._emitter.wants(event):
+            self.skipped_events += 1
+            return
 
+        if message is None:
+            # d is only decoded now that we know it's wanted; it needs the version byte in front to be read alone
+            data = await self._decode(b'\x83' + data[start:end])
+        else:
+            data = message.get('d')
+
+        op = OpCode(op)
         if op is OpCode.reconnect:
             raise Reconnect()
 
         elif op is OpCode.heartbeat_ack:
-            self._keep_alive.ack()
+            self._heartbeat_manager.ack()
 
         elif op is OpCode.heartbeat:
-            await self._keep_alive.heartbeat()
+            await self._heartbeat_manager.heartbeat()
 
         elif op is OpCode.hello:
             self.heartbeat_interval = data['heartbeat_interval'] / 1000  # For seconds
-            self._keep_alive = HeartbeatManager(self)
-            await self._keep_alive.heartbeat()
+            self._heartbeat_manager = HeartbeatManager(self, timeout=self.heartbeat_timeout)
+            self._heartbeat_manager.start()
 
         elif op is OpCode.invalidate_session:
             if data is not True:
                 # We need to send a fresh Identify
-                self._seq = None
+                self._sequence = None
                 self._session_id = None
                 raise Reconnect(resume=False)
             raise Reconnect()
 
         elif op is OpCode.dispatch:
-            event = message.get('t')
-            return self._emitter.handle(event, data)
-
-        else: 
-            raise ...
+            if event == 'READY':
+                self._session_id = data['session_id']
+                self.resume_url = data.get('resume_gateway_url')
+                self.guild_ids.clear()
+                self.guild_ids.update(int(guild['id']) for guild in data.get('guilds', ()))
+
+            elif event == 'GUILD_CREATE':
+                self.guild_ids.add(int(data['id']))
+
+            elif event == 'GUILD_DELETE' and not data.get('unavailable'):
+                self.guild_ids.discard(int(data['id']))
+
+            pending = self._emitter.handle(event, data)
+            if pending is not None:
+                # A listener queue is full and set to block, so stop reading until there's room again
+                await pending
     
     async def receive_events(self):
         m = await self._ws.receive()
         if m.type is aiohttp.WSMsgType.TEXT or m.type is aiohttp.WSMsgType.BINARY:
+            if self._recorder is not None:
+                self._recorder.record(self, m.data)
             await self.parse_websocket_message(m.data)
         elif m.type is aiohttp.WSMsgType.ERROR:
             raise m.data
         elif m.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.CLOSING, aiohttp.WSMsgType.CLOSE):
-            raise Reconnect()
+            code = self._ws.close_code
+            if code in self.FATAL_CLOSE_CODES:
+                raise ConnectionClosed(code, shard_id=self.shard_id)
+
+            raise Reconnect(resume=code not in self.NEW_SESSION_CLOSE_CODES)
+
+    async def run(self, /) -> None:
+        """|coro|
+
+        Receives and handles events until the connection is lost,
+        at which point :class:`Reconnect` is raised.
+        """
+        try:
+            while True:
+                await self.receive_events()
+        finally:
+            if self._heartbeat_manager is not None:
+                await self._heartbeat_manager.stop()
+
+            # 1006 is what a connection lost without a close frame is reported as
+            self._send_queue.close(code=self._ws.close_code or 1006, shard_id=self.shard_id)
+
+    async def close(self, /, *, code: int = 1000) -> None:
+        """|coro|
+
+        Closes the websocket, and the worker thread payloads were inflated on, if any.
+
+        Closing with a code of ``1000`` or ``1001`` ends the session,
+        any other code (e.g. ``4000``) allows it to be resumed.
+        """
+        if self._heartbeat_manager is not None:
+            await self._heartbeat_manager.stop()
+
+        self._send_queue.close(code=code, shard_id=self.shard_id)
+        await self._ws.close(code=code)
+
+        if self._worker is not None:
+            self._worker.shutdown(wait=False)
+            self._worker = None
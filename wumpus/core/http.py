@@ -1,58 +1,217 @@
 from __future__ import annotations
 
 import asyncio
+import functools
+import time
+
+from collections import OrderedDict
+from urllib.parse import quote, urlencode
+from aiohttp import (
+    ClientConnectionError,
+    ClientConnectorError,
+    ClientResponse,
+    ClientSession,
+    ClientTimeout,
+    TCPConnector
+)
+from typing import Any, Awaitable, Dict, Mapping, NamedTuple, NoReturn, Optional, Set, Tuple, TypeVar, Union
 
-from urllib.parse import quote
-from aiohttp import ClientSession
-from typing import Any, Awaitable, Dict, Optional, TypeVar, Union
-
+from .ratelimits import Bucket, BucketRegistry, GlobalRatelimiter, MemoryBackend, RatelimitBackend, parse_route
+from .enums import RequestPriority
+from .retry import RetryPolicy
+from .serializer import Serializer, default_serializer
 from ..typings.core import JSON, HTTPRequestMethod
 from ..errors import *
 
 
 RT = TypeVar('RT', bound='Router')
 
+# The URL with its query, the priority and the timeout of a coalesced request
+_InflightKey = Tuple[str, int, Optional[float]]
+
 
 __all__ = (
+    'RouteTemplate',
     'Router',
+    'PoolStats',
+    'Transport',
     'HTTPClient'
 )
 
 
+def _quote(entity: Union[str, int], /) -> str:
+    if type(entity) is int:
+        return str(entity)
+
+    return quote(str(entity))
+
+
+class RouteTemplate:
+    """
+    A pre-compiled API route, e.g. ``guilds/{guild_id}/members/{member_id}``.
+
+    Templates are interned, so compiling the same path twice returns the same object.
+    Only the ``MAX_TEMPLATES`` most recently compiled paths are kept, so that paths
+    with IDs formatted into them rather than passed as parameters can't grow the table forever.
+    They know which of their parameters are major parameters, which is what
+    rate-limit buckets are keyed on, and can be formatted into a path in one step.
+    """
+
+    __slots__ = ('path', 'params', '_format', '_major', '_routes', '_children', '_param_child')
+
+    __templates__: OrderedDict[str, RouteTemplate] = OrderedDict()
+
+    MAX_TEMPLATES: int = 4096
+    MAJOR_PARAMETERS = frozenset(('guild_id', 'channel_id', 'webhook_id', 'webhook_token'))
+
+    def __init__(self, path: str, /) -> None:
+        self.path: str = path.strip('/')
+        self.params: Tuple[str, ...] = ()
+
+        segments = []
+        for segment in self.path.split('/') if self.path else ():
+            if segment.startswith('{') and segment.endswith('}'):
+                self.params += (segment[1:-1],)
+                segment = '{}'
+
+            segments.append(segment)
+
+        self._format: str = '/' + '/'.join(segments) if segments else ''
+        self._major: Tuple[int, ...] = tuple(
+            i for i, param in enumerate(self.params) if param in self.MAJOR_PARAMETERS
+        )
+
+        # Children are looked up by their path through the intern table, so they stay interned once evicted
+        self._routes: Dict[str, str] = {}
+        self._children: Dict[str, str] = {}
+        self._param_child: Optional[str] = None
+
+    def __repr__(self, /) -> str:
+        return f'<RouteTemplate path={self.path!r}>'
+
+    @classmethod
+    def compile(cls, path: str, /) -> RouteTemplate:
+        """Returns the interned template for the given path, compiling it if needed."""
+        templates = cls.__templates__
+        try:
+            self = templates[path]
+        except KeyError:
+            templates[path] = self = cls(path)
+            if len(templates) > cls.MAX_TEMPLATES:
+                templates.popitem(last=False)
+        else:
+            templates.move_to_end(path)
+
+        return self
+
+    def child(self, segment: str, /) -> RouteTemplate:
+        """Returns the template of this route followed by a static segment."""
+        try:
+            path = self._children[segment]
+        except KeyError:
+            path = self._children[segment] = self.path + '/' + segment if self.path else segment
+
+        return self.compile(path)
+
+    def param_child(self, /) -> RouteTemplate:
+        """Returns the template of this route followed by a parameter.
+
+        The parameter is named after the segment before it, e.g. ``guilds`` -> ``guild_id``.
+        """
+        if self._param_child is not None:
+            return self.compile(self._param_child)
+
+        previous = self.path.rsplit('/', 1)[-1]
+        if previous == 'reactions':
+            param = 'emoji'
+        elif previous == '{webhook_id}':
+            param = 'webhook_token'
+        elif previous.startswith('{'):
+            param = 'id'
+        else:
+            param = (previous[:-1] if previous.endswith('s') else previous) + '_id'
+
+        self._param_child = path = self.path + '/{' + param + '}'
+        return self.compile(path)
+
+    def format(self, /, *args: Union[str, int], **params: Union[str, int]) -> str:
+        """Formats this template into a path.
+
+        Parameters can be given either positionally, in order, or by name.
+        """
+        if params:
+            args += tuple(params[name] for name in self.params[len(args):])
+
+        return self._format.format(*map(_quote, args))
+
+    def route(self, method: HTTPRequestMethod, /) -> str:
+        """Returns the key used to map this route onto a bucket hash."""
+        try:
+            return self._routes[method]
+        except KeyError:
+            self._routes[method] = route = method + ' /' + self.path
+            return route
+
+    def major(self, args: Tuple[Union[str, int], ...], /) -> str:
+        """Returns the major parameters out of the given arguments, joined by ``:``."""
+        return ':'.join(str(args[i]) for i in self._major)
+
+
 class Router:
+    """
+    A thin, dynamic wrapper around :class:`RouteTemplate`.
+
+    For example, ``api.guilds(id).members(user_id)`` resolves to the
+    ``guilds/{guild_id}/members/{member_id}`` template with ``(id, user_id)`` as arguments.
+    """
+
+    __slots__ = ('__template', '__args', '__base', '__http')
+
     def __init__(
         self, 
         route: str = '', 
         /,
-        *,
+        *args: Union[str, int],
         base: str, 
         http: HTTPClient
     ) -> None:
-        self.__route: str = route.rstrip('/')
+        self.__template: RouteTemplate = RouteTemplate.compile(route.strip('/'))
+        self.__args: Tuple[Union[str, int], ...] = args
         self.__base: str = base.rstrip('/')
         self.__http: HTTPClient = http
 
+    @property
+    def template(self, /) -> RouteTemplate:
+        return self.__template
+
     @property
     def route(self, /) -> str:
-        return self.__route
+        return self.__template.format(*self.__args)
 
     @property
     def url(self, /) -> str:
-        return self.__base + self.__route
-
-    def _construct(self: RT, new_route: str, /) -> RT:
-        return self.__class__(new_route, base_url=self.__base, http=self.__http)
+        return self.__base + self.__template.format(*self.__args)
+
+    def _construct(self: RT, template: RouteTemplate, args: Tuple[Union[str, int], ...], /) -> RT:
+        # Skip __init__, the template is already compiled
+        router = object.__new__(self.__class__)
+        router.__template = template
+        router.__args = args
+        router.__base = self.__base
+        router.__http = self.__http
+        return router
    
     def __getattr__(self: RT, route: str, /) -> RT:
+        if route.startswith('__'):
+            raise AttributeError(route)
+
         if route == 'me':
             route = '@me'
 
-        new_route = self.__route + '/' + route
-        return self._construct(new_route)
+        return self._construct(self.__template.child(route), self.__args)
 
     def __call__(self: RT, entity: Union[str, int], /) -> RT:
-        new_route = self.__route + '/' + quote(str(entity))
-        return self._construct(new_route)
+        return self._construct(self.__template.param_child(), self.__args + (entity,))
         
     def request(
         self, 
@@ -64,7 +223,17 @@ class Router:
         headers: Dict[str, str] = None,
         **kwargs
     ) -> Awaitable[Optional[JSON]]:
-        return self.__http.request(method, self.url, params=params, data=data, headers=headers, **kwargs)
+        template, args = self.__template, self.__args
+
+        return self.__http.request(
+            method,
+            self.__base + template.format(*args),
+            params=params,
+            data=data,
+            headers=headers,
+            route=(template.route(method), template.major(args)),
+            **kwargs
+        )
 
     def get(
         self,
@@ -118,26 +287,257 @@ class Router:
         return self.request('DELETE', data=data, headers=headers, **kwargs)
 
 
-class HTTPClient:
-    __slots__ = ('__token', '__session', '__api_router', '_global_ratelimited', '_buckets_lock')
+class PoolStats(NamedTuple):
+    open: int
+    idle: int
+    acquired: int
+    waiting: int
+    limit: int
+    limit_per_host: int
+
+
+class Transport:
+    """
+    Owns the :class:`aiohttp.ClientSession` and connection pool requests are sent through.
+
+    The session is only created once it is first needed, on the running event loop,
+    so a :class:`Transport` (and the :class:`HTTPClient` using it) can be constructed
+    before the loop starts.
+
+    Parameters
+    ----------
+    limit: int
+        The maximum amount of simultaneous connections. ``0`` means no limit.
+    limit_per_host: int
+        The maximum amount of simultaneous connections to a single host. ``0`` means no limit.
+        Almost every request goes to ``discord.com``, so this is usually the one to tune.
+    ttl_dns_cache: Optional[int]
+        How long resolved DNS records are cached for, in seconds. ``None`` caches them forever.
+    keepalive_timeout: float
+        How long idle connections are kept alive for reuse, in seconds.
+    """
+
+    __slots__ = ('limit', 'limit_per_host', 'ttl_dns_cache', 'keepalive_timeout', '_session')
+
+    def __init__(
+        self,
+        /,
+        *,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        ttl_dns_cache: Optional[int] = 300,
+        keepalive_timeout: float = 60.0
+    ) -> None:
+        self.limit: int = limit
+        self.limit_per_host: int = limit_per_host
+        self.ttl_dns_cache: Optional[int] = ttl_dns_cache
+        self.keepalive_timeout: float = keepalive_timeout
+
+        self._session: Optional[ClientSession] = None
+
+    def __repr__(self, /) -> str:
+        return f'<Transport limit={self.limit} limit_per_host={self.limit_per_host}>'
+
+    @property
+    def session(self, /) -> ClientSession:
+        """:class:`aiohttp.ClientSession`: The session requests are sent through.
+        This is created when first accessed, which must be done from a running event loop.
+        """
+        if self._session is None or self._session.closed:
+            connector = TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                use_dns_cache=True,
+                ttl_dns_cache=self.ttl_dns_cache,
+                keepalive_timeout=self.keepalive_timeout,
+                loop=asyncio.get_running_loop()
+            )
+            self._session = ClientSession(connector=connector)
+
+        return self._session
 
-    MAX_RETRIES: int = 3
+    @property
+    def stats(self, /) -> PoolStats:
+        """:class:`PoolStats`: The current state of the connection pool."""
+        if self._session is None or self._session.closed:
+            return PoolStats(0, 0, 0, 0, self.limit, self.limit_per_host)
+
+        # aiohttp doesn't expose these publicly
+        connector = self._session.connector
+        idle = sum(len(conns) for conns in getattr(connector, '_conns', {}).values())
+        acquired = len(getattr(connector, '_acquired', ()))
+        waiting = sum(len(waiters) for waiters in getattr(connector, '_waiters', {}).values())
+
+        return PoolStats(idle + acquired, idle, acquired, waiting, self.limit, self.limit_per_host)
+
+    async def close(self, /) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+class HTTPClient:
+    __slots__ = (
+        '__token',
+        '__transport',
+        '__api_router',
+        '_global',
+        '_buckets',
+        '_owns_backend',
+        '_inflight',
+        '_cache',
+        '_cached_urls',
+        'serializer',
+        'retry_policy',
+        'coalesce',
+        'cache_ttl'
+    )
+
+    CACHE_SIZE: int = 1024
 
-    def __init__(self, /, *, v: int = 9, token: str):
-        self.__session: ClientSession = ClientSession()
-        self.__api_router: Router = Router(base=f'https://discord.com/api/v{v}', http=self)
+    def __init__(
+        self,
+        /,
+        *,
+        v: int = 9,
+        token: str,
+        max_buckets: int = 4096,
+        global_rate: int = 50,
+        ratelimit_backend: Optional[RatelimitBackend] = None,
+        transport: Optional[Transport] = None,
+        serializer: Optional[Serializer] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        coalesce: bool = True,
+        cache_ttl: float = 0,
+        base_url: Optional[str] = None
+    ):
+        self.__transport: Transport = transport or Transport()
+        self.serializer: Serializer = serializer or default_serializer()
+        self.retry_policy: RetryPolicy = retry_policy or RetryPolicy()
+        # base_url points requests elsewhere, e.g. at a local server during tests
+        self.__api_router: Router = Router(base=base_url or f'https://discord.com/api/v{v}', http=self)
         self.__token: str = token
 
-        self._global_ratelimited = asyncio.Event()
-        self._buckets_lock = {}
+        backend = ratelimit_backend or MemoryBackend()
+        self._global: GlobalRatelimiter = GlobalRatelimiter(state=backend.get_global_state(global_rate, 1))
+        self._buckets: BucketRegistry = BucketRegistry(max_size=max_buckets, backend=backend)
+        # A backend that was passed in may be shared with other clients, so it is left to its owner to close
+        self._owns_backend: bool = ratelimit_backend is None
+
+        # Identical GET requests made concurrently share the same in-flight task,
+        # and optionally its response for cache_ttl seconds after.
+        self.coalesce: bool = coalesce
+        self.cache_ttl: float = cache_ttl
+        self._inflight: Dict[_InflightKey, asyncio.Task] = {}
+        self._cache: OrderedDict[str, Tuple[float, str, Optional[JSON]]] = OrderedDict()
+        self._cached_urls: Dict[str, Set[str]] = {}  # The keys of the cached responses of every URL, whatever their query
 
     @property
     def api(self) -> Router:
         return self.__api_router
 
+    def route(self, path: str, /, *args: Union[str, int], **params: Union[str, int]) -> Router:
+        """Returns a :class:`Router` for a route template, e.g.
+        ``http.route('guilds/{guild_id}/members/{user_id}', guild_id, user_id)``.
+        """
+        template = RouteTemplate.compile(path)
+        if params:
+            args += tuple(params[name] for name in template.params[len(args):])
+
+        return self.__api_router._construct(template, args)
+
+    @property
+    def transport(self) -> Transport:
+        return self.__transport
+
     @property
     def session(self) -> ClientSession:
-        return self.__session
+        return self.__transport.session
+
+    @property
+    def buckets(self) -> BucketRegistry:
+        return self._buckets
+
+    @property
+    def global_ratelimiter(self) -> GlobalRatelimiter:
+        return self._global
+
+    async def _acquire(self, route: str, major: str, priority: int, /) -> Bucket:
+        # Never hold a bucket while we're globally rate-limited,
+        # so other routes can go as soon as the global limit is lifted.
+        while True:
+            await self._global.wait()
+
+            bucket = self._buckets.get(route, major)
+            await bucket.acquire(priority)
+
+            try:
+                taken = await self._global.take(priority)
+            except BaseException:
+                # e.g. cancelled by the request's deadline
+                bucket.release(consumed=False)
+                raise
+
+            if taken:
+                return bucket
+
+            bucket.release(consumed=False)
+
+    def _update_bucket(self, bucket: Bucket, route: str, major: str, headers: Mapping[str, str], /) -> None:
+        bucket_hash = headers.get('X-RateLimit-Bucket')
+        if bucket_hash is not None:
+            self._buckets.rekey(bucket, route, major, bucket_hash)
+
+        try:
+            limit = int(headers['X-RateLimit-Limit'])
+            remaining = int(headers['X-RateLimit-Remaining'])
+        except (KeyError, ValueError):
+            bucket.unlimit()
+            return
+
+        bucket.update(
+            limit=limit,
+            remaining=remaining,
+            reset_after=float(headers.get('X-RateLimit-Reset-After', 0))
+        )
+
+    @staticmethod
+    def _get_retry_after(response: ClientResponse, json: Union[JSON, str, None], /) -> float:
+        if isinstance(json, dict) and 'retry_after' in json:
+            return float(json['retry_after'])
+
+        try:
+            return float(response.headers['Retry-After'])
+        except (KeyError, ValueError):
+            return 1.0
+
+    @staticmethod
+    def _raise_for_status(response: ClientResponse, json: Union[JSON, str, None], /) -> NoReturn:
+        message = json if isinstance(json, str) else None
+
+        if response.status == 404:
+            raise NotFound(response, json=json, message=message)
+
+        if response.status == 401:
+            raise Unauthorized(response)
+
+        if response.status == 403:
+            raise Forbidden(response, json=json, message=message)
+
+        if response.status >= 500:
+            raise InternalServerError(response, json=json, message=message)
+
+        raise HTTPError(response, json=json, message=message)
+
+    async def _read_response(self, response: ClientResponse, /) -> Union[JSON, str, None]:
+        body = await response.read()
+        if not body:
+            return None
+
+        if response.content_type == 'application/json':
+            return self.serializer.decode(body)
+
+        return body.decode('utf-8', errors='replace')
 
     async def request(
         self,
@@ -148,68 +548,226 @@ class HTTPClient:
         params: Dict[str, Any] = None,
         headers: Dict[str, str] = None,
         data: JSON = None,
-        reason: str = None
+        reason: str = None,
+        route: Tuple[str, str] = None,
+        timeout: Optional[float] = None,
+        priority: Union[RequestPriority, int] = RequestPriority.normal
     ) -> Optional[JSON]:
-        key = f"{method} {url}"
-        bucket = self._buckets_lock.get(key)
-        if bucket is None:
-            self._buckets_lock[key] = bucket = asyncio.Lock()
-
+        """|coro|
+
+        Makes a request to Discord, respecting rate-limits.
+
+        If ``coalesce`` is enabled, identical ``GET`` requests made while one is
+        already in-flight wait for its response instead of making their own.
+        Those callers receive the same object, so it shouldn't be mutated.
+        Only requests with the same ``priority`` and ``timeout`` are coalesced, so that
+        no caller inherits another's place in the rate-limit queue or deadline.
+
+        ``timeout`` is the overall deadline of the request in seconds, including retries,
+        which defaults to the :class:`RetryPolicy`'s.
+
+        When requests have to wait on a rate-limit, those with a higher ``priority``
+        are let through first, e.g. replies to users ahead of bulk background jobs.
+        """
+        if isinstance(priority, RequestPriority):
+            priority = priority.value
+
+        if method != 'GET' or not self.coalesce or headers or reason is not None:
+            if self._cache:
+                for key in self._cached_urls.get(url, ()).copy():
+                    self._uncache(key)
+
+            return await self._request(
+                method,
+                url,
+                params=params,
+                headers=headers,
+                data=data,
+                reason=reason,
+                route=route,
+                timeout=timeout,
+                priority=priority
+            )
+
+        key = url + '?' + urlencode(sorted(params.items())) if params else url
+
+        if self._cache:
+            try:
+                expires, _, response = self._cache[key]
+            except KeyError:
+                pass
+            else:
+                if time.monotonic() < expires:
+                    return response
+
+                self._uncache(key)
+
+        inflight_key = key, priority, timeout
+        task = self._inflight.get(inflight_key)
+        if task is None:
+            coro = self._request(method, url, params=params, route=route, timeout=timeout, priority=priority)
+            task = asyncio.get_running_loop().create_task(coro)
+            task.add_done_callback(functools.partial(self._request_done, url, key, inflight_key))
+            self._inflight[inflight_key] = task
+
+        # Shielded so that one caller being cancelled doesn't cancel it for everyone else
+        return await asyncio.shield(task)
+
+    def _request_done(self, url: str, key: str, inflight_key: _InflightKey, task: asyncio.Task, /) -> None:
+        del self._inflight[inflight_key]
+
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        if self.cache_ttl > 0:
+            self._cache[key] = time.monotonic() + self.cache_ttl, url, task.result()
+            self._cached_urls.setdefault(url, set()).add(key)
+
+            if len(self._cache) > self.CACHE_SIZE:
+                self._uncache(next(iter(self._cache)))
+
+    def _uncache(self, key: str, /) -> None:
+        url = self._cache.pop(key)[1]
+
+        keys = self._cached_urls[url]
+        keys.discard(key)
+        if not keys:
+            del self._cached_urls[url]
+
+    async def _request(
+        self,
+        method: HTTPRequestMethod,
+        url: str,
+        /,
+        *,
+        params: Dict[str, Any] = None,
+        headers: Dict[str, str] = None,
+        data: JSON = None,
+        reason: str = None,
+        route: Tuple[str, str] = None,
+        timeout: Optional[float] = None,
+        priority: Union[RequestPriority, int] = RequestPriority.normal
+    ) -> Optional[JSON]:
+        route, major = route or parse_route(method, url)
         headers = headers or {}
 
         if 'Authorization' not in headers and self.__token:
-            headers['Authorization'] = 'Bot' + self.__token
+            headers['Authorization'] = 'Bot ' + self.__token
 
+        body = None
         if data is not None:
             headers['Content-Type'] = 'application/json'
+            body = self.serializer.encode(data)
 
         if reason is not None:
             headers['X-Audit-Log-Reason'] = reason
 
-        await bucket.acquire()
-        if not self._global_ratelimited.is_set():
-            await self._global_ratelimited.wait()
+        policy = self.retry_policy
+        stats = policy.stats
+        policy.record_request()
+
+        timeout = policy.timeout if timeout is None else timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        retries = ratelimited = 0
+
+        while True:
+            if deadline is None:
+                bucket = await self._acquire(route, major, priority)
+            else:
+                # A bucket or the global rate-limit being stuck must not outlive the deadline either
+                try:
+                    bucket = await asyncio.wait_for(
+                        self._acquire(route, major, priority), max(deadline - time.monotonic(), 0)
+                    )
+                except asyncio.TimeoutError:
+                    stats.deadline_exceeded += 1
+                    raise RequestTimeout(method, url, timeout) from None
+
+            consumed = reported = False
+            backoff = True
+            options = {}
+
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    bucket.release(consumed=False)
+                    stats.deadline_exceeded += 1
+                    raise RequestTimeout(method, url, timeout)
+
+                options['timeout'] = ClientTimeout(total=left)
+
+            try:
+                async with self.__transport.session.request(
+                    method, url, params=params, data=body, headers=headers, **options
+                ) as response:
+                    consumed = True
+                    self._update_bucket(bucket, route, major, response.headers)
+                    reported = True
+
+                    json = await self._read_response(response)
+                    if 300 > response.status >= 200:
+                        return json
 
-        try:
-            for remaining in range(self.MAX_RETRIES, 0, -1):
-                async with self.__session.request(method, url, params=params, json=data, headers=headers) as response:
-                    bucket_remaining = response.headers.get("X-RateLimit-Remaining")
-                    if int(bucket_remaining) == 0:
-                        await asyncio.sleep(float(response.headers.get("X-RateLimit-Reset-After")))
+                    if response.status == 429:
+                        ratelimited += 1
+                        stats.ratelimited += 1
+                        if ratelimited > policy.max_ratelimit_retries:
+                            self._raise_for_status(response, json)
 
-                    data = await response.json()
-                    if 300 > response.status >= 200:
-                        return data
+                        # This is waited out by the bucket or global rate-limiter themselves
+                        delay = self._get_retry_after(response, json)
+                        backoff = False
+
+                        if isinstance(json, dict) and json.get('global', False):
+                            self._global.block(delay)
+                        else:
+                            bucket.block(delay)
 
-                    if 400 <= response.status < 500:
-                        if response.status == 429:
-                            is_global = data.get("global", False)
+                    elif response.status in policy.retry_statuses and policy.should_retry(retries):
+                        retries += 1
+                        delay = policy.backoff(retries - 1)
 
-                            if is_global:
-                                self._global_ratelimited.clear()
+                    else:
+                        self._raise_for_status(response, json)
 
-                            await asyncio.sleep(float(data.get("retry_after")))
+            except (ClientConnectionError, asyncio.TimeoutError) as exc:
+                if deadline is not None and time.monotonic() >= deadline:
+                    stats.deadline_exceeded += 1
+                    raise RequestTimeout(method, url, timeout) from exc
 
-                            if is_global:
-                                self._global_ratelimited.set()
-                            continue
+                # If we never connected, the request couldn't have counted towards the rate-limit.
+                consumed = not isinstance(exc, ClientConnectorError)
 
-                        if response.status == 404:
-                            raise NotFound(response, json=data)
+                if not policy.retry_network_errors or not policy.should_retry(retries):
+                    raise
 
-                        if response.status == 401:
-                            raise Unauthorized(response)
+                retries += 1
+                delay = policy.backoff(retries - 1)
 
-                        if response.status == 403:
-                            raise Forbidden(response, json=data)
+            finally:
+                if consumed and not reported and bucket.limit is None:
+                    # The request ended before Discord reported the limits of the bucket it was discovering,
+                    # so give the slot back rather than leaving the bucket exhausted without a reset time
+                    consumed = False
 
-                    if 500 <= response.status < 600:
-                        if remaining == 1:
-                            raise InternalServerError(response, json=data)
+                bucket.release(consumed=consumed)
 
-                        continue  # Retry if possible
-        finally:
-            bucket.release()
+            if deadline is not None and time.monotonic() + delay > deadline:
+                stats.deadline_exceeded += 1
+                raise RequestTimeout(method, url, timeout)
+
+            stats.retries += 1
+            stats.waited += delay
+
+            if backoff:
+                await asyncio.sleep(delay)
 
     async def close(self) -> None:
-        await self.__session.close()
+        await self.__transport.close()
+        self._buckets.clear()
+        self._cache.clear()
+        self._cached_urls.clear()
+
+        if self._owns_backend:
+            self._buckets.backend.close()
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import asyncio
+
+from collections import deque
+from inspect import isawaitable
+from typing import Deque, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from .enums import OverflowPolicy
+
+from ..typings import JSON
+from ..typings.core import EmitterCallback
+
+
+__all__ = (
+    'ListenerExecutor',
+)
+
+
+class _Lane:
+    # The listeners of a single event type
+    __slots__ = ('limit', 'capacity', 'running', 'backlog', 'queue', 'waiters', 'dropped')
+
+    def __init__(self, limit: int, capacity: int, /) -> None:
+        self.limit: int = limit
+        self.capacity: int = capacity
+        self.running: int = 0
+        self.backlog: int = 0  # Running, queued or waiting on an earlier event of their guild
+        self.queue: Deque[_Job] = deque()
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.dropped: int = 0
+
+
+_Job = Tuple[_Lane, EmitterCallback, JSON, Optional[str]]
+
+
+class ListenerExecutor:
+    """
+    Runs event listeners as tasks, with a bounded amount of them running per event type.
+
+    When the listeners of an event are already running ``max_concurrency`` times, ``overflow`` decides what
+    happens to further events: they are dropped, queued (up to ``max_queue`` of them), or queued and once the
+    queue is full, the shard stops reading events until there is room again. This way a slow ``on_message``
+    listener can't pile up tasks without limit during a spike.
+
+    With ``serial_guilds``, listeners are called for the events of a guild one at a time, in the order
+    the events were received, while events of different guilds still run concurrently.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        The amount of listeners of an event type that can run at once.
+    limits: Optional[Mapping[str, int]]
+        Overrides ``max_concurrency`` for some events, by their name, e.g. ``{'message_create': 20}``.
+    overflow: :class:`~.OverflowPolicy`
+        What to do with events while their listeners are running ``max_concurrency`` times.
+    max_queue: int
+        The amount of events that can be queued per event type, with the ``queue`` and ``block`` policies.
+    serial_guilds: bool
+        Whether to call listeners for the events of a guild one at a time.
+    """
+
+    __slots__ = (
+        'max_concurrency',
+        'limits',
+        'overflow',
+        'max_queue',
+        'serial_guilds',
+        '_lanes',
+        '_guilds',
+        '_tasks'
+    )
+
+    def __init__(
+        self,
+        max_concurrency: int = 100,
+        /,
+        *,
+        limits: Optional[Mapping[str, int]] = None,
+        overflow: OverflowPolicy = OverflowPolicy.queue,
+        max_queue: int = 1000,
+        serial_guilds: bool = False
+    ) -> None:
+        self.max_concurrency: int = max_concurrency
+        self.limits: Dict[str, int] = {event.upper(): limit for event, limit in (limits or {}).items()}
+        self.overflow: OverflowPolicy = overflow
+        self.max_queue: int = max_queue
+        self.serial_guilds: bool = serial_guilds
+
+        self._lanes: Dict[str, _Lane] = {}
+        self._guilds: Dict[str, Deque[_Job]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+    def __repr__(self, /) -> str:
+        return f'<ListenerExecutor max_concurrency={self.max_concurrency} overflow={self.overflow} running={len(self._tasks)}>'
+
+    def _lane(self, event: str, /) -> _Lane:
+        try:
+            return self._lanes[event]
+        except KeyError:
+            limit = self.limits.get(event, self.max_concurrency)
+            capacity = limit if self.overflow is OverflowPolicy.drop else limit + self.max_queue
+
+            lane = self._lanes[event] = _Lane(limit, capacity)
+            return lane
+
+    def pending(self, event: str, /) -> int:
+        """Returns the amount of listener calls of an event which are running or waiting to run."""
+        lane = self._lanes.get(event.upper())
+        return 0 if lane is None else lane.backlog
+
+    def dropped(self, event: str, /) -> int:
+        """Returns the amount of listener calls of an event which were dropped, since they overflowed."""
+        lane = self._lanes.get(event.upper())
+        return 0 if lane is None else lane.dropped
+
+    @staticmethod
+    def _guild_id(event: str, data: JSON, /) -> Optional[str]:
+        if type(data) is not dict:
+            return None
+
+        guild_id = data.get('guild_id')
+        if guild_id is None and event.startswith('GUILD_'):
+            return data.get('id')
+
+        return guild_id
+
+    def submit(self, event: str, callbacks: Iterable[EmitterCallback], data: JSON, /) -> Optional[asyncio.Future]:
+        """Calls the listeners of a dispatched event, as the event's concurrency limit allows.
+
+        With the ``block`` policy, this returns a future when the queue is full,
+        which is resolved once every listener could be queued.
+        """
+        lane = self._lane(event)
+        guild_id = self._guild_id(event, data) if self.serial_guilds else None
+        blocked: List[_Job] = []
+
+        for callback in callbacks:
+            job = lane, callback, data, guild_id
+
+            if blocked or lane.waiters or lane.backlog >= lane.capacity:
+                if self.overflow is OverflowPolicy.block:
+                    blocked.append(job)
+                else:
+                    lane.dropped += 1
+                continue
+
+            self._admit(job)
+
+        if blocked:
+            return asyncio.ensure_future(self._admit_blocked(blocked))
+
+        return None
+
+    async def _admit_blocked(self, jobs: List[_Job], /) -> None:
+        loop = asyncio.get_running_loop()
+
+        for job in jobs:
+            lane = job[0]
+            while lane.backlog >= lane.capacity:
+                waiter = loop.create_future()
+                lane.waiters.append(waiter)
+                await waiter
+
+            self._admit(job)
+
+    def _admit(self, job: _Job, /) -> None:
+        lane, _, _, guild_id = job
+        lane.backlog += 1
+
+        if guild_id is not None:
+            queue = self._guilds.get(guild_id)
+            if queue is not None:
+                # An earlier event of this guild is still being handled
+                queue.append(job)
+                return
+
+            self._guilds[guild_id] = deque()
+
+        self._schedule(job)
+
+    def _schedule(self, job: _Job, /) -> None:
+        lane = job[0]
+        if lane.running < lane.limit:
+            self._start(job)
+        else:
+            lane.queue.append(job)
+
+    def _start(self, job: _Job, /) -> None:
+        job[0].running += 1
+
+        task = asyncio.get_running_loop().create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, job: _Job, /) -> None:
+        _, callback, data, _ = job
+
+        try:
+            result = callback(data)
+            if isawaitable(result):
+                await result
+        except Exception as exc:
+            asyncio.get_running_loop().call_exception_handler({
+                'message': f'Unhandled exception in listener {callback!r}',
+                'exception': exc,
+            })
+        finally:
+            self._finish(job)
+
+    def _finish(self, job: _Job, /) -> None:
+        lane, _, _, guild_id = job
+        lane.running -= 1
+        lane.backlog -= 1
+
+        if lane.queue:
+            self._start(lane.queue.popleft())
+
+        queue = self._guilds.get(guild_id)
+        if queue:
+            self._schedule(queue.popleft())
+        elif queue is not None:
+            del self._guilds[guild_id]
+
+        waiters = lane.waiters
+        while waiters:
+            waiter = waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                break
+
+    async def close(self, /) -> None:
+        """|coro|
+
+        Cancels every running listener and drops queued ones.
+        """
+        for lane in self._lanes.values():
+            lane.queue.clear()
+            for waiter in lane.waiters:
+                waiter.cancel()
+            lane.waiters.clear()
+
+        self._guilds.clear()
+
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -0,0 +1,239 @@
+from __future__ import annotations
+
+import asyncio
+
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, List, Optional, Tuple, Union
+
+from ..errors import GatewayNotConnected
+from ..utils import Ratelimiter
+from .enums import OpCode, SendPriority
+
+
+__all__ = (
+    'SendQueue',
+)
+
+
+_Item = Tuple[Union[str, bytes], asyncio.Future]
+
+_OP_PRIORITIES: Dict[int, SendPriority] = {
+    OpCode.heartbeat.value: SendPriority.heartbeat,
+    OpCode.identify.value: SendPriority.handshake,
+    OpCode.resume.value: SendPriority.handshake,
+    OpCode.presence.value: SendPriority.presence,
+    OpCode.request_members.value: SendPriority.members,
+}
+
+
+class SendQueue:
+    """
+    Queues payloads sent to the gateway, and writes them from a single task within the send rate-limit.
+
+    Payloads are queued already encoded, in one lane per :class:`~.SendPriority`. The writer
+    always drains the highest priority lane that has something in it. Other payloads may only use
+    ``rate - reserved`` sends of every window, so that heartbeats can't be starved by them.
+
+    Callers are slowed down rather than the queue growing forever: a lane holding ``max_size``
+    payloads makes :meth:`put` wait, and :meth:`put_nowait` raise, until the writer catches up.
+
+    Parameters
+    ----------
+    send: Callable[[Union[str, bytes]], Awaitable[None]]
+        Writes an encoded payload to the websocket.
+    rate: int
+        The amount of payloads that can be sent every ``per`` seconds.
+    per: float
+        The length of the rate-limit window, in seconds.
+    reserved: int
+        The amount of sends of every window reserved for heartbeats.
+    max_size: int
+        The amount of payloads a lane can hold before callers have to wait.
+    """
+
+    __slots__ = (
+        'rate',
+        'per',
+        'reserved',
+        'max_size',
+        '_send',
+        '_lanes',
+        '_limiter',
+        '_shared',
+        '_wakeup',
+        '_not_full',
+        '_task',
+        '_close_code',
+        '_shard_id'
+    )
+
+    def __init__(
+        self,
+        send: Callable[[Union[str, bytes]], Awaitable[None]],
+        /,
+        *,
+        rate: int = 120,
+        per: float = 60.0,
+        reserved: int = 10,
+        max_size: int = 1000
+    ) -> None:
+        self.rate: int = rate
+        self.per: float = per
+        self.reserved: int = reserved
+        self.max_size: int = max_size
+
+        self._send: Callable[[Union[str, bytes]], Awaitable[None]] = send
+        self._lanes: List[Deque[_Item]] = [deque() for _ in SendPriority]
+        self._limiter: Ratelimiter = Ratelimiter(rate, per)
+        self._shared: Ratelimiter = Ratelimiter(rate - reserved, per)  # Every lane but heartbeats
+        self._wakeup: asyncio.Event = asyncio.Event()
+        self._not_full: asyncio.Event = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._close_code: Optional[int] = None
+        self._shard_id: Optional[int] = None
+
+    def __repr__(self, /) -> str:
+        return f'<SendQueue pending={self.pending} remaining={self.remaining}>'
+
+    def __len__(self, /) -> int:
+        return self.pending
+
+    @staticmethod
+    def priority_of(op: int, /) -> SendPriority:
+        """Returns the lane payloads with the given opcode are sent through by default."""
+        return _OP_PRIORITIES.get(op, SendPriority.normal)
+
+    @property
+    def pending(self, /) -> int:
+        """int: The amount of payloads waiting to be sent."""
+        return sum(len(lane) for lane in self._lanes)
+
+    @property
+    def close_code(self, /) -> Optional[int]:
+        """Optional[int]: The code the connection was closed with once this queue was closed, otherwise ``None``."""
+        return self._close_code
+
+    @property
+    def remaining(self, /) -> int:
+        """int: The amount of non-heartbeat payloads that can be sent right away."""
+        self._shared.retry_after()  # Expires old sends
+        return self._shared.rate - len(self._shared.recent_calls)
+
+    def full(self, priority: SendPriority, /) -> bool:
+        """Whether or not the lane of the given priority is full, meaning :meth:`put` would wait."""
+        return len(self._lanes[priority.value]) >= self.max_size
+
+    def put_nowait(self, data: Union[str, bytes], priority: SendPriority, /) -> asyncio.Future:
+        """Queues an encoded payload, returning a future which is resolved once it was sent.
+
+        Cancelling the future before then drops the payload.
+
+        Raises
+        ------
+        asyncio.QueueFull
+            The lane of this priority is full.
+        GatewayNotConnected
+            The queue was closed along with its connection.
+        """
+        if self._close_code is not None:
+            raise GatewayNotConnected(self._close_code, shard_id=self._shard_id)
+
+        if self.full(priority):
+            raise asyncio.QueueFull()
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._lanes[priority.value].append((data, future))
+
+        if self._task is None:
+            self._task = loop.create_task(self._writer())
+
+        self._wakeup.set()
+        return future
+
+    async def put(self, data: Union[str, bytes], priority: SendPriority, /) -> asyncio.Future:
+        """|coro|
+
+        Queues an encoded payload, waiting for room in its lane if it is full.
+        Returns a future which is resolved once the payload was sent.
+
+        Raises
+        ------
+        GatewayNotConnected
+            The queue was closed along with its connection, including while waiting for room.
+        """
+        while self.full(priority):
+            self._not_full.clear()
+            await self._not_full.wait()
+
+        return self.put_nowait(data, priority)
+
+    def _retry_after(self, priority: int, /) -> float:
+        if priority == SendPriority.heartbeat.value:
+            return self._limiter.retry_after()
+
+        return max(self._limiter.retry_after(), self._shared.retry_after())
+
+    async def _wait(self, timeout: Optional[float], /) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def _writer(self, /) -> None:
+        lanes = self._lanes
+
+        while True:
+            priority = next((priority for priority, lane in enumerate(lanes) if lane), None)
+            if priority is None:
+                await self._wait(None)
+                continue
+
+            # Every lane but the heartbeat one shares the same limit, so if this one
+            # has to wait, so do the ones below it
+            retry_after = self._retry_after(priority)
+            if retry_after > 0:
+                await self._wait(retry_after)
+                continue
+
+            data, future = lanes[priority].popleft()
+            self._not_full.set()
+            if future.done():
+                continue
+
+            self._limiter.try_acquire()
+            if priority != SendPriority.heartbeat.value:
+                self._shared.try_acquire()
+
+            try:
+                await self._send(data)
+            except asyncio.CancelledError:
+                future.cancel()  # Closed mid-send, which close() can't see anymore
+                raise
+            except Exception as exc:
+                if not future.done():
+                    future.set_exception(exc)
+            else:
+                if not future.done():
+                    future.set_result(None)
+
+    def close(self, /, *, code: int = 1000, shard_id: Optional[int] = None) -> None:
+        """Stops the writer, dropping any payloads which weren't sent yet.
+
+        Anything queued afterwards raises :class:`~.GatewayNotConnected` with the given ``code`` and ``shard_id``.
+        """
+        if self._close_code is None:
+            self._close_code = code
+            self._shard_id = shard_id
+
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+        for lane in self._lanes:
+            for _, future in lane:
+                future.cancel()
+            lane.clear()
+
+        self._not_full.set()
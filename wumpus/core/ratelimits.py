@@ -0,0 +1,697 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+
+from abc import ABC, abstractmethod
+from asyncio import Future, TimerHandle
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+__all__ = (
+    'MAJOR_PARAMETERS',
+    'parse_route',
+    'Bucket',
+    'BucketStats',
+    'BucketState',
+    'BucketRegistry',
+    'GlobalState',
+    'GlobalRatelimiter',
+    'RatelimitBackend',
+    'MemoryBackend'
+)
+
+
+# Breaks ties between waiters of the same priority, in FIFO order
+_counter = itertools.count()
+
+# Resources whose ID is a "major parameter", meaning Discord
+# rate-limits them separately even when they share a bucket hash.
+MAJOR_PARAMETERS = frozenset(('channels', 'guilds', 'webhooks'))
+
+
+def parse_route(method: str, url: str, /) -> Tuple[str, str]:
+    """Splits a request URL into its route template and major parameters.
+
+    IDs that are not major parameters are replaced with placeholders, so that
+    ``DELETE /channels/1/messages/2`` and ``DELETE /channels/1/messages/3``
+    share a route but ``/channels/1/...`` and ``/channels/4/...`` don't.
+
+    Returns
+    -------
+    Tuple[str, str]
+        The route (``"METHOD /path/{id}"``) and the major parameters joined by ``:``.
+    """
+    route = []
+    major = []
+    previous = None
+
+    for segment in urlsplit(url).path.split('/'):
+        if previous in MAJOR_PARAMETERS and segment.isdigit():
+            route.append('{' + previous[:-1] + '_id}')
+            major.append(segment)
+        elif route and route[-1] == '{webhook_id}':
+            # Webhook tokens are part of the major parameter too
+            route.append('{webhook_token}')
+            major.append(segment)
+        elif previous == 'reactions':
+            route.append('{emoji}')
+        elif segment.isdigit():
+            route.append('{id}')
+        else:
+            route.append(segment)
+
+        previous = segment
+
+    return method + ' ' + '/'.join(route), ':'.join(major)
+
+
+class BucketState:
+    """
+    The rate-limit state of a bucket, as last reported by Discord.
+
+    This is the in-memory implementation used by :class:`MemoryBackend`.
+    Other backends subclass this to share the state elsewhere, e.g. between processes.
+    """
+
+    __slots__ = ('limit', 'remaining', 'reset_at', 'unlimited')
+
+    def __init__(self, /) -> None:
+        self.limit: Optional[int] = None
+        self.remaining: int = 1
+        self.reset_at: Optional[float] = None
+        self.unlimited: bool = False
+
+    @property
+    def reset_after(self, /) -> Optional[float]:
+        """Optional[float]: The amount of seconds until the current window resets, if known."""
+        if self.reset_at is None:
+            return None
+
+        return self.reset_at - time.monotonic()
+
+    def delay(self, /) -> float:
+        """Returns the amount of seconds until this bucket resets,
+        or ``0`` if it isn't exhausted.
+        """
+        if self.remaining > 0 or self.reset_at is None:
+            return 0.0
+
+        return max(self.reset_at - time.monotonic(), 0.0)
+
+    def reserve(self, /) -> bool:
+        """Takes a request out of the bucket if one is remaining."""
+        if self.unlimited:
+            return True
+
+        if self.reset_at is not None and time.monotonic() >= self.reset_at:
+            self.reset_at = None
+            self.remaining = self.limit or 1
+
+        if self.remaining > 0:
+            self.remaining -= 1
+            return True
+
+        return False
+
+    def refund(self, /) -> None:
+        """Gives back a request that never reached Discord."""
+        if not self.unlimited:
+            self.remaining += 1
+
+    def update(self, /, *, limit: int, remaining: int, reset_after: float, pending: int = 1) -> None:
+        """Updates this state from what Discord reported.
+
+        ``pending`` is the amount of requests in-flight, including the one that got this response.
+        """
+        now = time.monotonic()
+
+        if self.reset_at is None or now >= self.reset_at:
+            # New window; other in-flight requests aren't accounted for by Discord yet.
+            self.remaining = max(remaining - pending + 1, 0)
+        else:
+            self.remaining = min(self.remaining, remaining)
+
+        self.limit = limit
+        self.unlimited = False
+        self.reset_at = now + reset_after
+
+    def block(self, retry_after: float, /) -> None:
+        """Marks this bucket as exhausted for ``retry_after`` seconds."""
+        self.remaining = 0
+        self.reset_at = time.monotonic() + retry_after
+        self.unlimited = False
+
+    def unlimit(self, /) -> None:
+        """Marks this bucket as not being rate-limited at all."""
+        self.unlimited = True
+
+    def rediscover(self, /) -> bool:
+        """Lets another request through to discover the limits of this bucket,
+        after the one discovering them ended without Discord reporting any.
+
+        Returns whether it did, which it doesn't if the limits may still be discovered elsewhere.
+        """
+        if self.remaining <= 0 and self.reset_at is None:
+            self.remaining = 1
+
+        return True
+
+
+class Bucket:
+    """
+    Schedules requests through a single Discord bucket.
+
+    Up to ``remaining`` requests are let through concurrently.
+    Callers only wait once the bucket is exhausted, until its reset window elapses,
+    and are then let through in order of priority.
+    While the limits of a bucket are unknown, a single request is let through
+    to discover them.
+
+    The rate-limit state itself is held by a :class:`BucketState`,
+    which may be shared with other processes depending on the backend.
+    """
+
+    __slots__ = ('key', 'state', '_pending', '_waiters', '_timer')
+
+    POLL_INTERVAL: float = 0.05
+
+    def __init__(self, key: str, /, state: Optional[BucketState] = None) -> None:
+        self.key: str = key
+        self.state: BucketState = state or BucketState()
+
+        self._pending: int = 0
+        self._waiters: List[Tuple[int, int, Future]] = []  # heap
+        self._timer: Optional[TimerHandle] = None
+
+    def __repr__(self, /) -> str:
+        return f'<Bucket key={self.key!r} remaining={self.remaining} limit={self.limit} pending={self._pending}>'
+
+    @property
+    def limit(self, /) -> Optional[int]:
+        """Optional[int]: The amount of requests allowed per window, if known."""
+        return self.state.limit
+
+    @property
+    def remaining(self, /) -> int:
+        """int: The amount of requests remaining in the current window."""
+        return self.state.remaining
+
+    @property
+    def pending(self, /) -> int:
+        """int: The amount of requests currently in-flight in this bucket."""
+        return self._pending
+
+    def delay(self, /) -> float:
+        """Returns the amount of seconds until this bucket resets,
+        or ``0`` if it isn't exhausted.
+        """
+        return self.state.delay()
+
+    def _wake(self, /) -> None:
+        waiters = self._waiters
+        if not waiters:
+            return
+
+        state = self.state
+
+        if state.unlimited:
+            count = len(waiters)
+        elif state.remaining > 0:
+            count = state.remaining
+        else:
+            reset_after = state.reset_after
+
+            if reset_after is None:
+                if self._pending:
+                    # Our own in-flight request will report the limits of this bucket
+                    return
+
+                if not state.rediscover():
+                    # They're being discovered by another process sharing our state, nothing will wake us up
+                    self._schedule(self.POLL_INTERVAL)
+                    return
+
+                count = 1
+
+            elif reset_after > 0:
+                self._schedule(reset_after)
+                return
+
+            else:
+                # The window has reset, the bucket will be refilled on the next reservation
+                count = state.limit or 1
+
+        while waiters and count > 0:
+            waiter = heapq.heappop(waiters)[2]
+            if not waiter.done():
+                waiter.set_result(None)
+                count -= 1
+
+    def _schedule(self, delay: float, /) -> None:
+        if self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(delay, self._on_timer)
+
+    def _on_timer(self, /) -> None:
+        self._timer = None
+        self._wake()
+
+    async def acquire(self, priority: int = 1, /) -> None:
+        """|coro|
+
+        Waits until a request can be made in this bucket, then reserves it.
+        Every call must be paired with a :meth:`release`.
+
+        Waiters are let through in order of ``priority`` (lowest first), then in FIFO order.
+        """
+        if not self._waiters and self.state.reserve():
+            self._pending += 1
+            return
+
+        # Keep our place in line if we're woken up but someone else beats us to it
+        sequence = next(_counter)
+
+        while True:
+            entry = (priority, sequence, asyncio.get_running_loop().create_future())
+            heapq.heappush(self._waiters, entry)
+            self._wake()
+
+            try:
+                await entry[2]
+            except asyncio.CancelledError:
+                if entry[2].cancelled():
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                else:
+                    # Pass our turn on to someone else
+                    self._wake()
+                raise
+
+            if self.state.reserve():
+                self._pending += 1
+                return
+
+    def release(self, /, *, consumed: bool = True) -> None:
+        """Releases a reservation made with :meth:`acquire`.
+
+        If ``consumed`` is ``False``, the request never reached Discord
+        and the reservation is given back to the bucket.
+        """
+        self._pending -= 1
+        if not consumed:
+            self.state.refund()
+
+        self._wake()
+
+    def update(self, /, *, limit: int, remaining: int, reset_after: float) -> None:
+        """Updates this bucket from the rate-limit state Discord reported."""
+        self.state.update(limit=limit, remaining=remaining, reset_after=reset_after, pending=self._pending)
+        self._wake()
+
+    def block(self, retry_after: float, /) -> None:
+        """Marks this bucket as exhausted for ``retry_after`` seconds."""
+        self.state.block(retry_after)
+        self._wake()
+
+    def unlimit(self, /) -> None:
+        """Marks this bucket as not being rate-limited at all."""
+        self.state.unlimit()
+        self._wake()
+
+
+class BucketStats(NamedTuple):
+    live: int
+    evicted: int
+    expired: int
+
+
+class BucketRegistry:
+    """
+    A bounded table of :class:`Bucket` objects, keyed by route or bucket hash and major parameters.
+
+    Idle buckets are dropped once their reset window has elapsed, since a fresh bucket
+    would behave the same. If the table still grows past ``max_size``, the least recently
+    used idle buckets are evicted. Buckets with in-flight or waiting requests are never dropped.
+    """
+
+    __slots__ = ('max_size', 'backend', '_buckets', '_hashes', '_evicted', '_expired')
+
+    # How many of the least recently used buckets are checked for expiry on each lookup.
+    SWEEP_SIZE: int = 8
+
+    def __init__(self, /, *, max_size: int = 4096, backend: Optional[RatelimitBackend] = None) -> None:
+        self.max_size: int = max_size
+        self.backend: RatelimitBackend = backend or MemoryBackend()
+
+        # Maps routes to the bucket hash Discord reported for them.
+        # This is bounded by the amount of routes, not by the amount of IDs.
+        self._hashes: Dict[str, str] = {}
+        self._buckets: OrderedDict[str, Bucket] = OrderedDict()
+
+        self._evicted: int = 0
+        self._expired: int = 0
+
+    def __repr__(self, /) -> str:
+        return f'<BucketRegistry live={len(self)} max_size={self.max_size}>'
+
+    def __len__(self, /) -> int:
+        return len(self._buckets)
+
+    def __contains__(self, key: str, /) -> bool:
+        return key in self._buckets
+
+    @property
+    def stats(self, /) -> BucketStats:
+        """:class:`BucketStats`: The amount of live, evicted and expired buckets."""
+        return BucketStats(len(self._buckets), self._evicted, self._expired)
+
+    @staticmethod
+    def _is_idle(bucket: Bucket, /) -> bool:
+        return bucket._pending == 0 and not bucket._waiters
+
+    def get(self, route: str, major: str, /) -> Bucket:
+        """Returns the bucket requests to the given route and major parameters go through.
+
+        Until Discord reports a bucket hash for the route, the route itself is used as the bucket key.
+        """
+        key = self._hashes.get(route, route) + ':' + major
+        buckets = self._buckets
+
+        bucket = buckets.get(key)
+        if bucket is not None:
+            buckets.move_to_end(key)
+            return bucket
+
+        self._sweep()
+        buckets[key] = bucket = Bucket(key, self.backend.get_bucket_state(key))
+        return bucket
+
+    def rekey(self, bucket: Bucket, route: str, major: str, bucket_hash: str, /) -> None:
+        """Registers the bucket hash Discord reported for a route,
+        moving the given bucket over to its new key.
+        """
+        if self._hashes.get(route) != bucket_hash:
+            self._hashes[route] = bucket_hash
+
+        key = bucket_hash + ':' + major
+        if bucket.key == key:
+            return
+
+        # Move this bucket over to its real key, unless another route already shares it.
+        # This is also needed once the hash is known, for buckets of other major parameters
+        # which were being discovered at the same time.
+        if self._buckets.get(bucket.key) is bucket:
+            del self._buckets[bucket.key]
+
+        if key not in self._buckets:
+            self._buckets[key] = bucket
+            bucket.key = key
+            bucket.state = self.backend.get_bucket_state(key, bucket.state)
+
+    def _sweep(self, /) -> None:
+        buckets = self._buckets
+
+        # The least recently used buckets are the likeliest to have expired.
+        for key in list(itertools.islice(buckets, self.SWEEP_SIZE)):
+            bucket = buckets[key]
+            if not self._is_idle(bucket):
+                continue
+
+            reset_after = bucket.state.reset_after
+            if reset_after is None or reset_after <= 0:
+                del buckets[key]
+                self._expired += 1
+
+        if len(buckets) < self.max_size:
+            return
+
+        excess = len(buckets) - self.max_size + 1
+        victims = []
+
+        for key, bucket in buckets.items():
+            if self._is_idle(bucket):
+                victims.append(key)
+                if len(victims) >= excess:
+                    break
+
+        for key in victims:
+            del buckets[key]
+
+        self._evicted += len(victims)
+
+    def clear(self, /) -> None:
+        """Drops every bucket and bucket hash, e.g. after the HTTP session was closed."""
+        self._buckets.clear()
+        self._hashes.clear()
+
+
+class GlobalState:
+    """
+    The state of the global rate-limit: a token bucket of ``rate`` requests per ``per`` seconds,
+    plus the deadline of a global rate-limit reported by Discord.
+
+    This is the in-memory implementation used by :class:`MemoryBackend`.
+    """
+
+    __slots__ = ('rate', 'per', '_tokens', '_last', '_blocked_until')
+
+    def __init__(self, rate: int = 50, per: float = 1.0, /) -> None:
+        self.rate: int = rate
+        self.per: float = per
+
+        self._tokens: float = rate
+        self._last: float = time.monotonic()
+        self._blocked_until: float = 0.0
+
+    def take(self, /) -> float:
+        """Takes a token if one is available.
+
+        Returns
+        -------
+        float
+            ``0`` if a token was taken, otherwise the amount of seconds until one is available.
+        """
+        now = time.monotonic()
+        self._tokens = min(self._tokens + (now - self._last) * self.rate / self.per, self.rate)
+        self._last = now
+
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return 0.0
+
+        return (1 - self._tokens) * self.per / self.rate
+
+    def blocked_for(self, /) -> float:
+        """Returns the amount of seconds left on the global rate-limit, or ``0`` if there is none."""
+        return max(self._blocked_until - time.monotonic(), 0.0)
+
+    def block(self, retry_after: float, /) -> None:
+        """Records a global rate-limit lasting ``retry_after`` seconds."""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+
+
+class GlobalRatelimiter:
+    """
+    Enforces Discord's global rate-limit, which applies across every route.
+
+    Requests are paced proactively with a token bucket of ``rate`` requests per ``per`` seconds.
+    Waiters for a token are served in order of priority.
+    When Discord reports a global rate-limit anyways, every waiter is parked on one shared
+    deadline, which is released by a single timer instead of each waiter sleeping on its own.
+    """
+
+    __slots__ = ('state', '_unblocked', '_timer', '_waiters', '_token_timer')
+
+    def __init__(self, rate: int = 50, per: float = 1.0, /, *, state: Optional[GlobalState] = None) -> None:
+        self.state: GlobalState = state or GlobalState(rate, per)
+
+        self._unblocked: Optional[Future] = None
+        self._timer: Optional[TimerHandle] = None
+
+        self._waiters: List[Tuple[int, int, Future]] = []  # heap
+        self._token_timer: Optional[TimerHandle] = None
+
+    def __repr__(self, /) -> str:
+        return f'<GlobalRatelimiter rate={self.rate} per={self.per} blocked={self.blocked}>'
+
+    @property
+    def rate(self, /) -> int:
+        return self.state.rate
+
+    @property
+    def per(self, /) -> float:
+        return self.state.per
+
+    @property
+    def blocked(self, /) -> bool:
+        """bool: Whether or not Discord has globally rate-limited us."""
+        return self._unblocked is not None
+
+    def _check_blocked(self, /) -> float:
+        # The global rate-limit may have been reported by another process sharing our state
+        delay = self.state.blocked_for()
+        if delay > 0:
+            self._park(delay)
+
+        return delay
+
+    def try_acquire(self, /) -> float:
+        """Takes a token if one is available.
+
+        Returns
+        -------
+        float
+            ``0`` if a token was taken, otherwise the amount of seconds until one is available.
+        """
+        return self._check_blocked() or self.state.take()
+
+    async def wait(self, /) -> None:
+        """|coro|
+
+        Waits until we are no longer globally rate-limited, without taking a token.
+        """
+        self._check_blocked()
+
+        while self._unblocked is not None:
+            # Shield the shared future so a cancelled waiter can't cancel it for everyone.
+            await asyncio.shield(self._unblocked)
+            self._check_blocked()
+
+    async def take(self, priority: int = 1, /) -> bool:
+        """|coro|
+
+        Waits until a token is available, in order of ``priority`` (lowest first), then takes it.
+
+        Returns
+        -------
+        bool
+            Whether or not a token was taken. This is ``False`` if we were
+            globally rate-limited before one became available.
+        """
+        if self._unblocked is not None or self._check_blocked():
+            return False
+
+        if not self._waiters and not self.state.take():
+            return True
+
+        entry = (priority, next(_counter), asyncio.get_running_loop().create_future())
+        heapq.heappush(self._waiters, entry)
+        self._dispatch()
+
+        try:
+            return await entry[2]
+        except asyncio.CancelledError:
+            if entry[2].cancelled():
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            raise
+
+    async def acquire(self, priority: int = 1, /) -> None:
+        """|coro|
+
+        Waits until a token is available and we aren't globally rate-limited, then takes it.
+        """
+        while True:
+            await self.wait()
+
+            if await self.take(priority):
+                return
+
+    def _dispatch(self, /) -> None:
+        # Hands out tokens to waiters in order, or schedules itself for when the next one is available.
+        if self._token_timer is not None or self._check_blocked():
+            return
+
+        waiters = self._waiters
+        while waiters:
+            if waiters[0][2].done():
+                heapq.heappop(waiters)
+                continue
+
+            delay = self.state.take()
+            if delay:
+                self._token_timer = asyncio.get_running_loop().call_later(delay, self._on_token_timer)
+                return
+
+            heapq.heappop(waiters)[2].set_result(True)
+
+    def _on_token_timer(self, /) -> None:
+        self._token_timer = None
+        self._dispatch()
+
+    def block(self, retry_after: float, /) -> None:
+        """Parks every request until ``retry_after`` seconds from now, after a global 429."""
+        self.state.block(retry_after)
+        self._park(self.state.blocked_for())
+
+    def _park(self, delay: float, /) -> None:
+        loop = asyncio.get_running_loop()
+        if self._unblocked is None:
+            self._unblocked = loop.create_future()
+
+        # Let everyone waiting on a token know they won't get one
+        for _, _, waiter in self._waiters:
+            if not waiter.done():
+                waiter.set_result(False)
+
+        self._waiters.clear()
+        if self._token_timer is not None:
+            self._token_timer.cancel()
+            self._token_timer = None
+
+        if self._timer is not None:
+            if self._timer.when() >= loop.time() + delay:
+                return
+
+            self._timer.cancel()
+
+        self._timer = loop.call_later(delay, self._unblock)
+
+    def _unblock(self, /) -> None:
+        waiter, self._unblocked, self._timer = self._unblocked, None, None
+
+        if waiter is not None and not waiter.done():
+            waiter.set_result(None)
+
+
+class RatelimitBackend(ABC):
+    """
+    Decides where rate-limit state is stored.
+
+    Backends hand out :class:`BucketState` and :class:`GlobalState` objects;
+    :class:`HTTPClient` still schedules its own requests, but a backend can make it
+    see the same ``remaining``/``reset`` as other clients sharing the same token.
+    """
+
+    @abstractmethod
+    def get_bucket_state(self, key: str, /, previous: Optional[BucketState] = None) -> BucketState:
+        """Returns the state of the bucket with the given key.
+
+        ``previous`` is the state the bucket had under another key, e.g.
+        before Discord reported its bucket hash.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_global_state(self, rate: int, per: float, /) -> GlobalState:
+        """Returns the state of the global rate-limit."""
+        raise NotImplementedError
+
+    def close(self, /) -> None:
+        """Releases any resources held by this backend."""
+
+
+class MemoryBackend(RatelimitBackend):
+    """
+    The default backend, which keeps rate-limit state local to this :class:`HTTPClient`.
+    """
+
+    def get_bucket_state(self, key: str, /, previous: Optional[BucketState] = None) -> BucketState:
+        return previous or BucketState()
+
+    def get_global_state(self, rate: int, per: float, /) -> GlobalState:
+        return GlobalState(rate, per)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import random
+
+from typing import FrozenSet, Optional
+
+
+__all__ = (
+    'RetryStats',
+    'RetryPolicy'
+)
+
+
+class RetryStats:
+    """
+    Counters of how often requests were retried, and how long was spent waiting to retry them.
+    """
+
+    __slots__ = ('requests', 'retries', 'ratelimited', 'budget_exhausted', 'deadline_exceeded', 'waited')
+
+    def __init__(self, /) -> None:
+        self.requests: int = 0
+        self.retries: int = 0
+        self.ratelimited: int = 0
+        self.budget_exhausted: int = 0
+        self.deadline_exceeded: int = 0
+        self.waited: float = 0.0
+
+    def __repr__(self, /) -> str:
+        return ' '.join(f'{name}={getattr(self, name)!r}' for name in self.__slots__).join(('<RetryStats ', '>'))
+
+
+class RetryPolicy:
+    """
+    Decides whether, and after how long, a failed request is retried.
+
+    Server errors and network errors (connection resets, timeouts) are retried
+    after a jittered exponential backoff. Retries are drawn from a budget that is
+    refilled by a fraction of every request made, so that during a Discord incident
+    the client stops retrying instead of multiplying the load.
+
+    429 responses don't draw from the budget, since Discord tells us exactly how long to wait.
+
+    Parameters
+    ----------
+    max_retries: int
+        The maximum amount of times a request is retried after a server or network error.
+    max_ratelimit_retries: int
+        The maximum amount of times a request is retried after being rate-limited.
+    backoff_base: float
+        The backoff of the first retry, in seconds. This doubles after every retry.
+    backoff_cap: float
+        The maximum backoff, in seconds.
+    timeout: Optional[float]
+        The overall deadline of a request in seconds, including retries and time spent waiting on them.
+        This can be overridden per request.
+    budget_ratio: float
+        How many retries every request adds to the budget.
+    budget_max: float
+        The maximum amount of retries the budget holds.
+    retry_statuses: FrozenSet[int]
+        The statuses that are retried.
+    retry_network_errors: bool
+        Whether or not to retry connection errors and timeouts.
+    """
+
+    __slots__ = (
+        'max_retries',
+        'max_ratelimit_retries',
+        'backoff_base',
+        'backoff_cap',
+        'timeout',
+        'budget_ratio',
+        'budget_max',
+        'retry_statuses',
+        'retry_network_errors',
+        'stats',
+        '_budget'
+    )
+
+    def __init__(
+        self,
+        /,
+        *,
+        max_retries: int = 3,
+        max_ratelimit_retries: int = 5,
+        backoff_base: float = 0.5,
+        backoff_cap: float = 10.0,
+        timeout: Optional[float] = None,
+        budget_ratio: float = 0.1,
+        budget_max: float = 10.0,
+        retry_statuses: FrozenSet[int] = frozenset((500, 502, 503, 504)),
+        retry_network_errors: bool = True
+    ) -> None:
+        self.max_retries: int = max_retries
+        self.max_ratelimit_retries: int = max_ratelimit_retries
+        self.backoff_base: float = backoff_base
+        self.backoff_cap: float = backoff_cap
+        self.timeout: Optional[float] = timeout
+        self.budget_ratio: float = budget_ratio
+        self.budget_max: float = budget_max
+        self.retry_statuses: FrozenSet[int] = retry_statuses
+        self.retry_network_errors: bool = retry_network_errors
+
+        self.stats: RetryStats = RetryStats()
+        self._budget: float = budget_max
+
+    def __repr__(self, /) -> str:
+        return f'<RetryPolicy max_retries={self.max_retries} timeout={self.timeout} budget={self._budget:.1f}>'
+
+    @property
+    def budget(self, /) -> float:
+        """float: The amount of retries currently left in the budget."""
+        return self._budget
+
+    def backoff(self, retries: int, /) -> float:
+        """Returns how long to wait before retrying, given how many times the request was already retried.
+
+        This uses "full jitter", so that clients which failed at the same time don't retry at the same time.
+        """
+        return random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** retries))
+
+    def record_request(self, /) -> None:
+        """Records a new request being made, which adds to the retry budget."""
+        self.stats.requests += 1
+        self._budget = min(self._budget + self.budget_ratio, self.budget_max)
+
+    def should_retry(self, retries: int, /) -> bool:
+        """Returns whether or not a request that failed with a server or network error should be retried,
+        given how many times it was already retried. This draws from the retry budget.
+        """
+        if retries >= self.max_retries:
+            return False
+
+        if self._budget < 1:
+            self.stats.budget_exhausted += 1
+            return False
+
+        self._budget -= 1
+        return True
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+
+from abc import ABC, abstractmethod
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+__all__ = (
+    'Serializer',
+    'StdlibSerializer',
+    'OrjsonSerializer',
+    'default_serializer'
+)
+
+
+class Serializer(ABC):
+    """
+    Encodes and decodes the JSON payloads sent to and received from Discord,
+    both over HTTP and over the gateway.
+    """
+
+    name: str
+
+    def __repr__(self, /) -> str:
+        return f'<{self.__class__.__name__} name={self.name!r}>'
+
+    @abstractmethod
+    def encode(self, obj: Any, /) -> bytes:
+        """Encodes an object into UTF-8 encoded JSON."""
+        raise NotImplementedError
+
+    def encode_str(self, obj: Any, /) -> str:
+        """Encodes an object into a JSON string, e.g. for websocket text frames."""
+        return self.encode(obj).decode('utf-8')
+
+    @abstractmethod
+    def decode(self, data: Union[bytes, bytearray, memoryview, str], /) -> Any:
+        """Decodes JSON. Bytes are decoded directly, without going through :class:`str` first."""
+        raise NotImplementedError
+
+
+class StdlibSerializer(Serializer):
+    """
+    A :class:`Serializer` using the standard library's :mod:`json`.
+    """
+
+    name = 'json'
+
+    def encode(self, obj: Any, /) -> bytes:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def encode_str(self, obj: Any, /) -> str:
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=False)
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str], /) -> Any:
+        if type(data) is memoryview:
+            data = bytes(data)
+
+        return json.loads(data)
+
+
+class OrjsonSerializer(Serializer):
+    """
+    A :class:`Serializer` using `orjson <https://github.com/ijl/orjson>`_.
+
+    This is installed with the ``performance`` extra, i.e. ``pip install wumpus.py[performance]``.
+    """
+
+    name = 'orjson'
+
+    def __init__(self, /) -> None:
+        if orjson is None:
+            raise RuntimeError('orjson is required for this serializer, install it with "pip install orjson"')
+
+    def encode(self, obj: Any, /) -> bytes:
+        return orjson.dumps(obj)
+
+    def decode(self, data: Union[bytes, bytearray, memoryview, str], /) -> Any:
+        return orjson.loads(data)
+
+
+def default_serializer() -> Serializer:
+    """Returns the fastest :class:`Serializer` available, which is
+    :class:`OrjsonSerializer` if orjson is installed, otherwise :class:`StdlibSerializer`.
+    """
+    if orjson is not None:
+        return OrjsonSerializer()
+
+    return StdlibSerializer()
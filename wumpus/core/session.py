@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import time
+
+from abc import ABC, abstractmethod
+from typing import Dict, Mapping, NamedTuple, Optional
+
+
+__all__ = (
+    'SessionState',
+    'SessionStore',
+    'FileSessionStore',
+    'SQLiteSessionStore'
+)
+
+
+class SessionState(NamedTuple):
+    session_id: str
+    sequence: Optional[int]
+    resume_url: Optional[str]
+    shard_count: Optional[int]
+    updated_at: float
+
+
+class SessionStore(ABC):
+    """
+    Persists the gateway sessions of shards, so that they can be resumed after the process restarts
+    (e.g. during a deploy) instead of identifying again.
+
+    Sessions are saved every few seconds and when shards are closed, so a resume may replay a few
+    events that were already handled before the restart.
+
+    Parameters
+    ----------
+    max_age: float
+        Sessions that weren't saved for this many seconds are considered expired, since Discord won't resume them anyways.
+    """
+
+    def __init__(self, /, *, max_age: float = 300.0) -> None:
+        self.max_age: float = max_age
+
+    def __repr__(self, /) -> str:
+        return f'<{self.__class__.__name__} max_age={self.max_age}>'
+
+    def _fresh(self, state: Optional[SessionState], /) -> Optional[SessionState]:
+        if state is None or time.time() - state.updated_at > self.max_age:
+            return None
+
+        return state
+
+    @abstractmethod
+    def load(self, shard_id: int, /) -> Optional[SessionState]:
+        """Returns the saved session of a shard, if there is one which hasn't expired."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def save(self, shard_id: int, state: SessionState, /) -> None:
+        """Saves the session of a shard."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, shard_id: int, /) -> None:
+        """Deletes the saved session of a shard, e.g. once it was invalidated."""
+        raise NotImplementedError
+
+    def save_many(self, states: Mapping[int, Optional[SessionState]], /) -> None:
+        """Saves the sessions of several shards at once. Shards mapped to ``None`` are deleted."""
+        for shard_id, state in states.items():
+            if state is None:
+                self.delete(shard_id)
+            else:
+                self.save(shard_id, state)
+
+    def close(self, /) -> None:
+        """Releases any resources held by this store."""
+
+
+class FileSessionStore(SessionStore):
+    """
+    A :class:`SessionStore` keeping sessions in a JSON file, which is replaced atomically on every save.
+
+    This should only be used by a single process at a time; use :class:`SQLiteSessionStore` to share a store between clusters.
+
+    Parameters
+    ----------
+    path: str
+        The path of the file. It is created if it doesn't exist.
+    """
+
+    def __init__(self, path: str, /, *, max_age: float = 300.0) -> None:
+        super().__init__(max_age=max_age)
+        self.path: str = path
+        self._states: Dict[int, SessionState] = {}
+
+        try:
+            with open(path, encoding='utf-8') as fp:
+                data = json.load(fp)
+        except FileNotFoundError:
+            pass
+        else:
+            self._states = {int(shard_id): SessionState(*state) for shard_id, state in data.items()}
+
+    def _write(self, /) -> None:
+        temporary = self.path + '.tmp'
+        with open(temporary, 'w', encoding='utf-8') as fp:
+            json.dump({shard_id: list(state) for shard_id, state in self._states.items()}, fp)
+
+        os.replace(temporary, self.path)
+
+    def load(self, shard_id: int, /) -> Optional[SessionState]:
+        return self._fresh(self._states.get(shard_id))
+
+    def save(self, shard_id: int, state: SessionState, /) -> None:
+        self._states[shard_id] = state
+        self._write()
+
+    def delete(self, shard_id: int, /) -> None:
+        if self._states.pop(shard_id, None) is not None:
+            self._write()
+
+    def save_many(self, states: Mapping[int, Optional[SessionState]], /) -> None:
+        for shard_id, state in states.items():
+            if state is None:
+                self._states.pop(shard_id, None)
+            else:
+                self._states[shard_id] = state
+
+        self._write()
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    A :class:`SessionStore` keeping sessions in a SQLite database,
+    which can be shared between processes, e.g. clusters.
+
+    Parameters
+    ----------
+    path: str
+        The path of the database. It is created if it doesn't exist.
+    """
+
+    def __init__(self, path: str, /, *, max_age: float = 300.0) -> None:
+        super().__init__(max_age=max_age)
+        self.path: str = path
+
+        self._db: sqlite3.Connection = sqlite3.connect(path, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS sessions ('
+            'shard_id INTEGER PRIMARY KEY, session_id TEXT NOT NULL, sequence INTEGER, '
+            'resume_url TEXT, shard_count INTEGER, updated_at REAL NOT NULL)'
+        )
+
+    def load(self, shard_id: int, /) -> Optional[SessionState]:
+        row = self._db.execute(
+            'SELECT session_id, sequence, resume_url, shard_count, updated_at FROM sessions WHERE shard_id = ?',
+            (shard_id,),
+        ).fetchone()
+
+        return self._fresh(row and SessionState(*row))
+
+    def save(self, shard_id: int, state: SessionState, /) -> None:
+        self._db.execute('INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)', (shard_id, *state))
+
+    def delete(self, shard_id: int, /) -> None:
+        self._db.execute('DELETE FROM sessions WHERE shard_id = ?', (shard_id,))
+
+    def save_many(self, states: Mapping[int, Optional[SessionState]], /) -> None:
+        with self._db:
+            self._db.execute('BEGIN')
+            for shard_id, state in states.items():
+                if state is None:
+                    self.delete(shard_id)
+                else:
+                    self.save(shard_id, state)
+
+    def close(self, /) -> None:
+        self._db.close()
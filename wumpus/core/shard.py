@@ -0,0 +1,497 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+
+from concurrent.futures import Executor
+from contextlib import asynccontextmanager, suppress
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set, TYPE_CHECKING
+
+import aiohttp
+
+from .connection import Connection, SessionStartLimit
+from .events import EventEmitter
+from .gateway import Gateway, Reconnect
+from .session import SessionState, SessionStore
+
+from ..typings.core import GatewayCompression, GatewayEncoding
+
+if TYPE_CHECKING:
+    from ..testing.recorder import FrameRecorder
+
+
+__all__ = (
+    'IdentifyScheduler',
+    'Shard',
+    'ShardManager'
+)
+
+
+class IdentifyScheduler:
+    """
+    Schedules identifies so that they respect Discord's session start limits.
+
+    Shards are grouped into ``max_concurrency`` identify buckets by ``shard_id % max_concurrency``.
+    Every bucket allows one identify every :attr:`IDENTIFY_INTERVAL` seconds, and buckets identify
+    concurrently. Shards waiting on the same bucket are let through in the order they asked.
+
+    Session starts are also counted against ``remaining``; once they run out,
+    identifies wait until the daily limit resets.
+
+    Parameters
+    ----------
+    max_concurrency: int
+        The amount of identify buckets.
+    total: Optional[int]
+        The amount of session starts allowed per reset. ``None`` means unlimited.
+    remaining: Optional[int]
+        The amount of session starts remaining. Defaults to ``total``.
+    reset_after: float
+        The amount of seconds until the session start limit resets.
+    """
+
+    __slots__ = ('max_concurrency', 'total', '_remaining', '_reset_at', '_locks')
+
+    IDENTIFY_INTERVAL: float = 5.0
+
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        /,
+        *,
+        total: Optional[int] = None,
+        remaining: Optional[int] = None,
+        reset_after: float = 0.0
+    ) -> None:
+        self.max_concurrency: int = max_concurrency
+        self.total: Optional[int] = total
+        self._remaining: Optional[int] = total if remaining is None else remaining
+        self._reset_at: float = time.monotonic() + reset_after
+        self._locks: Dict[int, asyncio.Lock] = {}
+
+    def __repr__(self, /) -> str:
+        return f'<IdentifyScheduler max_concurrency={self.max_concurrency} remaining={self.remaining}>'
+
+    @classmethod
+    def from_session_start_limit(cls, limit: SessionStartLimit, /) -> IdentifyScheduler:
+        """Creates an :class:`IdentifyScheduler` from the session start limit reported by ``/gateway/bot``."""
+        return cls(
+            limit.max_concurrency,
+            total=limit.total,
+            remaining=limit.remaining,
+            reset_after=limit.reset_after / 1000,
+        )
+
+    @property
+    def remaining(self, /) -> Optional[int]:
+        """Optional[int]: The amount of session starts remaining, if limited."""
+        if self._remaining is not None and time.monotonic() >= self._reset_at:
+            return self.total
+
+        return self._remaining
+
+    def bucket(self, shard_id: int, /) -> int:
+        """Returns the identify bucket of a shard."""
+        return shard_id % self.max_concurrency
+
+    async def _take_session_start(self, /) -> None:
+        if self._remaining is None:
+            return
+
+        while True:
+            now = time.monotonic()
+            if now >= self._reset_at:
+                self._remaining = self.total
+                self._reset_at = now + 86400
+
+            if self._remaining > 0:
+                self._remaining -= 1
+                return
+
+            await asyncio.sleep(self._reset_at - now)
+
+    @asynccontextmanager
+    async def acquire(self, shard_id: int, /) -> AsyncIterator[None]:
+        """Waits until ``shard_id`` may identify. The identify should be sent within this context.
+
+        The shard's bucket is released :attr:`IDENTIFY_INTERVAL` seconds after the context exits,
+        so the interval is counted from when the identify was actually sent.
+        """
+        try:
+            lock = self._locks[self.bucket(shard_id)]
+        except KeyError:
+            lock = self._locks[self.bucket(shard_id)] = asyncio.Lock()
+
+        await lock.acquire()
+        try:
+            await self._take_session_start()
+            yield
+        finally:
+            asyncio.get_running_loop().call_later(self.IDENTIFY_INTERVAL, lock.release)
+
+
+class Shard:
+    """
+    Keeps a single shard connected, reconnecting and resuming its :class:`~.Gateway` as needed.
+    """
+
+    __slots__ = (
+        'id',
+        'guild_ids',
+        'latencies',
+        '_manager',
+        '_gateway',
+        '_session_id',
+        '_sequence',
+        '_resume_url',
+        '_ready',
+        '_closed'
+    )
+
+    # The maximum amount of seconds to wait before reconnecting after a network error.
+    MAX_BACKOFF: float = 60.0
+
+    def __init__(self, manager: ShardManager, shard_id: int, /) -> None:
+        self.id: int = shard_id
+        self.guild_ids: Set[int] = set()
+        self.latencies: Deque[float] = deque(maxlen=Gateway.LATENCY_HISTORY)
+        self._manager: ShardManager = manager
+        self._gateway: Optional[Gateway] = None
+
+        self._session_id: Optional[str] = None
+        self._sequence: Optional[int] = None
+        self._resume_url: Optional[str] = None
+
+        self._ready: asyncio.Event = asyncio.Event()
+        self._closed: bool = False
+
+    def __repr__(self, /) -> str:
+        return f'<Shard id={self.id} connected={self.connected} session_id={self._session_id!r}>'
+
+    @property
+    def gateway(self, /) -> Optional[Gateway]:
+        """Optional[:class:`~.Gateway`]: The gateway this shard is currently connected through."""
+        return self._gateway
+
+    @property
+    def connected(self, /) -> bool:
+        """bool: Whether or not this shard is currently connected."""
+        return self._gateway is not None and not self._gateway.closed
+
+    @property
+    def latency(self, /) -> Optional[float]:
+        """Optional[float]: The latency of the last acked heartbeat of this shard, in seconds."""
+        return self.latencies[-1] if self.latencies else None
+
+    def latency_percentile(self, percentile: float, /) -> Optional[float]:
+        """Returns the given percentile (``0`` to ``100``) of this shard's recent heartbeat latencies, in seconds.
+
+        This covers the last :attr:`~.Gateway.LATENCY_HISTORY` heartbeats, across reconnects.
+        ``None`` is returned if no heartbeat was acked yet.
+        """
+        if not self.latencies:
+            return None
+
+        latencies = sorted(self.latencies)
+        return latencies[min(int(len(latencies) * percentile / 100), len(latencies) - 1)]
+
+    @property
+    def session(self, /) -> Optional[SessionState]:
+        """Optional[:class:`~.SessionState`]: The current session of this shard, if it has one."""
+        gateway = self._gateway
+        if gateway is not None and gateway.session_id is not None:
+            session_id, sequence, resume_url = gateway.session_id, gateway.sequence, gateway.resume_url
+        else:
+            session_id, sequence, resume_url = self._session_id, self._sequence, self._resume_url
+
+        if session_id is None:
+            return None
+
+        return SessionState(session_id, sequence, resume_url, self._manager.shard_count, time.time())
+
+    def _restore(self, state: SessionState, /) -> None:
+        self._session_id = state.session_id
+        self._sequence = state.sequence
+        self._resume_url = state.resume_url
+
+    async def wait_until_connected(self, /) -> None:
+        """|coro|
+
+        Waits until this shard has identified or resumed for the first time.
+        """
+        await self._ready.wait()
+
+    async def _connect(self, /, *, resume: bool) -> Gateway:
+        manager = self._manager
+        options = dict(
+            shard_id=self.id,
+            shard_count=manager.shard_count,
+            emitter=manager.emitter,
+            **manager._gateway_options,
+        )
+
+        if resume and self._session_id is not None:
+            return await Gateway.from_connection(
+                manager.connection,
+                url=self._resume_url or manager.url,
+                session_id=self._session_id,
+                sequence=self._sequence,
+                resume=True,
+                **options,
+            )
+
+        async with manager.scheduler.acquire(self.id):
+            return await Gateway.from_connection(manager.connection, url=manager.url, resume=False, **options)
+
+    async def run(self, /) -> None:
+        """|coro|
+
+        Connects this shard and keeps it connected until it is closed.
+        """
+        resume = True
+        backoff = 1.0
+
+        while not self._closed:
+            try:
+                self._gateway = gateway = await self._connect(resume=resume)
+                gateway.guild_ids = self.guild_ids
+                gateway.latencies = self.latencies
+                self._ready.set()
+                backoff = 1.0
+
+                await gateway.run()
+
+            except Reconnect as exc:
+                resume = exc.resume
+                if not resume:
+                    # Discord asks to wait a bit before identifying again after an invalid session
+                    await asyncio.sleep(random.uniform(1, 5))
+
+            except (OSError, aiohttp.ClientError, asyncio.TimeoutError):
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, self.MAX_BACKOFF)
+
+            finally:
+                gateway, self._gateway = self._gateway, None
+                if gateway is not None:
+                    self._session_id = gateway.session_id
+                    self._sequence = gateway.sequence
+                    self._resume_url = gateway.resume_url
+
+                    if not gateway.closed:
+                        await gateway.close(code=4000)
+
+    async def close(self, /, *, resume: bool = False) -> None:
+        """|coro|
+
+        Disconnects this shard, ending its session unless ``resume`` is ``True``.
+        """
+        self._closed = True
+        if self._gateway is not None:
+            await self._gateway.close(code=4000 if resume else 1000)
+
+
+class ShardManager:
+    """
+    Runs a set of shards in this process, all dispatching into one :class:`~.EventEmitter`.
+
+    Shards are started concurrently, with their identifies scheduled by an
+    :class:`IdentifyScheduler` according to ``max_concurrency``, so that a bot with 64 shards
+    and a ``max_concurrency`` of 16 is connected after 4 rounds rather than 64.
+
+    Parameters
+    ----------
+    connection: :class:`~.Connection`
+        The connection to run shards for. HTTP must already be established.
+    shard_ids: Optional[Iterable[int]]
+        The IDs of the shards to run. Defaults to all of them.
+    shard_count: Optional[int]
+        The total amount of shards. Defaults to the amount Discord recommends.
+    scheduler: Optional[:class:`IdentifyScheduler`]
+        Schedules identifies. Defaults to one created from the session start limit reported by Discord.
+        Pass one to share it with other shard managers using the same token.
+    session_store: Optional[:class:`~.SessionStore`]
+        Persists sessions so that shards resume them after a restart. When given, closing the
+        manager leaves sessions resumable rather than ending them.
+    recorder: Optional[:class:`~.FrameRecorder`]
+        Records the frames every shard receives, to replay them later. It is closed along with the manager.
+    """
+
+    # How often sessions are saved to the session store, in seconds.
+    SESSION_SAVE_INTERVAL: float = 5.0
+
+    def __init__(
+        self,
+        connection: Connection,
+        /,
+        *,
+        shard_ids: Optional[Iterable[int]] = None,
+        shard_count: Optional[int] = None,
+        scheduler: Optional[IdentifyScheduler] = None,
+        session_store: Optional[SessionStore] = None,
+        emitter: Optional[EventEmitter] = None,
+        intents: Optional[int] = None,
+        v: int = 9,
+        encoding: GatewayEncoding = 'etf',
+        compression: Optional[GatewayCompression] = 'zlib-stream',
+        offload_threshold: Optional[int] = None,
+        executor: Optional[Executor] = None,
+        heartbeat_timeout: Optional[float] = None,
+        recorder: Optional[FrameRecorder] = None
+    ) -> None:
+        self.connection: Connection = connection
+        self.emitter: EventEmitter = emitter or EventEmitter(connection)
+        self.scheduler: Optional[IdentifyScheduler] = scheduler
+        self.session_store: Optional[SessionStore] = session_store
+        self.recorder: Optional[FrameRecorder] = recorder
+        self.shard_count: Optional[int] = shard_count
+        self.url: Optional[str] = None
+
+        self._shard_ids: Optional[List[int]] = None if shard_ids is None else sorted(shard_ids)
+        self._shards: Dict[int, Shard] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._persist_task: Optional[asyncio.Task] = None
+        self._closed: bool = False
+        self._gateway_options = dict(
+            intents=intents,
+            v=v,
+            encoding=encoding,
+            compression=compression,
+            offload_threshold=offload_threshold,
+            executor=executor,
+            heartbeat_timeout=heartbeat_timeout,
+            recorder=recorder,
+        )
+
+    def __repr__(self, /) -> str:
+        return f'<ShardManager shard_count={self.shard_count} shards={len(self._shards)}>'
+
+    @property
+    def shards(self, /) -> Dict[int, Shard]:
+        """Dict[int, :class:`Shard`]: The shards run by this manager, by ID."""
+        return self._shards
+
+    @property
+    def guild_count(self, /) -> int:
+        """int: The amount of guilds on the shards run by this manager."""
+        return sum(len(shard.guild_ids) for shard in self._shards.values())
+
+    def get_shard(self, guild_id: int, /) -> Optional[Shard]:
+        """Returns the shard which receives events of the given guild, if it's run by this manager.
+
+        This is always ``None`` until the shard count is known, i.e. before :meth:`start` if it wasn't given.
+        """
+        if self.shard_count is None:
+            return None
+
+        return self._shards.get((guild_id >> 22) % self.shard_count)
+
+    async def start(self, /) -> None:
+        """|coro|
+
+        Fetches the gateway URL and starts every shard, returning once all of them are connected.
+        """
+        info = await self.connection.get_gateway_bot()
+        self.url = info.url
+
+        if self.shard_count is None:
+            self.shard_count = info.shards
+
+        if self.scheduler is None:
+            self.scheduler = IdentifyScheduler.from_session_start_limit(info.session_start_limit)
+
+        shard_ids = self._shard_ids
+        if shard_ids is None:
+            shard_ids = range(self.shard_count)
+
+        loop = asyncio.get_running_loop()
+        store = self.session_store
+
+        for shard_id in shard_ids:
+            shard = self._shards[shard_id] = Shard(self, shard_id)
+
+            state = store and store.load(shard_id)
+            if state is not None and state.shard_count == self.shard_count:
+                shard._restore(state)
+
+            self._tasks.append(loop.create_task(shard.run()))
+
+        if store is not None:
+            self._persist_task = loop.create_task(self._persist_sessions())
+
+        connected = asyncio.gather(
+            *(shard.wait_until_connected() for shard in self._shards.values()),
+            return_exceptions=True,
+        )
+        try:
+            # A shard stopping early means something like an invalid token, don't wait forever on it
+            await asyncio.wait([connected, *self._tasks], return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            # A cancelled gather finishes with a CancelledError which is logged unless it is retrieved
+            connected.cancel()
+            with suppress(asyncio.CancelledError):
+                await connected
+
+        for task in self._tasks:
+            if task.done() and not task.cancelled() and task.exception() is not None:
+                raise task.exception()
+
+    async def run(self, /) -> None:
+        """|coro|
+
+        Starts every shard, then runs them until they are closed.
+
+        Raises
+        ------
+        ConnectionClosed
+            A shard was closed by Discord for a reason reconnecting wouldn't fix.
+        """
+        await self.start()
+
+        try:
+            await asyncio.gather(*self._tasks)
+        except asyncio.CancelledError:
+            if not self._closed:
+                raise
+
+    def save_sessions(self, /) -> None:
+        """Saves the session of every shard to the session store, if there is one."""
+        if self.session_store is not None:
+            self.session_store.save_many({shard_id: shard.session for shard_id, shard in self._shards.items()})
+
+    async def _persist_sessions(self, /) -> None:
+        while True:
+            await asyncio.sleep(self.SESSION_SAVE_INTERVAL)
+            self.save_sessions()
+
+    async def close(self, /) -> None:
+        """|coro|
+
+        Disconnects every shard. If there is a session store, sessions are saved and left resumable.
+        """
+        self._closed = True
+        resume = self.session_store is not None
+
+        if self._persist_task is not None:
+            self._persist_task.cancel()
+            self._persist_task = None
+
+        await asyncio.gather(
+            *(shard.close(resume=resume) for shard in self._shards.values()),
+            return_exceptions=True,
+        )
+
+        for task in self._tasks:
+            task.cancel()
+
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+        if resume:
+            self.save_sessions()
+            self.session_store.close()
+
+        if self.recorder is not None:
+            self.recorder.close()
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import time
+
+from contextlib import contextmanager
+from hashlib import blake2b
+from typing import Iterator, Optional, Tuple
+
+from .ratelimits import BucketState, GlobalState, RatelimitBackend
+
+
+__all__ = (
+    'SharedMemoryBackend',
+)
+
+
+_HEADER = struct.Struct('<8sI4x')
+_GLOBAL = struct.Struct('<dddd')  # tokens, last, blocked_until, blocked_for
+_BLOCKED = struct.Struct('<dd')  # blocked_until, blocked_for
+_SLOT = struct.Struct('<QiidddB7x')  # key hash, limit, remaining, reset_at, window, claimed_at, unlimited
+
+_MAGIC = b'WUMPRL02'
+_BLOCKED_OFFSET = _HEADER.size + 16
+_SLOTS_OFFSET = _HEADER.size + _GLOBAL.size
+
+
+def _local_deadline(reset_at: float, window: float, /) -> float:
+    # Reset times are shared by the wall clock, since monotonic clocks can't be compared between processes.
+    # Converting one to this process' monotonic clock as soon as it is seen means later clock jumps can't move it,
+    # and a wall clock that is off can't make it wait longer than the window Discord reported.
+    return time.monotonic() + min(max(reset_at - time.time(), 0.0), window)
+
+
+class _SharedBucketState(BucketState):
+    __slots__ = ('_backend', '_hash', '_offset', '_reset_at', '_deadline')
+
+    def __init__(self, backend: SharedMemoryBackend, key: str, /) -> None:
+        self._backend: SharedMemoryBackend = backend
+        self._hash: int = int.from_bytes(blake2b(key.encode(), digest_size=8).digest(), 'little') | 1
+        self._offset: int = -1
+
+        # The last reset time read from the table, and when it is by time.monotonic()
+        self._reset_at: float = 0.0
+        self._deadline: float = 0.0
+
+    def _read(self, /) -> Tuple[int, int, float, float, bool]:
+        record = self._backend._find(self._hash, self._offset)
+        self._offset, limit, remaining, reset_at, window, claimed_at, unlimited = record
+
+        if remaining <= 0 and not reset_at:
+            # Whoever was discovering this bucket never came back, e.g. their process died.
+            # A claim from the future means the clock was turned back, which could otherwise stall it for as long.
+            elapsed = time.time() - claimed_at
+            if not 0 <= elapsed <= self._backend.DISCOVERY_TIMEOUT:
+                remaining = 1
+
+        return limit, remaining, reset_at, window, unlimited
+
+    def _write(self, limit: int, remaining: int, reset_at: float, window: float, unlimited: bool, /) -> None:
+        _SLOT.pack_into(
+            self._backend._map, self._offset, self._hash, limit, remaining, reset_at, window, time.time(), unlimited
+        )
+
+    def _deadline_of(self, reset_at: float, window: float, /) -> Optional[float]:
+        if not reset_at:
+            return None
+
+        if reset_at != self._reset_at:
+            self._reset_at = reset_at
+            self._deadline = _local_deadline(reset_at, window)
+
+        return self._deadline
+
+    def _start_window(self, limit: int, remaining: int, reset_after: float, unlimited: bool = False, /) -> None:
+        # Must be called while locked
+        reset_at = time.time() + reset_after
+        self._write(limit, remaining, reset_at, reset_after, unlimited)
+
+        self._reset_at = reset_at
+        self._deadline = time.monotonic() + reset_after
+
+    @property
+    def limit(self, /) -> Optional[int]:
+        with self._backend._locked():
+            limit = self._read()[0]
+
+        return None if limit < 0 else limit
+
+    @property
+    def remaining(self, /) -> int:
+        with self._backend._locked():
+            return self._read()[1]
+
+    @property
+    def unlimited(self, /) -> bool:
+        with self._backend._locked():
+            return self._read()[4]
+
+    @property
+    def reset_after(self, /) -> Optional[float]:
+        with self._backend._locked():
+            _, _, reset_at, window, _ = self._read()
+            deadline = self._deadline_of(reset_at, window)
+
+        return None if deadline is None else deadline - time.monotonic()
+
+    def delay(self, /) -> float:
+        with self._backend._locked():
+            _, remaining, reset_at, window, _ = self._read()
+            deadline = self._deadline_of(reset_at, window)
+
+        if remaining > 0 or deadline is None:
+            return 0.0
+
+        return max(deadline - time.monotonic(), 0.0)
+
+    def reserve(self, /) -> bool:
+        with self._backend._locked():
+            limit, remaining, reset_at, window, unlimited = self._read()
+            if unlimited:
+                return True
+
+            deadline = self._deadline_of(reset_at, window)
+            if deadline is not None and time.monotonic() >= deadline:
+                reset_at = window = 0.0
+                remaining = limit if limit > 0 else 1
+
+            if remaining <= 0:
+                return False
+
+            self._write(limit, remaining - 1, reset_at, window, unlimited)
+            return True
+
+    def refund(self, /) -> None:
+        with self._backend._locked():
+            limit, remaining, reset_at, window, unlimited = self._read()
+            if not unlimited:
+                self._write(limit, remaining + 1, reset_at, window, unlimited)
+
+    def update(self, /, *, limit: int, remaining: int, reset_after: float, pending: int = 1) -> None:
+        with self._backend._locked():
+            _, current, reset_at, window, _ = self._read()
+            deadline = self._deadline_of(reset_at, window)
+
+            if deadline is None or time.monotonic() >= deadline:
+                current = max(remaining - pending + 1, 0)
+            else:
+                current = min(current, remaining)
+
+            self._start_window(limit, current, reset_after)
+
+    def block(self, retry_after: float, /) -> None:
+        with self._backend._locked():
+            limit = self._read()[0]
+            self._start_window(limit, 0, retry_after)
+
+    def unlimit(self, /) -> None:
+        with self._backend._locked():
+            limit, remaining, reset_at, window, _ = self._read()
+            self._write(limit, remaining, reset_at, window, True)
+
+    def rediscover(self, /) -> bool:
+        # Another process may be discovering the limits, which is timed out by _read
+        return False
+
+
+class _SharedGlobalState(GlobalState):
+    __slots__ = ('_backend', '_blocked_until', '_deadline')
+
+    def __init__(self, backend: SharedMemoryBackend, rate: int, per: float, /) -> None:
+        self._backend: SharedMemoryBackend = backend
+        self.rate: int = rate
+        self.per: float = per
+
+        # The last block read from the table, and when it ends by time.monotonic()
+        self._blocked_until: float = 0.0
+        self._deadline: float = 0.0
+
+    def take(self, /) -> float:
+        backend = self._backend
+        now = time.time()
+
+        with backend._locked():
+            tokens, last, blocked_until, blocked_for = _GLOBAL.unpack_from(backend._map, _HEADER.size)
+            # The clock being turned back must not drain the bucket
+            tokens = min(tokens + max(now - last, 0.0) * self.rate / self.per, self.rate)
+
+            if tokens >= 1:
+                _GLOBAL.pack_into(backend._map, _HEADER.size, tokens - 1, now, blocked_until, blocked_for)
+                return 0.0
+
+            _GLOBAL.pack_into(backend._map, _HEADER.size, tokens, now, blocked_until, blocked_for)
+
+        return (1 - tokens) * self.per / self.rate
+
+    def blocked_for(self, /) -> float:
+        with self._backend._locked():
+            blocked_until, blocked_for = _BLOCKED.unpack_from(self._backend._map, _BLOCKED_OFFSET)
+
+        if not blocked_until:
+            return 0.0
+
+        if blocked_until != self._blocked_until:
+            self._blocked_until = blocked_until
+            self._deadline = _local_deadline(blocked_until, blocked_for)
+
+        return max(self._deadline - time.monotonic(), 0.0)
+
+    def block(self, retry_after: float, /) -> None:
+        backend = self._backend
+        now = time.time()
+
+        with backend._locked():
+            blocked_until, blocked_for = _BLOCKED.unpack_from(backend._map, _BLOCKED_OFFSET)
+            if now + retry_after <= blocked_until:
+                return
+
+            blocked_until = now + retry_after
+            _BLOCKED.pack_into(backend._map, _BLOCKED_OFFSET, blocked_until, retry_after)
+
+        self._blocked_until = blocked_until
+        self._deadline = time.monotonic() + retry_after
+
+
+class SharedMemoryBackend(RatelimitBackend):
+    """
+    A rate-limit backend that shares bucket and global rate-limit state between
+    every process on this host that opens the same file, e.g. several workers using one bot token.
+
+    State lives in a memory-mapped file and is guarded with ``flock``,
+    so no broker process or network service is needed. This is only available on Unix.
+
+    The table holds a fixed amount of buckets; when it is full, buckets whose window
+    has reset are overwritten first, which at worst costs an extra request to rediscover them.
+
+    Reset times have to be shared by the wall clock, but every process counts down from them
+    by its own monotonic clock and never waits longer than the window Discord reported,
+    so the clock being adjusted can't stall requests.
+
+    .. code:: python
+
+        backend = SharedMemoryBackend('/dev/shm/wumpus-ratelimits')
+        http = HTTPClient(token=token, ratelimit_backend=backend)
+
+    Parameters
+    ----------
+    path: str
+        The path of the file to share state through. It is created if it doesn't exist.
+    slots: int
+        The amount of buckets the table can hold. Every process must use the same value.
+    """
+
+    # How many slots are probed for a bucket before overwriting one.
+    PROBES: int = 8
+
+    # How long a bucket with unknown limits waits for its first response before
+    # another request is let through to discover them.
+    DISCOVERY_TIMEOUT: float = 10.0
+
+    def __init__(self, path: str, /, *, slots: int = 8192) -> None:
+        import fcntl  # Unix only
+
+        self._flock = fcntl.flock
+        self._lock_ex: int = fcntl.LOCK_EX
+        self._lock_un: int = fcntl.LOCK_UN
+
+        self.path: str = path
+        self.slots: int = slots
+
+        size = _SLOTS_OFFSET + _SLOT.size * slots
+        self._fd: int = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        self._flock(self._fd, self._lock_ex)
+        try:
+            if os.fstat(self._fd).st_size < size:
+                os.ftruncate(self._fd, size)
+
+            self._map: mmap.mmap = mmap.mmap(self._fd, size)
+
+            magic, existing = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC:
+                # A new file, or one laid out by another version, whose slots can't be read as ours
+                self._map[:] = bytes(size)
+                _HEADER.pack_into(self._map, 0, _MAGIC, slots)
+            elif existing != slots:
+                raise ValueError(f'{path!r} was created with {existing} slots, not {slots}')
+        finally:
+            self._flock(self._fd, self._lock_un)
+
+    def __repr__(self, /) -> str:
+        return f'<SharedMemoryBackend path={self.path!r} slots={self.slots}>'
+
+    @contextmanager
+    def _locked(self, /) -> Iterator[None]:
+        self._flock(self._fd, self._lock_ex)
+        try:
+            yield
+        finally:
+            self._flock(self._fd, self._lock_un)
+
+    def _find(self, key_hash: int, offset: int, /) -> Tuple[int, int, int, float, float, float, bool]:
+        # Must be called while locked. Returns the offset of the bucket's slot followed by its record,
+        # claiming a slot for it if it doesn't have one yet.
+        data = self._map
+
+        if offset >= 0:
+            found, *record = _SLOT.unpack_from(data, offset)
+            if found == key_hash:
+                return (offset, *record)
+
+        now = time.time()
+        start = key_hash % self.slots
+        candidate = None
+
+        for i in range(self.PROBES):
+            offset = _SLOTS_OFFSET + (start + i) % self.slots * _SLOT.size
+            found, limit, remaining, reset_at, window, claimed_at, unlimited = _SLOT.unpack_from(data, offset)
+
+            if found == key_hash:
+                return offset, limit, remaining, reset_at, window, claimed_at, unlimited
+
+            if candidate is None and (not found or not unlimited and 0 < reset_at <= now):
+                candidate = offset
+
+        if candidate is None:
+            candidate = _SLOTS_OFFSET + start * _SLOT.size
+
+        _SLOT.pack_into(data, candidate, key_hash, -1, 1, 0.0, 0.0, now, False)
+        return candidate, -1, 1, 0.0, 0.0, now, False
+
+    def get_bucket_state(self, key: str, /, previous: Optional[BucketState] = None) -> BucketState:
+        state = _SharedBucketState(self, key)
+        if previous is None:
+            return state
+
+        if isinstance(previous, _SharedBucketState):
+            # Other processes may still be waiting on the old key to be discovered,
+            # let one of them through so they can find out about the new key themselves.
+            previous.refund()
+
+        elif previous.limit is not None:
+            # Carry over what was learned about the bucket under its old key
+            with self._locked():
+                limit = state._read()[0]
+                reset_after = previous.reset_after
+
+                if limit < 0 and reset_after is not None:
+                    state._start_window(previous.limit, previous.remaining, max(reset_after, 0.0), previous.unlimited)
+
+        return state
+
+    def get_global_state(self, rate: int, per: float, /) -> GlobalState:
+        return _SharedGlobalState(self, rate, per)
+
+    def close(self, /) -> None:
+        if self._fd < 0:
+            return
+
+        self._map.close()
+        os.close(self._fd)
+        self._fd = -1
@@ -1,3 +1,5 @@
+from typing import Optional
+
 from aiohttp import ClientResponse
 from .typings import JSON
 
@@ -8,7 +10,11 @@ __all__ = (
     'Unauthorized',
     'NotFound',
     'Forbidden',
-    'InternalServerError'
+    'InternalServerError',
+    'RequestTimeout',
+    'ConnectionClosed',
+    'GatewayNotConnected',
+    'ClusterError'
 )
 
 
@@ -32,7 +38,7 @@ class HTTPError(WumpusError):
         _message = None
         if isinstance(json, dict):
             _message = json.get('message', None)
-            self.code = _message.get('code', 0)
+            self.code = json.get('code', 0)
 
         elif message is not None:
             _message = message
@@ -77,3 +83,45 @@ class InternalServerError(HTTPError):
     """
 
     # status: 500
+
+
+class RequestTimeout(WumpusError):
+    """
+    A request could not be completed before its deadline, including any retries.
+    """
+
+    def __init__(self, method: str, url: str, timeout: float, /) -> None:
+        self.method: str = method
+        self.url: str = url
+        self.timeout: float = timeout
+        super().__init__(f'{method} {url} did not complete within {timeout} seconds.')
+
+
+class ConnectionClosed(WumpusError):
+    """
+    The gateway closed the connection for a reason that reconnecting wouldn't fix,
+    e.g. an invalid token or disallowed intents.
+    """
+
+    def __init__(self, code: int, /, *, shard_id: Optional[int] = None) -> None:
+        self.code: int = code
+        self.shard_id: Optional[int] = shard_id
+        super().__init__(f'Shard {shard_id} was closed by the gateway with code {code}.')
+
+
+class GatewayNotConnected(WumpusError):
+    """
+    A payload couldn't be sent because its connection to the gateway was closed, usually to reconnect.
+    Unlike :class:`ConnectionClosed` this isn't fatal: the shard may connect again, after which sending works again.
+    """
+
+    def __init__(self, code: int, /, *, shard_id: Optional[int] = None) -> None:
+        self.code: int = code
+        self.shard_id: Optional[int] = shard_id
+        super().__init__(f'Shard {shard_id} is not connected to the gateway, its connection was closed with code {code}.')
+
+
+class ClusterError(WumpusError):
+    """
+    Something went wrong communicating with another cluster, e.g. it exited or its query handler raised.
+    """
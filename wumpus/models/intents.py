@@ -1,10 +1,60 @@
-from typing import Type, TypeVar
+from typing import Dict, Iterable, Type, TypeVar
 from .bitfield import Bitfield, bit, bit_alias
 
 
 T = TypeVar('T', bound='Intents')
 
 
+# The intents that make Discord send each dispatched event.
+# Events which are always sent, e.g. READY or INTERACTION_CREATE, are left out.
+EVENT_INTENTS: Dict[str, int] = {
+    'GUILD_CREATE': 1,
+    'GUILD_UPDATE': 1,
+    'GUILD_DELETE': 1,
+    'GUILD_ROLE_CREATE': 1,
+    'GUILD_ROLE_UPDATE': 1,
+    'GUILD_ROLE_DELETE': 1,
+    'CHANNEL_CREATE': 1,
+    'CHANNEL_UPDATE': 1,
+    'CHANNEL_DELETE': 1,
+    'CHANNEL_PINS_UPDATE': 1 | 4096,
+    'THREAD_CREATE': 1,
+    'THREAD_UPDATE': 1,
+    'THREAD_DELETE': 1,
+    'THREAD_LIST_SYNC': 1,
+    'THREAD_MEMBER_UPDATE': 1,
+    'THREAD_MEMBERS_UPDATE': 1 | 2,
+    'STAGE_INSTANCE_CREATE': 1,
+    'STAGE_INSTANCE_UPDATE': 1,
+    'STAGE_INSTANCE_DELETE': 1,
+    'GUILD_MEMBER_ADD': 2,
+    'GUILD_MEMBER_UPDATE': 2,
+    'GUILD_MEMBER_REMOVE': 2,
+    'GUILD_BAN_ADD': 4,
+    'GUILD_BAN_REMOVE': 4,
+    'GUILD_EMOJIS_UPDATE': 8,
+    'GUILD_STICKERS_UPDATE': 8,
+    'GUILD_INTEGRATIONS_UPDATE': 16,
+    'INTEGRATION_CREATE': 16,
+    'INTEGRATION_UPDATE': 16,
+    'INTEGRATION_DELETE': 16,
+    'WEBHOOKS_UPDATE': 32,
+    'INVITE_CREATE': 64,
+    'INVITE_DELETE': 64,
+    'VOICE_STATE_UPDATE': 128,
+    'PRESENCE_UPDATE': 256,
+    'MESSAGE_CREATE': 512 | 4096,
+    'MESSAGE_UPDATE': 512 | 4096,
+    'MESSAGE_DELETE': 512 | 4096,
+    'MESSAGE_DELETE_BULK': 512,
+    'MESSAGE_REACTION_ADD': 1024 | 8192,
+    'MESSAGE_REACTION_REMOVE': 1024 | 8192,
+    'MESSAGE_REACTION_REMOVE_ALL': 1024 | 8192,
+    'MESSAGE_REACTION_REMOVE_EMOJI': 1024 | 8192,
+    'TYPING_START': 2048 | 16384,
+}
+
+
 class Intents(Bitfield):
     def __init__(self, value: int = 0, /, **kwargs):
         super().__init__(value | self._calculate(**kwargs))
@@ -89,6 +139,22 @@ class Intents(Bitfield):
     def all(cls: Type[T], /) -> T:
         return cls(cls.__max_value__)
 
+    @classmethod
+    def from_events(cls: Type[T], events: Iterable[str], /) -> T:
+        """Creates the smallest :class:`Intents` which receive the given dispatch events, e.g. ``'MESSAGE_CREATE'``.
+
+        The ``guilds`` intent is always included, since shards rely on ``GUILD_CREATE``
+        to know which guilds they are in.
+
+        Only events are taken into account. The library has no caches fed by the gateway to configure,
+        so anything that should be kept up to date has to be listened to, which adds its events here.
+        """
+        value = 1
+        for event in events:
+            value |= EVENT_INTENTS.get(event.upper(), 0)
+
+        return cls(value)
+
     @classmethod
     def default(cls: Type[T], /) -> T:
         self = cls.all()
@@ -0,0 +1,3 @@
+from .recorder import FrameKind, RecordedFrame, FrameRecorder, read_frames
+from .replay import FakeWebSocket, LatencyStats, ReplayReport, replay
+from .server import FakeDiscord
@@ -0,0 +1,18 @@
+import argparse
+import asyncio
+
+from .replay import replay
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Replays a gateway recording and reports how fast it was handled.')
+    parser.add_argument('path', help='the recording to replay')
+    parser.add_argument('--realtime', action='store_true', help='replay at the pace the frames were recorded at')
+    args = parser.parse_args()
+
+    report = asyncio.run(replay(args.path, realtime=args.realtime))
+    print(report.format())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import struct
+import time
+
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional, Union, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..core.gateway import Gateway
+
+
+__all__ = (
+    'FrameKind',
+    'RecordedFrame',
+    'FrameRecorder',
+    'read_frames',
+)
+
+
+_MAGIC = b'WMPF\x01'
+_HEADER = struct.Struct('>BdI')  # Kind, seconds since the recording started, size
+
+
+class FrameKind:
+    connect = 0  # A new connection; the data is a JSON object of its encoding and compression
+    text = 1
+    binary = 2
+
+
+class RecordedFrame(NamedTuple):
+    kind: int
+    time: float
+    data: Union[str, bytes]
+
+
+class FrameRecorder:
+    """
+    Records the raw frames received from the gateway to disk, before they are inflated or decoded,
+    so that they can be replayed later with :func:`~.replay`.
+
+    Every shard is recorded to its own file in ``directory``, named ``shard-<id>.frames``.
+    Each connection of a shard starts with a marker holding its encoding and compression,
+    since transport compression contexts don't carry over between connections.
+
+    Frames are written through a buffered file, so recording costs a copy per frame.
+    Pass a recorder to :class:`~.Client` (``gateway_recorder``), :class:`~.ShardManager` or :class:`~.Gateway`.
+
+    Parameters
+    ----------
+    directory: str
+        The directory to write recordings to. It is created if it doesn't exist.
+    """
+
+    __slots__ = ('directory', '_files', '_gateways', '_started')
+
+    def __init__(self, directory: str, /) -> None:
+        self.directory: str = directory
+        self._files: Dict[Optional[int], BinaryIO] = {}
+        self._gateways: Dict[Optional[int], int] = {}  # The ID of the gateway last recorded, by shard
+        self._started: float = time.monotonic()
+
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self, /) -> str:
+        return f'<FrameRecorder directory={self.directory!r} shards={len(self._files)}>'
+
+    def path_of(self, shard_id: Optional[int], /) -> str:
+        """Returns the path the frames of a shard are recorded to."""
+        return os.path.join(self.directory, 'gateway.frames' if shard_id is None else f'shard-{shard_id}.frames')
+
+    def _file(self, shard_id: Optional[int], /) -> BinaryIO:
+        try:
+            return self._files[shard_id]
+        except KeyError:
+            fp = self._files[shard_id] = open(self.path_of(shard_id), 'wb')
+            fp.write(_MAGIC)
+            return fp
+
+    def _write(self, fp: BinaryIO, kind: int, data: bytes, /) -> None:
+        fp.write(_HEADER.pack(kind, time.monotonic() - self._started, len(data)))
+        fp.write(data)
+
+    def record(self, gateway: Gateway, data: Union[str, bytes], /) -> None:
+        """Records a frame received by ``gateway``."""
+        shard_id = gateway.shard_id
+        fp = self._file(shard_id)
+
+        if self._gateways.get(shard_id) != id(gateway):
+            self._gateways[shard_id] = id(gateway)
+            connect = {'encoding': gateway.encoding, 'compression': gateway.compression}
+            self._write(fp, FrameKind.connect, json.dumps(connect).encode())
+
+        if type(data) is str:
+            self._write(fp, FrameKind.text, data.encode())
+        else:
+            self._write(fp, FrameKind.binary, data)
+
+    def flush(self, /) -> None:
+        """Writes buffered frames to disk."""
+        for fp in self._files.values():
+            fp.flush()
+
+    def close(self, /) -> None:
+        """Flushes and closes every recording."""
+        for fp in self._files.values():
+            fp.close()
+
+        self._files.clear()
+        self._gateways.clear()
+
+
+def read_frames(path: str, /) -> Iterator[RecordedFrame]:
+    """Reads the frames of a recording made by :class:`FrameRecorder`, in order.
+
+    Text frames are returned as strings. Connect markers are returned with their data still as JSON bytes.
+    """
+    with open(path, 'rb') as fp:
+        if fp.read(len(_MAGIC)) != _MAGIC:
+            raise ValueError(f'{path!r} is not a frame recording')
+
+        while True:
+            header = fp.read(_HEADER.size)
+            if len(header) < _HEADER.size:
+                return  # A recording cut off mid-frame, e.g. by a crash, is read up to there
+
+            kind, timestamp, size = _HEADER.unpack(header)
+            data = fp.read(size)
+            if len(data) < size:
+                return
+
+            yield RecordedFrame(kind, timestamp, data.decode() if kind == FrameKind.text else data)
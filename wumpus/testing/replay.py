@@ -0,0 +1,342 @@
+"""
+Replays a gateway recording made by :class:`~.FrameRecorder` through the gateway pipeline:
+inflating, decoding, the event emitter and whatever listeners are registered.
+
+    python -m wumpus.testing shard-0.frames [--realtime]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+import time
+
+from collections import defaultdict
+from concurrent.futures import Executor
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union, TYPE_CHECKING
+
+import aiohttp
+
+from ..core.connection import Connection
+from ..core.enums import OpCode
+from ..core.events import EventEmitter
+from ..core.gateway import Gateway, Reconnect
+from .recorder import FrameKind, RecordedFrame, read_frames
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+if TYPE_CHECKING:
+    from ..core.client import Client
+
+
+__all__ = (
+    'FakeWebSocket',
+    'LatencyStats',
+    'ReplayReport',
+    'replay',
+)
+
+
+class FakeWebSocket:
+    """
+    Stands in for :class:`aiohttp.ClientWebSocketResponse`, receiving recorded frames instead of ones from Discord.
+
+    Frames are returned as fast as they are read, or at the pace they were recorded at with ``realtime``.
+    Once they run out, the websocket is closed. Whatever is sent is kept in :attr:`sent`.
+
+    Parameters
+    ----------
+    frames: List[:class:`~.RecordedFrame`]
+        The frames to receive.
+    realtime: bool
+        Whether to wait between frames as long as was recorded.
+    """
+
+    __slots__ = ('realtime', 'sent', 'close_code', 'received_at', '_frames', '_index', '_started')
+
+    def __init__(self, frames: List[RecordedFrame], /, *, realtime: bool = False) -> None:
+        self.realtime: bool = realtime
+        self.sent: List[Union[str, bytes]] = []
+        self.close_code: Optional[int] = None
+        self.received_at: float = 0.0  # When the last frame was returned, by perf_counter
+
+        self._frames: List[RecordedFrame] = frames
+        self._index: int = 0
+        self._started: Optional[float] = None
+
+    def __repr__(self, /) -> str:
+        return f'<FakeWebSocket frames={len(self._frames)} received={self._index} closed={self.closed}>'
+
+    @property
+    def closed(self, /) -> bool:
+        return self.close_code is not None
+
+    async def receive(self, /) -> aiohttp.WSMessage:
+        if self._index >= len(self._frames) or self.closed:
+            if self.close_code is None:
+                self.close_code = 1000
+
+            return aiohttp.WSMessage(aiohttp.WSMsgType.CLOSED, None, None)
+
+        frame = self._frames[self._index]
+        self._index += 1
+
+        if self.realtime:
+            if self._started is None:
+                self._started = time.monotonic() - frame.time
+
+            await asyncio.sleep(self._started + frame.time - time.monotonic())
+        else:
+            # A real socket read yields to the loop, which lets listener tasks run in between frames
+            await asyncio.sleep(0)
+
+        self.received_at = time.perf_counter()
+        kind = aiohttp.WSMsgType.TEXT if frame.kind == FrameKind.text else aiohttp.WSMsgType.BINARY
+        return aiohttp.WSMessage(kind, frame.data, None)
+
+    async def send_str(self, data: str, /) -> None:
+        self.sent.append(data)
+
+    async def send_bytes(self, data: bytes, /) -> None:
+        self.sent.append(data)
+
+    async def close(self, /, *, code: int = 1000) -> bool:
+        if self.closed:
+            return False
+
+        self.close_code = code
+        return True
+
+
+class LatencyStats(NamedTuple):
+    count: int
+    mean: float
+    p50: float
+    p99: float
+    max: float
+
+
+class ReplayReport:
+    """
+    What replaying a recording measured.
+
+    Latencies are the time between a frame being received and the gateway being done with it,
+    which includes inflating, decoding, the emitter's handler and submitting the event to listeners.
+    Events split over several frames are counted once, with the time spent on every frame.
+
+    Attributes
+    ----------
+    events: int
+        The amount of gateway payloads replayed.
+    frames: int
+        The amount of websocket frames replayed.
+    size: int
+        The amount of bytes received.
+    elapsed: float
+        How long the replay took, in seconds.
+    latencies: Dict[str, :class:`LatencyStats`]
+        The latency of every event type, by its name. Other opcodes are by their lowercase name, e.g. ``heartbeat_ack``.
+    peak_rss: Optional[int]
+        The peak resident set size of the process by the end of the replay in bytes, where it is known.
+    """
+
+    __slots__ = ('events', 'frames', 'size', 'elapsed', 'latencies', 'peak_rss')
+
+    def __init__(
+        self,
+        *,
+        events: int,
+        frames: int,
+        size: int,
+        elapsed: float,
+        latencies: Dict[str, LatencyStats],
+        peak_rss: Optional[int]
+    ) -> None:
+        self.events: int = events
+        self.frames: int = frames
+        self.size: int = size
+        self.elapsed: float = elapsed
+        self.latencies: Dict[str, LatencyStats] = latencies
+        self.peak_rss: Optional[int] = peak_rss
+
+    def __repr__(self, /) -> str:
+        return f'<ReplayReport events={self.events} events_per_second={self.events_per_second:.0f}>'
+
+    @property
+    def events_per_second(self, /) -> float:
+        """float: The amount of events replayed per second."""
+        return self.events / self.elapsed if self.elapsed else 0.0
+
+    def format(self, /) -> str:
+        """Formats this report as a table, with latencies in microseconds."""
+        lines = [
+            f'{self.events} events in {self.frames} frames ({self.size} bytes), {self.elapsed:.2f}s: '
+            f'{self.events_per_second:.0f} events/s',
+        ]
+
+        if self.peak_rss is not None:
+            lines.append(f'peak RSS: {self.peak_rss / 1024 / 1024:.1f} MiB')
+
+        lines.append(f'{"event":<32} {"count":>8} {"mean":>9} {"p50":>9} {"p99":>9} {"max":>9}')
+        for name, stats in sorted(self.latencies.items(), key=lambda item: -item[1].count):
+            lines.append(
+                f'{name:<32} {stats.count:>8} {stats.mean * 1e6:>9.1f} {stats.p50 * 1e6:>9.1f} '
+                f'{stats.p99 * 1e6:>9.1f} {stats.max * 1e6:>9.1f}'
+            )
+
+        return '\n'.join(lines)
+
+
+class _WantsEverything(EventEmitter):
+    # Used without a client, so that every event goes through the whole pipeline instead of being skipped
+    def wants(self, event: str, /) -> bool:
+        return True
+
+
+def _peak_rss() -> Optional[int]:
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024  # Kilobytes everywhere else
+
+
+def _stats(samples: List[float], /) -> LatencyStats:
+    samples.sort()
+    last = len(samples) - 1
+    return LatencyStats(
+        count=len(samples),
+        mean=sum(samples) / len(samples),
+        p50=samples[last // 2],
+        p99=samples[last * 99 // 100],
+        max=samples[last],
+    )
+
+
+def _connections(frames: List[RecordedFrame], /) -> List[Tuple[dict, List[RecordedFrame]]]:
+    connections = []
+    for frame in frames:
+        if frame.kind == FrameKind.connect:
+            connections.append((json.loads(frame.data), []))
+        elif connections:
+            connections[-1][1].append(frame)
+
+    return connections
+
+
+async def _label(options: dict, frames: List[RecordedFrame], /) -> List[Optional[str]]:
+    # Names the event every frame completes ahead of time, so that the replay itself doesn't have to decode anything twice.
+    # Frames which only hold part of a payload are named None.
+    gateway = Gateway(None, **options)
+    labels = []
+
+    for frame in frames:
+        data = frame.data
+        if type(data) is bytes:
+            data = await gateway._inflate(data)
+            if data is None:
+                labels.append(None)
+                continue
+
+        message = await gateway._decode(data)
+        op = message.get('op')
+        labels.append(message.get('t') if op == OpCode.dispatch.value else OpCode(op).name)
+
+    return labels
+
+
+async def replay(
+    path: str,
+    /,
+    *,
+    client: Optional[Client] = None,
+    emitter: Optional[EventEmitter] = None,
+    realtime: bool = False,
+    offload_threshold: Optional[int] = None,
+    executor: Optional[Executor] = None
+) -> ReplayReport:
+    """|coro|
+
+    Replays a recording made by :class:`~.FrameRecorder` through a :class:`~.Gateway` connected to a
+    :class:`FakeWebSocket`, and measures how fast it was handled. Nothing is sent to Discord.
+
+    Parameters
+    ----------
+    path: str
+        The path of the recording, e.g. ``recordings/shard-0.frames``.
+    client: Optional[:class:`~.Client`]
+        A client whose listeners to call, as if it was connected. It doesn't have to be logged in.
+    emitter: Optional[:class:`~.EventEmitter`]
+        The emitter to handle events with instead. Defaults to one which decodes every event,
+        so that nothing is skipped unparsed.
+    realtime: bool
+        Whether to replay frames at the pace they were recorded at, rather than as fast as possible.
+    offload_threshold: Optional[int]
+        Passed to the gateway, see :class:`~.Gateway`.
+    executor: Optional[Executor]
+        Passed to the gateway, see :class:`~.Gateway`.
+
+    Returns
+    -------
+    :class:`ReplayReport`
+    """
+    connections = _connections(list(read_frames(path)))
+
+    if emitter is None:
+        if client is not None:
+            client._establish_connection()
+            emitter = EventEmitter(client._connection, listeners=client, executor=client._listener_executor)
+        else:
+            emitter = _WantsEverything(Connection(asyncio.get_running_loop()))
+
+    labelled = [(options, frames, await _label(options, frames)) for options, frames in connections]
+
+    samples: Dict[str, List[float]] = defaultdict(list)
+    events = size = count = 0
+    start = time.perf_counter()
+
+    for options, frames, labels in labelled:
+        ws = FakeWebSocket(frames, realtime=realtime)
+        gateway = Gateway(
+            ws,
+            emitter=emitter,
+            offload_threshold=offload_threshold,
+            executor=executor,
+            **options,
+        )
+
+        partial = 0.0
+        try:
+            for frame, label in zip(frames, labels):
+                try:
+                    await gateway.receive_events()
+                finally:
+                    # Time spent on the frame counts even if it made the gateway reconnect
+                    partial += time.perf_counter() - ws.received_at
+                    count += 1
+                    size += len(frame.data)
+
+                if label is not None:
+                    samples[label].append(partial)
+                    events += 1
+                    partial = 0.0
+
+        except Reconnect:
+            pass  # The rest of the recording is of the next connection
+        finally:
+            await gateway.close()
+
+    elapsed = time.perf_counter() - start
+
+    return ReplayReport(
+        events=events,
+        frames=count,
+        size=size,
+        elapsed=elapsed,
+        latencies={name: _stats(values) for name, values in samples.items()},
+        peak_rss=_peak_rss(),
+    )
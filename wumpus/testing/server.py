@@ -0,0 +1,652 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import time
+import zlib
+
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterator, List, Optional, Tuple, Union
+
+import earl
+
+from aiohttp import WSMsgType, web
+
+from ..core.compression import zstandard
+from ..core.enums import OpCode
+from ..typings import JSON
+
+
+__all__ = (
+    'FakeDiscord',
+)
+
+
+_Handler = Callable[[web.Request], Awaitable[web.StreamResponse]]
+
+
+def _error(status: int, message: str, code: int = 0, /) -> web.Response:
+    return web.json_response({'message': message, 'code': code}, status=status)
+
+
+class _Bucket:
+    __slots__ = ('remaining', 'reset_at')
+
+    def __init__(self, remaining: int, reset_at: float, /) -> None:
+        self.remaining: int = remaining
+        self.reset_at: float = reset_at
+
+
+class _GatewayConnection:
+    # A websocket connected to the fake gateway
+    __slots__ = ('ws', 'encoding', 'shard_id', 'session_id', 'sequence', '_compress', '_lock')
+
+    def __init__(self, ws: web.WebSocketResponse, encoding: str, compression: Optional[str], /) -> None:
+        self.ws: web.WebSocketResponse = ws
+        self.encoding: str = encoding
+        self.shard_id: Optional[int] = None
+        self.session_id: Optional[str] = None
+        self.sequence: int = 0
+        self._lock: asyncio.Lock = asyncio.Lock()
+
+        self._compress: Optional[Callable[[bytes], bytes]] = None
+        if compression == 'zlib-stream':
+            deflater = zlib.compressobj()
+            self._compress = lambda data: deflater.compress(data) + deflater.flush(zlib.Z_SYNC_FLUSH)
+        elif compression == 'zstd-stream':
+            compressor = zstandard.ZstdCompressor().compressobj()
+            self._compress = lambda data: compressor.compress(data) + compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def decode(self, data: Union[str, bytes], /) -> JSON:
+        if self.encoding == 'etf':
+            return earl.unpack(data, encoding='utf-8', encode_binary_ext=True)
+
+        return json.loads(data)
+
+    async def send(self, op: OpCode, data: JSON = None, /, *, event: Optional[str] = None) -> None:
+        async with self._lock:
+            # Held while encoding, so that compressed payloads are sent in the order they were compressed
+            payload = {'op': op.value, 'd': data, 's': None, 't': event}
+            if op is OpCode.dispatch:
+                self.sequence += 1
+                payload['s'] = self.sequence
+
+            encoded = earl.pack(payload) if self.encoding == 'etf' else json.dumps(payload)
+            if self.ws.closed:
+                return
+
+            if self._compress is not None:
+                if type(encoded) is str:
+                    encoded = encoded.encode()
+                await self.ws.send_bytes(self._compress(encoded))
+            elif type(encoded) is str:
+                await self.ws.send_str(encoded)
+            else:
+                await self.ws.send_bytes(encoded)
+
+
+class FakeDiscord:
+    """
+    A local server implementing enough of Discord's API and gateway to run a :class:`~.Client` end to end,
+    e.g. to load test rate-limit handling, reconnects and shard startup in CI.
+
+    It serves ``/gateway/bot``, the gateway itself (Hello, Identify, Resume, heartbeats and dispatches,
+    in every encoding and compression) and common REST routes: the current user, users, guilds, members,
+    channels and messages. Creating a message dispatches ``MESSAGE_CREATE`` to the shard of its guild.
+
+    Every REST route has a bucket of ``bucket_limit`` requests per ``bucket_reset`` seconds per major parameter,
+    on top of a global limit of ``global_limit`` requests per second. Responses carry the same rate-limit headers as
+    Discord's, and 429s are returned once a limit is exceeded. ``ratelimit_chance`` additionally returns 429s
+    at random, like Discord does for shared resources, and ``latency`` delays every response and heartbeat ack.
+    These are plain attributes, so they can be changed while the server runs.
+
+    Connect a client to it with ``http_base_url``::
+
+        async with FakeDiscord(shards=4) as discord:
+            client = Client(http_base_url=discord.api_url)
+            await client.start(FakeDiscord.TOKEN)
+
+    Parameters
+    ----------
+    host: str
+        The host to listen on.
+    port: int
+        The port to listen on. ``0`` picks a free one, see :attr:`port`.
+    v: int
+        The API version to serve.
+    shards: int
+        The amount of shards ``/gateway/bot`` recommends.
+    max_concurrency: int
+        The amount of identify buckets. Identifying twice in a bucket within ``identify_interval``
+        seconds invalidates the session, like Discord does.
+    identify_interval: float
+        The amount of seconds between identifies of the same bucket.
+    guilds: int
+        The amount of guilds the bot is in. Each has a single text channel.
+    heartbeat_interval: float
+        The heartbeat interval sent in Hello, in seconds.
+    bucket_limit: int
+        The amount of requests every bucket allows per ``bucket_reset`` seconds.
+    bucket_reset: float
+        The amount of seconds until an exhausted bucket resets.
+    global_limit: int
+        The amount of requests allowed per second across every route.
+    ratelimit_chance: float
+        The chance of a request being answered with a 429 although no limit was exceeded, from ``0`` to ``1``.
+    latency: float
+        The amount of seconds every response and heartbeat ack is delayed by.
+    jitter: float
+        Up to this many seconds are randomly added to ``latency``.
+    token: str
+        The token clients have to authenticate with.
+    """
+
+    TOKEN: str = 'MTAwMDAwMDAwMDAwMDAwMDAw.YAAAAA.fake-token-for-local-tests0'
+
+    IDENTIFY_INTERVAL: float = 5.0
+
+    def __init__(
+        self,
+        /,
+        *,
+        host: str = '127.0.0.1',
+        port: int = 0,
+        v: int = 9,
+        shards: int = 1,
+        max_concurrency: int = 1,
+        identify_interval: float = IDENTIFY_INTERVAL,
+        guilds: int = 10,
+        heartbeat_interval: float = 41.25,
+        bucket_limit: int = 5,
+        bucket_reset: float = 1.0,
+        global_limit: int = 50,
+        ratelimit_chance: float = 0.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        token: str = TOKEN
+    ) -> None:
+        self.host: str = host
+        self.port: int = port
+        self.v: int = v
+        self.shards: int = shards
+        self.max_concurrency: int = max_concurrency
+        self.identify_interval: float = identify_interval
+        self.heartbeat_interval: float = heartbeat_interval
+        self.bucket_limit: int = bucket_limit
+        self.bucket_reset: float = bucket_reset
+        self.global_limit: int = global_limit
+        self.ratelimit_chance: float = ratelimit_chance
+        self.latency: float = latency
+        self.jitter: float = jitter
+        self.token: str = token
+
+        # What happened, for tests to assert on
+        self.requests: int = 0
+        self.ratelimited: int = 0  # 429s returned, injected ones included
+        self.identifies: List[Tuple[float, int]] = []  # When every shard identified, by the monotonic clock
+        self.resumes: List[Tuple[str, int]] = []  # The session ID and sequence of every resume
+
+        self._ids: Iterator[int] = itertools.count(1 << 32)
+        self._user: JSON = self._make_user(next(self._ids), bot=True)
+        self._guilds: Dict[int, JSON] = {}
+        self._channels: Dict[int, int] = {}  # Channel ID -> guild ID
+        self._messages: Dict[int, Deque[JSON]] = {}
+
+        for i in range(guilds):
+            guild_id = (i + 1) << 22  # Spread over shards like real guilds: (guild_id >> 22) % shards
+            self._guilds[guild_id] = self._make_guild(guild_id)
+            self._channels[guild_id + 1] = guild_id
+            self._messages[guild_id + 1] = deque(maxlen=100)
+
+        self._buckets: Dict[Tuple[str, str], _Bucket] = {}
+        self._global: Deque[float] = deque()
+        self._connections: List[_GatewayConnection] = []
+        self._sessions: Dict[str, int] = {}  # Session ID -> shard ID
+        self._last_identify: Dict[int, float] = {}  # By identify bucket
+        self._session_starts: int = 1000
+        self._runner: Optional[web.AppRunner] = None
+
+    def __repr__(self, /) -> str:
+        return f'<FakeDiscord url={self.url!r} connections={len(self._connections)}>'
+
+    async def __aenter__(self) -> FakeDiscord:
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+
+    @property
+    def url(self, /) -> str:
+        """str: The URL the server is at."""
+        return f'http://{self.host}:{self.port}'
+
+    @property
+    def api_url(self, /) -> str:
+        """str: The URL of the API, to pass as ``http_base_url``."""
+        return f'{self.url}/api/v{self.v}'
+
+    @property
+    def gateway_url(self, /) -> str:
+        """str: The URL of the gateway."""
+        return f'ws://{self.host}:{self.port}/gateway'
+
+    @property
+    def guild_ids(self, /) -> List[int]:
+        """List[int]: The IDs of the guilds the bot is in."""
+        return list(self._guilds)
+
+    # Models
+
+    def _make_user(self, user_id: int, /, *, bot: bool = False) -> JSON:
+        return {
+            'id': str(user_id),
+            'username': f'user{user_id % 10000}',
+            'discriminator': f'{user_id % 10000:04}',
+            'avatar': hashlib.md5(str(user_id).encode()).hexdigest(),
+            'bot': bot,
+            'public_flags': 0,
+        }
+
+    def _make_guild(self, guild_id: int, /) -> JSON:
+        return {
+            'id': str(guild_id),
+            'name': f'guild {guild_id >> 22}',
+            'icon': None,
+            'owner_id': self._user['id'],
+            'features': [],
+            'roles': [{'id': str(guild_id), 'name': '@everyone', 'permissions': '104324673', 'position': 0}],
+            'emojis': [],
+            'member_count': 1,
+            'verification_level': 0,
+            'default_message_notifications': 0,
+        }
+
+    def _make_channel(self, channel_id: int, /) -> JSON:
+        return {'id': str(channel_id), 'type': 0, 'guild_id': str(self._channels[channel_id]), 'name': 'general', 'position': 0}
+
+    def _make_member(self, user: JSON, /) -> JSON:
+        return {'user': user, 'roles': [], 'joined_at': '2021-01-01T00:00:00+00:00', 'deaf': False, 'mute': False}
+
+    def _make_message(self, channel_id: int, content: str, /) -> JSON:
+        return {
+            'id': str(next(self._ids)),
+            'channel_id': str(channel_id),
+            'guild_id': str(self._channels[channel_id]),
+            'author': self._user,
+            'content': content,
+            'timestamp': '2021-01-01T00:00:00+00:00',
+            'edited_timestamp': None,
+            'tts': False,
+            'mention_everyone': False,
+            'mentions': [],
+            'mention_roles': [],
+            'attachments': [],
+            'embeds': [],
+            'pinned': False,
+            'type': 0,
+        }
+
+    def shard_of(self, guild_id: int, /) -> int:
+        """Returns the shard which receives events of the given guild."""
+        return (guild_id >> 22) % self.shards
+
+    # Lifecycle
+
+    async def start(self, /) -> None:
+        """|coro|
+
+        Starts listening. If ``port`` was ``0``, :attr:`port` is the port picked once this returns.
+        """
+        app = web.Application(middlewares=[self._middleware])
+        api = f'/api/v{self.v}'
+
+        app.router.add_get('/gateway', self._gateway)
+        app.router.add_get(api + '/gateway', self._get_gateway)
+        app.router.add_get(api + '/gateway/bot', self._get_gateway_bot)
+        app.router.add_get(api + '/users/@me', self._get_current_user)
+        app.router.add_get(api + '/users/{user_id}', self._get_user)
+        app.router.add_get(api + '/guilds/{guild_id}', self._get_guild)
+        app.router.add_get(api + '/guilds/{guild_id}/preview', self._get_guild)
+        app.router.add_get(api + '/guilds/{guild_id}/members/{user_id}', self._get_member)
+        app.router.add_get(api + '/channels/{channel_id}', self._get_channel)
+        app.router.add_get(api + '/channels/{channel_id}/messages', self._get_messages)
+        app.router.add_post(api + '/channels/{channel_id}/messages', self._create_message)
+        app.router.add_get(api + '/channels/{channel_id}/messages/{message_id}', self._get_message)
+        app.router.add_patch(api + '/channels/{channel_id}/messages/{message_id}', self._edit_message)
+        app.router.add_delete(api + '/channels/{channel_id}/messages/{message_id}', self._delete_message)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+
+        if self.port == 0:
+            self.port = self._runner.addresses[0][1]
+
+    async def close(self, /) -> None:
+        """|coro|
+
+        Disconnects every gateway connection and stops listening.
+        """
+        await self.disconnect(code=1001)
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    # REST
+
+    def _ratelimit_headers(self, bucket_hash: str, bucket: _Bucket, now: float, /) -> Dict[str, str]:
+        reset_after = max(bucket.reset_at - now, 0.0)
+        return {
+            'X-RateLimit-Limit': str(self.bucket_limit),
+            'X-RateLimit-Remaining': str(bucket.remaining),
+            'X-RateLimit-Reset': f'{time.time() + reset_after:.3f}',
+            'X-RateLimit-Reset-After': f'{reset_after:.3f}',
+            'X-RateLimit-Bucket': bucket_hash,
+        }
+
+    def _ratelimited(self, retry_after: float, scope: str, headers: Dict[str, str], /) -> web.Response:
+        self.ratelimited += 1
+        headers['Retry-After'] = f'{retry_after:.3f}'
+        headers['X-RateLimit-Scope'] = scope
+        if scope == 'global':
+            headers['X-RateLimit-Global'] = 'true'
+
+        body = {'message': 'You are being rate limited.', 'retry_after': retry_after, 'global': scope == 'global'}
+        return web.json_response(body, status=429, headers=headers)
+
+    def _take_global(self, now: float, /) -> float:
+        # Returns how long to wait if the global limit is exceeded, or 0
+        calls = self._global
+        while calls and calls[0] <= now - 1:
+            calls.popleft()
+
+        if len(calls) >= self.global_limit:
+            return calls[0] + 1 - now
+
+        calls.append(now)
+        return 0.0
+
+    @web.middleware
+    async def _middleware(self, request: web.Request, handler: _Handler) -> web.StreamResponse:
+        if request.path == '/gateway':
+            return await handler(request)
+
+        self.requests += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+        if request.headers.get('Authorization') != 'Bot ' + self.token:
+            return _error(401, '401: Unauthorized')
+
+        info = request.match_info
+        if info.http_exception is not None:
+            return _error(404, '404: Not Found')
+
+        now = time.monotonic()
+        retry_after = self._take_global(now)
+        if retry_after:
+            return self._ratelimited(retry_after, 'global', {})
+
+        route = request.method + ' ' + info.route.resource.canonical
+        major = info.get('channel_id') or info.get('guild_id') or ''
+        bucket_hash = hashlib.md5(route.encode()).hexdigest()[:16]
+
+        bucket = self._buckets.get((route, major))
+        if bucket is None or now >= bucket.reset_at:
+            bucket = self._buckets[route, major] = _Bucket(self.bucket_limit, now + self.bucket_reset)
+
+        if bucket.remaining <= 0:
+            return self._ratelimited(bucket.reset_at - now, 'user', self._ratelimit_headers(bucket_hash, bucket, now))
+
+        if self.ratelimit_chance and random.random() < self.ratelimit_chance:
+            return self._ratelimited(self.bucket_reset, 'shared', self._ratelimit_headers(bucket_hash, bucket, now))
+
+        bucket.remaining -= 1
+        response = await handler(request)
+        response.headers.update(self._ratelimit_headers(bucket_hash, bucket, now))
+        return response
+
+    async def _get_gateway(self, request: web.Request, /) -> web.Response:
+        return web.json_response({'url': self.gateway_url})
+
+    async def _get_gateway_bot(self, request: web.Request, /) -> web.Response:
+        return web.json_response({
+            'url': self.gateway_url,
+            'shards': self.shards,
+            'session_start_limit': {
+                'total': 1000,
+                'remaining': self._session_starts,
+                'reset_after': 86400000,
+                'max_concurrency': self.max_concurrency,
+            },
+        })
+
+    async def _get_current_user(self, request: web.Request, /) -> web.Response:
+        return web.json_response(self._user)
+
+    async def _get_user(self, request: web.Request, /) -> web.Response:
+        return web.json_response(self._make_user(int(request.match_info['user_id'])))
+
+    def _guild_or_404(self, request: web.Request, /) -> JSON:
+        guild = self._guilds.get(int(request.match_info['guild_id']))
+        if guild is None:
+            raise web.HTTPNotFound(text=json.dumps({'message': 'Unknown Guild', 'code': 10004}), content_type='application/json')
+
+        return guild
+
+    def _channel_or_404(self, request: web.Request, /) -> int:
+        channel_id = int(request.match_info['channel_id'])
+        if channel_id not in self._channels:
+            raise web.HTTPNotFound(text=json.dumps({'message': 'Unknown Channel', 'code': 10003}), content_type='application/json')
+
+        return channel_id
+
+    async def _get_guild(self, request: web.Request, /) -> web.Response:
+        return web.json_response(self._guild_or_404(request))
+
+    async def _get_member(self, request: web.Request, /) -> web.Response:
+        self._guild_or_404(request)
+        return web.json_response(self._make_member(self._make_user(int(request.match_info['user_id']))))
+
+    async def _get_channel(self, request: web.Request, /) -> web.Response:
+        return web.json_response(self._make_channel(self._channel_or_404(request)))
+
+    async def _get_messages(self, request: web.Request, /) -> web.Response:
+        messages = self._messages[self._channel_or_404(request)]
+        limit = min(int(request.query.get('limit', 50)), 100)
+        return web.json_response(list(reversed(messages))[:limit])
+
+    async def _create_message(self, request: web.Request, /) -> web.Response:
+        channel_id = self._channel_or_404(request)
+        data = await request.json()
+
+        message = self._make_message(channel_id, data.get('content', ''))
+        self._messages[channel_id].append(message)
+
+        await self.dispatch('MESSAGE_CREATE', message, shard_id=self.shard_of(self._channels[channel_id]))
+        return web.json_response(message)
+
+    def _message_or_404(self, request: web.Request, /) -> JSON:
+        channel_id = self._channel_or_404(request)
+        message_id = request.match_info['message_id']
+
+        for message in self._messages[channel_id]:
+            if message['id'] == message_id:
+                return message
+
+        raise web.HTTPNotFound(text=json.dumps({'message': 'Unknown Message', 'code': 10008}), content_type='application/json')
+
+    async def _get_message(self, request: web.Request, /) -> web.Response:
+        return web.json_response(self._message_or_404(request))
+
+    async def _edit_message(self, request: web.Request, /) -> web.Response:
+        message = self._message_or_404(request)
+        data = await request.json()
+
+        if 'content' in data:
+            message['content'] = data['content']
+            message['edited_timestamp'] = '2021-01-01T00:00:00+00:00'
+
+        return web.json_response(message)
+
+    async def _delete_message(self, request: web.Request, /) -> web.Response:
+        message = self._message_or_404(request)
+        self._messages[int(message['channel_id'])].remove(message)
+        return web.Response(status=204)
+
+    # Gateway
+
+    async def _gateway(self, request: web.Request, /) -> web.WebSocketResponse:
+        encoding = request.query.get('encoding', 'json')
+        compression = request.query.get('compress')
+
+        if encoding not in ('json', 'etf') or compression not in (None, 'zlib-stream', 'zstd-stream'):
+            raise web.HTTPBadRequest()
+
+        if compression == 'zstd-stream' and zstandard is None:
+            raise web.HTTPBadRequest(text='zstandard is not installed')
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+
+        connection = _GatewayConnection(ws, encoding, compression)
+        self._connections.append(connection)
+
+        try:
+            await connection.send(OpCode.hello, {'heartbeat_interval': int(self.heartbeat_interval * 1000)})
+
+            async for message in ws:
+                if message.type is not WSMsgType.TEXT and message.type is not WSMsgType.BINARY:
+                    break
+
+                payload = connection.decode(message.data)
+                await self._handle(connection, payload['op'], payload.get('d'))
+        finally:
+            self._connections.remove(connection)
+
+        return ws
+
+    async def _handle(self, connection: _GatewayConnection, op: int, data: Any, /) -> None:
+        if op == OpCode.heartbeat.value:
+            if self.latency or self.jitter:
+                await asyncio.sleep(self.latency + random.random() * self.jitter)
+
+            await connection.send(OpCode.heartbeat_ack)
+
+        elif op == OpCode.identify.value:
+            await self._identify(connection, data)
+
+        elif op == OpCode.resume.value:
+            await self._resume(connection, data)
+
+    async def _identify(self, connection: _GatewayConnection, data: JSON, /) -> None:
+        if data.get('token') != self.token:
+            await connection.ws.close(code=4004)  # Authentication failed
+            return
+
+        shard_id, shard_count = data.get('shard', (0, 1))
+        if shard_count != self.shards or not 0 <= shard_id < shard_count:
+            await connection.ws.close(code=4010)  # Invalid shard
+            return
+
+        now = time.monotonic()
+        bucket = shard_id % self.max_concurrency
+        last = self._last_identify.get(bucket)
+        self._last_identify[bucket] = now
+
+        if last is not None and now - last < self.identify_interval:
+            # Identified too fast for this bucket
+            await connection.send(OpCode.invalidate_session, False)
+            return
+
+        self.identifies.append((now, shard_id))
+        self._session_starts -= 1
+
+        connection.shard_id = shard_id
+        connection.session_id = session_id = hashlib.md5(f'{shard_id}:{now}'.encode()).hexdigest()
+        self._sessions[session_id] = shard_id
+
+        guilds = [guild for guild_id, guild in self._guilds.items() if self.shard_of(guild_id) == shard_id]
+        await connection.send(OpCode.dispatch, {
+            'v': self.v,
+            'user': self._user,
+            'guilds': [{'id': guild['id'], 'unavailable': True} for guild in guilds],
+            'session_id': session_id,
+            'resume_gateway_url': self.gateway_url,
+            'shard': [shard_id, shard_count],
+            'application': {'id': self._user['id'], 'flags': 0},
+        }, event='READY')
+
+        for guild in guilds:
+            await connection.send(OpCode.dispatch, guild, event='GUILD_CREATE')
+
+    async def _resume(self, connection: _GatewayConnection, data: JSON, /) -> None:
+        session_id = data.get('session_id')
+        if data.get('token') != self.token or session_id not in self._sessions:
+            await connection.send(OpCode.invalidate_session, False)
+            return
+
+        self.resumes.append((session_id, data.get('seq')))
+
+        connection.shard_id = self._sessions[session_id]
+        connection.session_id = session_id
+        connection.sequence = data.get('seq') or 0
+        await connection.send(OpCode.dispatch, {}, event='RESUMED')
+
+    def _targets(self, shard_id: Optional[int], /) -> List[_GatewayConnection]:
+        return [
+            connection for connection in self._connections
+            if connection.session_id is not None and (shard_id is None or connection.shard_id == shard_id)
+        ]
+
+    async def dispatch(self, event: str, data: JSON, /, *, shard_id: Optional[int] = None) -> int:
+        """|coro|
+
+        Dispatches an event to every connected shard, or only to ``shard_id``.
+        Returns the amount of connections it was sent to.
+        """
+        targets = self._targets(shard_id)
+        for connection in targets:
+            await connection.send(OpCode.dispatch, data, event=event)
+
+        return len(targets)
+
+    async def reconnect(self, /, *, shard_id: Optional[int] = None) -> None:
+        """|coro|
+
+        Asks every connected shard, or only ``shard_id``, to reconnect and resume.
+        """
+        for connection in self._targets(shard_id):
+            await connection.send(OpCode.reconnect)
+
+    async def invalidate(self, /, *, shard_id: Optional[int] = None, resumable: bool = False) -> None:
+        """|coro|
+
+        Invalidates the session of every connected shard, or only ``shard_id``.
+        Sessions which aren't ``resumable`` are forgotten, so the shards have to identify again.
+        """
+        for connection in self._targets(shard_id):
+            if not resumable:
+                self._sessions.pop(connection.session_id, None)
+
+            await connection.send(OpCode.invalidate_session, resumable)
+
+    async def disconnect(self, /, *, shard_id: Optional[int] = None, code: int = 4000) -> None:
+        """|coro|
+
+        Closes the websocket of every shard, or only ``shard_id``, with the given close code.
+        ``4000`` lets shards resume, ``4009`` makes them identify again and e.g. ``4004`` is fatal.
+        """
+        connections = self._connections if shard_id is None else self._targets(shard_id)
+        for connection in list(connections):
+            if code in (4007, 4009):
+                self._sessions.pop(connection.session_id, None)
+
+            await connection.ws.close(code=code)
@@ -6,6 +6,8 @@ __all__: Tuple[str, ...] = (
     'Snowflake',
     'HTTPVersion',
     'GatewayVersion',
+    'GatewayEncoding',
+    'GatewayCompression',
     'ValidDeleteMessageDays'
     'HTTPRequestMethod',
     'TimestampStyle',
@@ -19,6 +21,8 @@ Snowflake = int  # Type alias for readability
 
 HTTPVersion = Literal[3, 4, 5, 6, 7, 8, 9]
 GatewayVersion = Literal[4, 5, 6, 7, 8, 9]
+GatewayEncoding = Literal['json', 'etf']
+GatewayCompression = Literal['zlib-stream', 'zstd-stream']
 ValidDeleteMessageDays = Literal[0, 1, 2, 3, 4, 5, 6, 7]
 
 HTTPRequestMethod = Literal['GET', 'POST', 'PUT', 'PATCH', 'DELETE', 'HEAD', 'OPTIONS']
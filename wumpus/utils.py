@@ -1,17 +1,23 @@
+import math
 import time
 import asyncio
 
 from asyncio import AbstractEventLoop
 
 from base64 import b64encode
+from bisect import bisect_left
 from collections import deque
 from inspect import isawaitable
 from typing import (
     Any,
     Awaitable,
     Callable,
-    Coroutine,
+    Deque,
+    Iterator,
+    List,
     Optional, 
+    Sequence,
+    Tuple,
     TypeVar,
     Union,
     overload
@@ -26,11 +32,16 @@ __all__ = (
     '_try_int',
     '_get_mimetype',
     '_bytes_to_image_data',
-    'Ratelimiter'
+    'WaitHistogram',
+    'BaseRatelimiter',
+    'Ratelimiter',
+    'TokenBucket',
+    'GCRA',
+    'FixedWindow'
 )
 
 
-T = TypeVar('T', bound='Ratelimiter')
+T = TypeVar('T', bound='BaseRatelimiter')
 RT = TypeVar('RT', bound=Union[Any, Awaitable[Any]])
 
 
@@ -93,48 +104,366 @@ def _try_int(value, /):
         return None
 
 
-class Ratelimiter:
+class WaitHistogram:
     """
-    Utility class used to handle rate-limits.
+    Counts how long acquiring a rate-limiter had to wait, in buckets.
+
+    A wait of ``n`` seconds is counted in the first bucket whose bound is at least ``n``,
+    or in an overflow bucket past the last bound.
+
+    Parameters
+    ----------
+    bounds: Sequence[float]
+        The upper bounds of the buckets in seconds, in ascending order.
+    """
+
+    __slots__ = ('bounds', 'counts', 'count', 'total')
+
+    DEFAULT_BOUNDS: Tuple[float, ...] = (0.0, 0.001, 0.01, 0.1, 0.5, 1.0, 5.0, 30.0)
+
+    def __init__(self, bounds: Sequence[float] = DEFAULT_BOUNDS, /) -> None:
+        self.bounds: Tuple[float, ...] = tuple(bounds)
+        self.counts: List[int] = [0] * (len(self.bounds) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+
+    def __repr__(self, /) -> str:
+        return f'<WaitHistogram count={self.count} mean={self.mean:.4f}>'
+
+    def __iter__(self, /) -> Iterator[Tuple[float, int]]:
+        """Iterates over ``(bound, count)`` pairs, the last bound being infinity."""
+        return zip((*self.bounds, math.inf), self.counts)
+
+    @property
+    def mean(self, /) -> float:
+        """float: The mean wait, in seconds."""
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, seconds: float, /) -> None:
+        """Counts a wait of ``seconds``."""
+        self.counts[bisect_left(self.bounds, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, percentile: float, /) -> float:
+        """Returns the bound of the bucket the given percentile (``0`` to ``100``) of waits falls into."""
+        target = self.count * percentile / 100
+        seen = 0
+
+        for bound, count in self:
+            seen += count
+            if seen >= target and seen:
+                return bound
+
+        return 0.0
+
+    def clear(self, /) -> None:
+        """Resets every count."""
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+
+
+class BaseRatelimiter:
+    """
+    The base of rate-limiters, which allow ``rate`` calls every ``per`` seconds.
+
+    Rate-limiters are used as async context managers, or through :meth:`acquire`:
+
+    .. code:: python3
+
+        async with limiter:
+            ...
+
+    When a call is let through right away, this doesn't yield to the event loop.
+    Otherwise, callers wait in the order they arrived in, and are woken by a single timer
+    once their turn has come. How long callers waited is counted in :attr:`histogram`.
+
+    Time is measured with :func:`time.monotonic`.
+
+    Parameters
+    ----------
+    rate: int
+        The amount of calls allowed every ``per`` seconds.
+    per: float
+        The amount of seconds.
+    callback: Optional[Callable[[], Any]]
+        Called whenever a call has to wait. If it returns an awaitable, it is ran as a task.
     """
 
+    __slots__ = ('rate', 'per', 'histogram', '_callback', '_waiters', '_timer')
+
     def __init__(
-        self: T, 
+        self,
         /,
-        rate: int, 
-        per: int, 
-        *, 
-        callback: Optional[Coroutine[None, None, Any]] = None,
-        loop: Optional[AbstractEventLoop] = None
-    ) -> T:
+        rate: int,
+        per: float,
+        *,
+        callback: Optional[Callable[[], Any]] = None
+    ) -> None:
         self.rate: int = rate
-        self.per: int = per
-        self.recent_calls: deque = deque()
-        self.loop: Optional[AbstractEventLoop] = loop or asyncio.get_event_loop()
+        self.per: float = per
+        self.histogram: WaitHistogram = WaitHistogram()
+
+        self._callback: Optional[Callable[[], Any]] = callback
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def __repr__(self, /) -> str:
+        return f'<{self.__class__.__name__} rate={self.rate} per={self.per} waiting={len(self._waiters)}>'
 
-        self._callback: Optional[Coroutine[None, None, Any]] = callback
-        self._lock: asyncio.Lock = asyncio.Lock()
-    
     async def __aenter__(self: T) -> T:
-        async with self._lock:
-            if not self.loop.is_running:
-                raise RuntimeError('Ratelimiter should not be used if event loop is not running')
-
-            if len(self.recent_calls) >= self.rate:
-                sleep_until = time.time() + self.per - (self.recent_calls[-1] - self.recent_calls[0])
-                if self._callback is not None:
-                    self.loop.create_task(self._callback)
-                        
-                to_sleep = sleep_until - time.time()
-                if to_sleep > 0:
-                    await asyncio.sleep(to_sleep)
-            
-            return self
-
-    async def __aexit__(self: T, *_: Any) -> None:
-        async with self._lock:
-            self.recent_calls.append(time.time())
-
-            # pop the old calls in recent call list.
-            while self.recent_calls[-1] - self.recent_calls[0] >= self.per:
-                self.recent_calls.popleft() 
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *_: Any) -> None:
+        pass
+
+    def _retry_after(self, now: float, /) -> float:
+        raise NotImplementedError
+
+    def _consume(self, now: float, /) -> None:
+        raise NotImplementedError
+
+    @property
+    def waiting(self, /) -> int:
+        """int: The amount of callers waiting to be let through."""
+        return len(self._waiters)
+
+    def retry_after(self, /) -> float:
+        """Returns the amount of seconds until a call would be let through, ignoring any waiting callers."""
+        return self._retry_after(time.monotonic())
+
+    def try_acquire(self, /) -> bool:
+        """Lets a call through if it can be right away, returning whether it was."""
+        if self._waiters:
+            return False
+
+        now = time.monotonic()
+        if self._retry_after(now) > 0:
+            return False
+
+        self._consume(now)
+        return True
+
+    async def acquire(self, /) -> None:
+        """|coro|
+
+        Waits until a call can be let through.
+        """
+        if self.try_acquire():
+            self.histogram.record(0.0)
+            return
+
+        if self._callback is not None:
+            result = self._callback()
+            if isawaitable(result):
+                asyncio.ensure_future(result)
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiters.append(future)
+
+        if self._timer is None:
+            self._schedule(loop)
+
+        start = time.monotonic()
+        await future
+        self.histogram.record(time.monotonic() - start)
+
+    def _schedule(self, loop: AbstractEventLoop, /) -> None:
+        self._timer = loop.call_later(self._retry_after(time.monotonic()), self._wake, loop)
+
+    def _wake(self, loop: AbstractEventLoop, /) -> None:
+        self._timer = None
+        waiters = self._waiters
+
+        while waiters:
+            if waiters[0].done():
+                # Cancelled while waiting
+                waiters.popleft()
+                continue
+
+            now = time.monotonic()
+            if self._retry_after(now) > 0:
+                break
+
+            self._consume(now)
+            waiters.popleft().set_result(None)
+
+        if waiters:
+            self._schedule(loop)
+
+
+class Ratelimiter(BaseRatelimiter):
+    """
+    A sliding window rate-limiter, letting through at most ``rate`` calls in any ``per`` seconds.
+
+    The times of recent calls are kept in a deque of at most ``rate`` entries,
+    so checking it takes amortized constant time.
+
+    See :class:`BaseRatelimiter` for usage.
+    """
+
+    __slots__ = ('recent_calls',)
+
+    def __init__(
+        self,
+        /,
+        rate: int,
+        per: float,
+        *,
+        callback: Optional[Callable[[], Any]] = None,
+        loop: Optional[AbstractEventLoop] = None
+    ) -> None:
+        if asyncio.iscoroutine(callback):
+            # This used to take a coroutine object, which can only be awaited once
+            pending = [callback]
+            callback = lambda: pending.pop() if pending else None
+
+        super().__init__(rate, per, callback=callback)
+        self.recent_calls: Deque[float] = deque(maxlen=rate)
+
+    def _retry_after(self, now: float, /) -> float:
+        calls = self.recent_calls
+        while calls and now - calls[0] >= self.per:
+            calls.popleft()
+
+        if len(calls) < self.rate:
+            return 0.0
+
+        return calls[0] + self.per - now
+
+    def _consume(self, now: float, /) -> None:
+        self.recent_calls.append(now)
+
+
+class TokenBucket(BaseRatelimiter):
+    """
+    A token bucket rate-limiter. Tokens refill continuously at ``rate / per`` a second,
+    up to ``capacity``, and every call takes one.
+
+    See :class:`BaseRatelimiter` for usage.
+
+    Parameters
+    ----------
+    capacity: Optional[int]
+        The amount of tokens the bucket can hold, i.e. the largest burst allowed. Defaults to ``rate``.
+    """
+
+    __slots__ = ('capacity', '_tokens', '_updated_at')
+
+    def __init__(
+        self,
+        /,
+        rate: int,
+        per: float,
+        *,
+        capacity: Optional[int] = None,
+        callback: Optional[Callable[[], Any]] = None
+    ) -> None:
+        super().__init__(rate, per, callback=callback)
+        self.capacity: int = rate if capacity is None else capacity
+        self._tokens: float = float(self.capacity)
+        self._updated_at: float = time.monotonic()
+
+    @property
+    def tokens(self, /) -> float:
+        """float: The amount of tokens currently in the bucket."""
+        self._refill(time.monotonic())
+        return self._tokens
+
+    def _refill(self, now: float, /) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate / self.per)
+        self._updated_at = now
+
+    def _retry_after(self, now: float, /) -> float:
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+
+        return (1 - self._tokens) * self.per / self.rate
+
+    def _consume(self, now: float, /) -> None:
+        self._tokens -= 1
+
+
+class GCRA(BaseRatelimiter):
+    """
+    A rate-limiter using the generic cell rate algorithm, which spaces calls ``per / rate`` seconds apart
+    while allowing bursts of up to ``burst`` calls. Only a single timestamp is kept.
+
+    See :class:`BaseRatelimiter` for usage.
+
+    Parameters
+    ----------
+    burst: Optional[int]
+        The amount of calls that can be let through at once. Defaults to ``rate``.
+    """
+
+    __slots__ = ('burst', '_interval', '_tolerance', '_tat')
+
+    def __init__(
+        self,
+        /,
+        rate: int,
+        per: float,
+        *,
+        burst: Optional[int] = None,
+        callback: Optional[Callable[[], Any]] = None
+    ) -> None:
+        super().__init__(rate, per, callback=callback)
+        self.burst: int = rate if burst is None else burst
+        self._interval: float = per / rate
+        self._tolerance: float = self._interval * (self.burst - 1)
+        self._tat: float = 0.0  # The theoretical arrival time of the next call
+
+    def _retry_after(self, now: float, /) -> float:
+        return max(self._tat - self._tolerance - now, 0.0)
+
+    def _consume(self, now: float, /) -> None:
+        self._tat = max(self._tat, now) + self._interval
+
+
+class FixedWindow(BaseRatelimiter):
+    """
+    A fixed window rate-limiter, letting through ``rate`` calls in every window of ``per`` seconds.
+    The first window starts on the first call.
+
+    This is the cheapest limiter, but can let through up to ``2 * rate`` calls around the edge of a window.
+
+    See :class:`BaseRatelimiter` for usage.
+    """
+
+    __slots__ = ('_window', '_count')
+
+    def __init__(
+        self,
+        /,
+        rate: int,
+        per: float,
+        *,
+        callback: Optional[Callable[[], Any]] = None
+    ) -> None:
+        super().__init__(rate, per, callback=callback)
+        self._window: Optional[float] = None
+        self._count: int = 0
+
+    def _retry_after(self, now: float, /) -> float:
+        if self._window is None:
+            return 0.0
+
+        if now - self._window >= self.per:
+            self._window += (now - self._window) // self.per * self.per
+            self._count = 0
+
+        if self._count < self.rate:
+            return 0.0
+
+        return self._window + self.per - now
+
+    def _consume(self, now: float, /) -> None:
+        if self._window is None:
+            self._window = now
+
+        self._count += 1